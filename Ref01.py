@@ -16,6 +16,10 @@ v2.1 20180527
 """
 
 import random
+import evaluator
+import protocol
+import utility
+import opponent
 ANTE = 5
 name = 'sandy' # make decisions according to "S"core
 
@@ -29,6 +33,7 @@ def analyzeHand(cards):
 
     cards: a list or set of five cards.
         The 17 possible cards are 'J' and {'S','H','D','C'} x {'A','K','Q','J'}.
+        Graded by one lookup in the precomputed table of "evaluator".
     
     Returns:
         This function returns a tuple (score, category).
@@ -42,86 +47,7 @@ def analyzeHand(cards):
         >= 30000: two pair
         >= 20000: one pair
     """
-    rankWeight = {'A': 8, 'K': 6, 'Q': 4, 'J': 2}
-    hasJoker = False
-    rankToCount = dict()
-    suitToCount = dict() # needed to tell straight from royal straight flush
-    score = 0
-    category = None
-    ### pre-processing
-    for card in cards:
-        if len(card) == 1: # joker
-            hasJoker = True
-        else:
-            rankToCount[card[1]] = rankToCount.get(card[1],0) + 1
-            suitToCount[card[0]] = suitToCount.get(card[0],0) + 1
-    countToRank = dict()
-    for k in rankToCount:
-        countToRank.setdefault(rankToCount[k],list()).append(k)
-    ### 
-    if hasJoker and 4 in countToRank: # five card
-        category = 'five card'
-        score = 90000
-    elif hasJoker and len(rankToCount) == 4: # straight
-        if len(suitToCount) == 1: # same suit: royal straight flush
-            category = 'royal straight flush'
-            score = 80000
-        else: # straight
-            category = 'straight'
-            score = 50000
-    elif not hasJoker and 4 in countToRank: # four card w/o joker
-        category = 'four card'
-        score = 70000
-        score += rankWeight[countToRank[4][0]] * 1000
-        score += rankWeight[countToRank[1][0]] * 100
-    elif hasJoker and 3 in countToRank: # four card w/ joker
-        category = 'four card'
-        score = 70000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[1][0]] * 100
-    elif 3 in countToRank and 2 in countToRank: # full house w/o joker
-        category = 'full house'
-        score = 60000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[2][0]] * 100
-    elif hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # full house w/ joker
-        category = 'full house'
-        r1 = countToRank[2][0]
-        r2 = countToRank[2][1]
-        score = 60000 + max(rankWeight[r1] * 1000 + rankWeight[r2] * 100,
-                                rankWeight[r2] * 1000 + rankWeight[r1] * 100)
-    elif not hasJoker and 3 in countToRank and 2 not in countToRank: # 3 card w/o joker
-        category = 'three card'
-        r1 = countToRank[1][0]
-        r2 = countToRank[1][1]
-        score = 40000 + rankWeight[countToRank[3][0]] * 1000 + \
-                    max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
-    elif hasJoker and 2 in countToRank and 1 in countToRank: # 3 card w/ joker
-        category = 'three card'
-        r1 = countToRank[1][0]
-        r2 = countToRank[1][1]
-        score = 40000 + rankWeight[countToRank[2][0]] * 1000 + \
-                    max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
-    elif not hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # 2 pair (must be w/o joker)
-        category = 'two pair'
-        p1 = countToRank[2][0]
-        p2 = countToRank[2][1]
-        score = 30000 +  \
-                    max(rankWeight[p1] * 1000 + rankWeight[p2] * 100,
-                        rankWeight[p2] * 1000 + rankWeight[p1] * 100) + \
-                    rankWeight[countToRank[1][0]] * 10
-    elif not hasJoker and len(rankToCount) == 4: # 1 pair (must be w/o joker)
-        category = 'one pair'
-        p = countToRank[2][0]
-        score = 20000 + rankWeight[p] * 1000
-        if p == 'A':
-            score += rankWeight['K'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
-        elif p == 'K':
-            score += rankWeight['A'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
-        elif p == 'Q':
-            score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['J']
-        else: # p = 'J'
-            score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['Q']
-    else:
-        print('ops, this one is out of my analysis... %s' % (','.join(cards)))
-    ###
-    return score,category
+    return evaluator.analyzeHand(cards)
 
 
 def betting2(name,iQ,rQ,minBet,maxBet,target=None):
@@ -160,56 +86,57 @@ def betting2(name,iQ,rQ,minBet,maxBet,target=None):
     if target == None:
         target = random.randint(minBet,maxBet)
     while True:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check':
+        message = protocol.parseInstruction(iQ.get())
+        kind = message.kind
+        if kind == protocol.BET_CHECK:
             if random.random() > (maxBet - target)*0.2/(maxBet - minBet): # bet
                 myBet = random.randint(minBet,target)
                 isSetter = True
-                rQ.put('bet %d' % myBet)
+                rQ.put(protocol.responseText(('bet',myBet)))
             else: # check
                 checked = True
                 rQ.put('check')
                 if oppChecked: # both check, end betting
                     break
-        elif instruction == 'action:raise,call,fold': # this follows opponent's "bet" or "raise"
+        elif kind == protocol.RAISE_CALL_FOLD: # this follows opponent's "bet" or "raise"
             if target > oppBet: # raise
                 myBet = oppBet
                 myRaise = random.randint(1,target-oppBet)
                 myBet += myRaise
                 isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
+                rQ.put(protocol.responseText(('raise',myRaise),myBet))
             elif target == oppBet: # call
                 myBet = oppBet
-                rQ.put('call %d' % oppBet)
+                rQ.put(protocol.responseText(('call',0),myBet))
                 break
             else: # fold
                 rQ.put('fold')
                 break 
-        elif instruction == 'action:call,fold': # no "raise" option because maximum bet is reached
+        elif kind == protocol.CALL_FOLD: # no "raise" option because maximum bet is reached
             if oppBet >= target: # call
                 myBet = oppBet
-                rQ.put('call %d' % myBet)
+                rQ.put(protocol.responseText(('call',0),myBet))
                 break
             else: # fold
                 rQ.put('fold')
                 break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
+        elif kind == protocol.OPP_BET: # the value is the amount of bet
+            oppBet = message.value
             isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
+        elif kind == protocol.OPP_RAISE: # the value is the amount of raise
+            oppBet = myBet + message.value
             isSetter = False
-        elif instruction == 'opponent check':
+        elif kind == protocol.OPP_CHECK:
             oppChecked = True
             if checked:
                 break
-        elif instruction == 'opponent fold':
+        elif kind == protocol.OPP_FOLD:
             break
-        elif instruction == 'opponent call':
+        elif kind == protocol.OPP_CALL:
             oppBet = myBet
             break
         else:
-            print('%s > unknown instruction: %s' % (name,instruction))
+            utility.log(name,'unknown instruction: %s',protocol.instructionText(*message),level=utility.WARNING)
     return myBet,oppBet,isSetter
 
 def setTarget(cards):
@@ -229,6 +156,36 @@ def setTarget(cards):
     score = min(1,score)
     return score
 
+def changeMask(hand,maxChange=5):
+    """
+    Determine which cards to change, working on card masks.
+    This is the strategy of "changeCards" without any string handling.
+
+    hand: The 17-bit mask of the five cards. See "evaluator" for the card ids.
+    maxChange: The maximum number of cards that can be changed.
+        If there are more cards than "maxChange" that we would like to give up,
+        randomly pick "maxChange" ones to replace.
+
+    Returns: The mask of the cards to give up.
+    """
+    score,cat = analyzeHand(hand)
+    targetCards = 0 # the cards to change
+    if cat == 'five card' or cat == 'royal straight flush' or cat == 'straight' or cat == 'full house':
+        pass
+    elif cat == 'four card' or cat == 'three card' or cat == 'two pair' or cat == 'one pair': # give up the singletons
+        for rankMask in evaluator.RANK_MASK:
+            if evaluator.cardCount(hand & rankMask) == 1:
+                targetCards |= hand & rankMask
+    else:
+        utility.log(name,'SOMETHING WRONG in "changeMask()": %s is a %s',evaluator.maskToString(hand),cat,level=utility.WARNING)
+    ###
+    if maxChange < evaluator.cardCount(targetCards):
+        ids = [c for c in range(evaluator.JOKER) if targetCards >> c & 1]
+        targetCards = 0
+        for c in random.sample(ids,maxChange):
+            targetCards |= 1 << c
+    return targetCards
+
 def changeCards(cards,maxChange=5):
     """
     20180524
@@ -242,45 +199,49 @@ def changeCards(cards,maxChange=5):
 
     Returns: The set of cards to give up.
     """
-    hasJoker = False
-    rankToCount = dict()
-    suitToCount = dict() # needed to tell straight from royal straight flush
-    ### pre-processing
-    for card in cards:
-        if len(card) == 1: # joker
-            hasJoker = True
-        else:
-            rankToCount[card[1]] = rankToCount.get(card[1],0) + 1
-            suitToCount[card[0]] = suitToCount.get(card[0],0) + 1
-    countToRank = dict()
-    for k in rankToCount:
-        countToRank.setdefault(rankToCount[k],list()).append(k)#我猜測是反向查找
-    #
-    score,cat = analyzeHand(cards)
-    targetCards = set() # the cards to change
-    if cat == 'five card' or cat == 'royal straight flush' or cat == 'straight' or cat == 'full house':
-        pass
-    elif cat == 'four card': # change the singleton
-        for card in cards:
-            if card != 'J' and card[1] in countToRank[1]:
-                targetCards.add(card)
-                break
-    elif cat == 'three card': # give up the two singleton cards
-        for card in cards:
-            if card != 'J' and card[1] in countToRank[1]: # skip singltons
-                targetCards.add(card)
-    elif cat == 'two pair' or cat == 'one pair': # give up the singletons
-        for card in cards:
-            if card != 'J' and card[1] in countToRank[1]:
-                targetCards.add(card)
+    return set(evaluator.maskToCards(changeMask(evaluator.cardsToMask(cards),maxChange)))
+
+def decideBet(state):
+    """
+    The decision "betting2" makes at one action instruction, for the headless engine
+    (see "engine.DirectSeat"). The target is set at the first action of a betting interval,
+    from the same limits "play" uses.
+
+    state: an "engine.SeatState" with the hand, the interval, the action instruction and both bets.
+
+    Returns: the response as a tuple, ('bet',n), ('check',0), ('raise',r), ('call',0) or ('fold',0).
+    """
+    if state.interval == 1:
+        minBet = 5
+        maxBet = 15
     else:
-        print('SOMETHING WRONG in "changeCards()" .........................................')
-    ###
-    if maxChange < len(targetCards):
-        targetCards = random.sample(targetCards,maxChange)
-    return targetCards
+        minBet = state.bet1 + 1
+        maxBet = 30
+    target = state.memo.get('target')
+    if target is None:
+        target = int(setTarget(state.hand) * (maxBet - minBet) + minBet)
+        target = min(maxBet,target)
+        target = max(minBet,target)
+        state.memo['target'] = target
+    kind = state.options
+    oppBet = state.oppBet
+    if kind == protocol.BET_CHECK:
+        if random.random() > (maxBet - target)*0.2/(maxBet - minBet): # bet
+            return ('bet',random.randint(minBet,target))
+        return ('check',0)
+    elif kind == protocol.RAISE_CALL_FOLD:
+        if target > oppBet: # raise
+            return ('raise',random.randint(1,target-oppBet))
+        elif target == oppBet: # call
+            return ('call',0)
+        return ('fold',0)
+    elif kind == protocol.CALL_FOLD:
+        if oppBet >= target: # call
+            return ('call',0)
+        return ('fold',0)
+    return None
 
-def play(gameCount,iQ,rQ):
+def play(gameCount,iQ,rQ,model=None):
     """
     This function implements the fate17 protocol.
     Compared to the players in v1, decisions are now somewhat determinnistic, according to
@@ -292,21 +253,22 @@ def play(gameCount,iQ,rQ):
     gameCount: the number of games to play.
     iQ: the instruction queue. (See "betting2" for more.)
     rQ: the response queue. (See "betting2" for more.)
+    model: an "opponent.OpponentModel" to feed with the instructions of the match, or None.
     """
     ########## ########## ########## ########## ########## INITIALIZATION
+    if model is not None:
+        iQ = opponent.TappedQueue(iQ,model)
     balance = 0
     rQ.put('%s report for %d gmaes' % (name,gameCount)) # You can say anything here ...
     ##### start games
     for gameIndex in range(1,gameCount+1):
         ##### receive the assigned order (first or second)
-        instruction = iQ.get() # first or second
-        leader = True if instruction == 'first' else False
+        leader = protocol.parseInstruction(iQ.get()).kind == protocol.FIRST # first or second
         ##### pay ante
         instruction = iQ.get()
         balance -= 5
         ##### recieve cards
-        instruction = iQ.get()
-        hand = instruction.split(' ')[1].split(',')
+        hand = protocol.parseInstruction(iQ.get()).value # cards X,Y,...; the hand is kept as a card mask
         ########## ########## ########## ########## BETTING INTERVAL I
         minBet = 5
         maxBet = 15
@@ -324,23 +286,17 @@ def play(gameCount,iQ,rQ):
         ########## ########## ########## ########## CHANGING CARDS
         if isSetter1: # me change first
             instruction = iQ.get() # action:change
-            selected = changeCards(hand,5) # can change up to 5 cards
-            rQ.put('change %s' % (','.join(selected)))
-            instruction = iQ.get() # cards J,QH -- was missing in v0 and v1
-            newCards = list() if len(selected) == 0 else instruction.split()[1].split(',')
+            selected = changeMask(hand,5) # can change up to 5 cards
+            rQ.put(protocol.responseText(('change',selected)))
+            newCards = protocol.parseInstruction(iQ.get()).value # cards J,QH -- was missing in v0 and v1
             iQ.get() # opponent change X cards
         else: # the opponent changes first
-            instruction = iQ.get() # opponent change X cards
-            oppChangeCount = int(instruction.split()[2])
+            oppChangeCount = protocol.parseInstruction(iQ.get()).value # opponent change X cards
             iQ.get() # action:change
-            selected = changeCards(hand,7-oppChangeCount)
-            rQ.put('change %s' % (','.join(selected)))
-            instruction = iQ.get() # cards J,QH -- was missing in v0
-            newCards = list() if len(selected) == 0 else instruction.split()[1].split(',')
-        for i in selected: # remove changed cards
-            hand.remove(i)
-        for i in newCards: # include new cards
-            hand.append(i)
+            selected = changeMask(hand,7-oppChangeCount)
+            rQ.put(protocol.responseText(('change',selected)))
+            newCards = protocol.parseInstruction(iQ.get()).value # cards J,QH -- was missing in v0
+        hand = (hand & ~selected) | newCards # remove changed cards, include new cards
         ########## ########## ########## ########## BETTING INTERVAL II
         minBet = myBet1 + 1
         maxBet = 30
@@ -358,10 +314,10 @@ def play(gameCount,iQ,rQ):
             continue
         ########## ########## ########## ########## SHOW HANDS
         response = iQ.get() # opponent cards J,HA,DA,CQ,CA <=== added in v2.1
-        response = iQ.get() # win, lose, or tie
-        if response == 'win': # win the pot and ante (myBet == oppBet)
+        result = protocol.parseInstruction(iQ.get()).kind # win, lose, or tie
+        if result == protocol.WIN: # win the pot and ante (myBet == oppBet)
             balance += (myBet1 + myBet2 + ANTE) * 2
-        elif response == 'tie': # split the pot and get ante back
+        elif result == protocol.TIE: # split the pot and get ante back
             balance += myBet1 + myBet2 + ANTE
     #print('Hi, this is %s. My final balance should be %d.' % (name,balance))
     
\ No newline at end of file
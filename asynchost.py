@@ -0,0 +1,225 @@
+"""
+An asyncio match host that runs many matches in one thread.
+
+Each player is a coroutine with the async version of the play contract:
+    async def playAsync(gameCount,iQ,rQ)
+where iQ and rQ are asyncio queues of protocol strings: "await iQ.get()" waits for the next
+instruction and "rQ.put_nowait(text)" answers. A player module may define "playAsync" itself;
+otherwise it is adapted from its "decideBet" and "changeMask" (see "strategyPlay"), which then
+see exactly the "engine.SeatState" a "engine.DirectSeat" would give them.
+
+"AsyncMatch" drives the game flow of "engine.Match" (its "game" generator), awaiting the
+responses, so thousands of matches interleave on one event loop without a thread each.
+The action timeout is an asyncio timeout: it catches players that await too long, but a
+coroutine that computes without awaiting holds the loop (use "sandbox" for those).
+
+The players share the process's random module, so with many interleaved matches a seed fixes
+the deals of every match but not the draws of randomized players.
+
+Usage:
+    python asynchost.py Ref01 team18 [more players] [--matches N] [--games N] [--seed N]
+"""
+
+import asyncio
+import importlib
+from time import perf_counter_ns
+import engine
+import utility
+from engine import ACTION_TIMEOUT
+from protocol import instructionText,parseResponse
+
+_timeout = getattr(asyncio,'timeout',None)
+
+
+
+def strategyPlay(name,decideBet,changeMask):
+    """
+    Adapt a headless strategy to the async play contract.
+
+    Returns: playAsync(gameCount,iQ,rQ), a coroutine function that follows the protocol
+        through an "engine.StrategyAdapter", as the queued "engine.strategyPlay" does.
+        It returns when it gets None from iQ (the host is done).
+    """
+    async def playAsync(gameCount,iQ,rQ):
+        rQ.put_nowait('%s report for %d games' % (name,gameCount))
+        adapter = engine.StrategyAdapter(decideBet,changeMask)
+        while True:
+            text = await iQ.get()
+            if text is None:
+                return
+            response = adapter.handle(text)
+            if response is not None:
+                rQ.put_nowait(response)
+    return playAsync
+
+
+
+class AsyncSeat(engine.Seat):
+    """
+    A seat whose player is a coroutine on the host's event loop.
+
+    playAsync: the player's coroutine function, see the module docstring.
+    timeout: seconds the player has to answer an action instruction.
+    """
+    def __init__(self,name,playAsync,timeout=ACTION_TIMEOUT):
+        engine.Seat.__init__(self,name)
+        self.playAsync = playAsync
+        self.timeout = timeout
+        self.iQ = asyncio.Queue()
+        self.rQ = asyncio.Queue()
+        self.task = None
+        self.dead = False
+    @classmethod
+    def fromModule(cls,source,timeout=ACTION_TIMEOUT):
+        """
+        Build the seat from a player module with "playAsync", or with "decideBet" and "changeMask".
+        """
+        module = importlib.import_module(source)
+        playAsync = getattr(module,'playAsync',None)
+        if playAsync is None:
+            playAsync = strategyPlay(module.name,module.decideBet,module.changeMask)
+        return cls(module.name,playAsync,timeout)
+    async def startAsync(self,gameCount):
+        self.task = asyncio.ensure_future(self.playAsync(gameCount,self.iQ,self.rQ))
+        await self.response() # the player's greeting
+    def tell(self,kind,arg=None):
+        if not self.dead:
+            self.iQ.put_nowait(instructionText(kind,arg))
+    async def response(self):
+        """
+        The next line of the player, or None (and the player stopped) if it does not come in time.
+        """
+        rQ = self.rQ
+        if not rQ.empty():
+            return rQ.get_nowait()
+        try:
+            if _timeout is not None: # Python 3.11+: no extra task per wait
+                async with _timeout(self.timeout):
+                    return await rQ.get()
+            return await asyncio.wait_for(rQ.get(),self.timeout)
+        except asyncio.TimeoutError:
+            utility.log('host','player %s gave no response in %g seconds; stopped',self.name,self.timeout,
+                        level=utility.WARNING)
+            self.stop()
+            return None
+    async def actAsync(self,state):
+        if self.dead:
+            return None
+        self.iQ.put_nowait(instructionText(state.options))
+        text = await self.response()
+        return None if text is None else parseResponse(text)
+    def stop(self):
+        """
+        Stop the player for good; later actions get no response.
+        """
+        self.dead = True
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+    async def closeAsync(self):
+        """
+        Tell the player the match is over and wait for it to return.
+        """
+        if not self.dead:
+            self.iQ.put_nowait(None)
+            try:
+                await asyncio.wait_for(asyncio.shield(self.task),self.timeout)
+            except (asyncio.TimeoutError,Exception):
+                pass
+        self.stop()
+
+class AsyncMatch(engine.Match):
+    """
+    An "engine.Match" played on the event loop; seats may be "AsyncSeat"s or any
+    synchronous seat (e.g. "engine.DirectSeat"). The global random module is not seeded.
+    "profile" is not supported: the matches share one thread, so its clocks would charge
+    every match for the others; it raises ValueError (profile a match with "engine.Match").
+    """
+    def __init__(self,seats,gameCount,seed=None,verbose=None,onGame=None,duplicate=False,latency=None,
+                 trace=None,profile=None):
+        if profile is not None:
+            raise ValueError('AsyncMatch does not support profile; use engine.Match')
+        engine.Match.__init__(self,seats,gameCount,seed,verbose,onGame,duplicate,latency,trace)
+    async def runAsync(self):
+        """
+        Play all games.
+
+        Returns: the balances of the two seats.
+        """
+        for seat in self.seats:
+            if isinstance(seat,AsyncSeat):
+                await seat.startAsync(self.gameCount)
+            else:
+                seat.start(self.gameCount)
+        for gameIndex in range(1,self.gameCount+1):
+            self.recordGame(await self.playGameAsync(gameIndex,self.dealFor(gameIndex)))
+        for seat in self.seats:
+            if isinstance(seat,AsyncSeat):
+                await seat.closeAsync()
+            else:
+                seat.flush()
+        return [seat.balance for seat in self.seats]
+
+    async def playGameAsync(self,gameIndex,order=None):
+        """
+        "engine.Match.playGame", awaiting the responses of async seats.
+        """
+        seats = self.seats
+        game = self.game(gameIndex,order)
+        try:
+            request = next(game)
+            while True:
+                i,options,limit = request
+                state = self.ask(i,options,limit)
+                seat = seats[i]
+                start = perf_counter_ns()
+                if isinstance(seat,AsyncSeat):
+                    response = await seat.actAsync(state)
+                else:
+                    response = seat.act(state)
+                if self.latency is not None: # includes the time other matches held the loop
+                    self.latency.record(i,state,perf_counter_ns() - start)
+                request = game.send(self.accept(i,response))
+        except StopIteration as stop:
+            return stop.value
+
+async def runMatches(pairings,gameCount,seed=0,timeout=ACTION_TIMEOUT):
+    """
+    Play one match for every pairing, all at once on the running event loop.
+
+    pairings: a list of (P1 module, P2 module).
+    seed: the deals of match k are seeded with '<seed>:<k>'.
+
+    Returns: the list of finished "AsyncMatch"es.
+    """
+    matches = list()
+    for k,(p1,p2) in enumerate(pairings):
+        seats = [AsyncSeat.fromModule(p1,timeout),AsyncSeat.fromModule(p2,timeout)]
+        matches.append(AsyncMatch(seats,gameCount,'%s:%d' % (seed,k)))
+    await asyncio.gather(*(match.runAsync() for match in matches))
+    return matches
+
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+    from itertools import combinations
+    parser = argparse.ArgumentParser(description='Play many fate17 matches at once on one event loop.')
+    parser.add_argument('players',nargs='+',help='player modules, e.g. Ref01 team18')
+    parser.add_argument('--matches',type=int,default=1000,help='concurrent matches per pairing')
+    parser.add_argument('--games',type=int,default=100,help='games per match')
+    parser.add_argument('--seed',type=int,default=0)
+    args = parser.parse_args()
+    pairs = list(combinations(args.players,2))
+    pairings = [pair for pair in pairs for _ in range(args.matches)]
+    start = time.perf_counter()
+    matches = asyncio.run(runMatches(pairings,args.games,args.seed))
+    elapsed = time.perf_counter() - start
+    for p1,p2 in pairs:
+        played = [match for match,pairing in zip(matches,pairings) if pairing == (p1,p2)]
+        balances = [sum(match.seats[i].balance for match in played) for i in (0,1)]
+        misbehave = [any(match.seats[i].misbehave for match in played) for i in (0,1)]
+        print('%s vs %s: %d matches of %d games, balances %d / %d%s' % (p1,p2,len(played),args.games,
+                        balances[0],balances[1],' (misbehaved)' if any(misbehave) else ''))
+    print('%d matches, %d games in %.2f seconds (%.1f us per game)' % (len(matches),len(matches)*args.games,
+                        elapsed,elapsed / (len(matches)*args.games) * 1e6))
@@ -0,0 +1,295 @@
+"""
+Benchmark suite.
+
+Every benchmark is a function "bench(n)" that does n operations of one kind on inputs drawn
+from a fixed seed, so two runs on the same machine measure the same work:
+    evaluator   analyzeHand on card lists and on masks, Fate17Hand.analyze
+    dealer      Deck construction, deal and dealMask
+    bet         a bet, raise and call on a utility.Bet
+    change      changeCards of Ref01 and team18
+    betting     the betting2 loops of Ref01 and team18, fed by a scripted opponent
+    match       end-to-end games per second of Ref01 vs team18, headless and over queues
+Each benchmark is calibrated to run about "minTime" seconds per repeat; the best of the
+repeats is reported in operations per second and nanoseconds per operation.
+
+The results are printed as a table and can be written as JSON (--json). A result file saved
+with --save can serve as the baseline of a later run (--compare): any benchmark slower than
+the baseline by more than the threshold is reported and the exit status is 1. Baselines are
+only comparable on the same machine and Python.
+
+Usage:
+    python benchmark.py [--only NAME] [--json PATH] [--save PATH] [--compare PATH] [--threshold 0.1] [--quick]
+"""
+
+import sys
+import json
+import time
+import random
+import platform
+import evaluator
+import protocol
+import utility
+import engine
+
+SEED = 17
+HAND_COUNT = 1000 # the distinct inputs cycled through by a benchmark
+THRESHOLD = 0.1 # a benchmark regresses if it is this fraction slower than the baseline
+
+
+
+########## ########## ########## ########## ########## inputs
+def sampleHands(count=HAND_COUNT,seed=SEED):
+    """
+    Returns: count random five-card hands as lists of card strings.
+    """
+    rng = random.Random(seed)
+    return [rng.sample(evaluator.CARDS,5) for _ in range(count)]
+
+class ScriptedQueues:
+    """
+    The iQ and rQ of a betting loop against a scripted opponent, who calls every bet or
+    raise and checks back a check.
+
+    instructions: the instructions of the interval up to the player's first response.
+    """
+    def __init__(self,instructions):
+        self.instructions = list(instructions)
+        self.responses = list()
+    def get(self,block=True,timeout=None):
+        return self.instructions.pop(0)
+    def put(self,text,block=True,timeout=None):
+        self.responses.append(text)
+        kind = text.split(' ',1)[0]
+        if kind == 'bet' or kind == 'raise':
+            self.instructions.append(protocol.instructionText(protocol.OPP_CALL))
+        elif kind == 'check':
+            self.instructions.append(protocol.instructionText(protocol.OPP_CHECK))
+
+# the scripted intervals: the player opens interval I, or answers a bet of 10
+OPEN = (protocol.instructionText(protocol.BET_CHECK),)
+ANSWER = (protocol.instructionText(protocol.OPP_BET,10),protocol.instructionText(protocol.RAISE_CALL_FOLD))
+
+
+
+########## ########## ########## ########## ########## benchmarks
+def benchEvaluator():
+    hands = sampleHands()
+    masks = [evaluator.cardsToMask(cards) for cards in hands]
+    objects = [utility.Fate17Hand(cards) for cards in hands]
+    def analyzeCards(n):
+        analyze = utility.analyzeHand
+        for k in range(n):
+            analyze(hands[k % HAND_COUNT])
+    def analyzeMask(n):
+        analyze = utility.analyzeHand
+        for k in range(n):
+            analyze(masks[k % HAND_COUNT])
+    def fate17Hand(n):
+        for k in range(n):
+            objects[k % HAND_COUNT].analyze()
+    return [('evaluator.analyzeHand.cards',analyzeCards),('evaluator.analyzeHand.mask',analyzeMask),
+            ('evaluator.Fate17Hand.analyze',fate17Hand)]
+
+def benchDealer():
+    # the orders are drawn once; every bench(n) deals from a fresh random.Random(SEED), so every
+    # repeat and run deals the same cards
+    rng = random.Random(SEED)
+    orders = [utility.dealOrder(rng) for _ in range(HAND_COUNT)]
+    def construct(n):
+        Deck = utility.Deck
+        rng = random.Random(SEED)
+        for _ in range(n):
+            Deck(rng)
+    def deal(n): # a game's worth: two hands and three replacements
+        Deck = utility.Deck
+        rng = random.Random(SEED)
+        for _ in range(n):
+            deck = Deck(rng)
+            deck.deal(5)
+            deck.deal(5)
+            deck.deal(3)
+    def dealMask(n):
+        Deck = utility.Deck
+        rng = random.Random(SEED)
+        for _ in range(n):
+            deck = Deck(rng)
+            deck.dealMask(5)
+            deck.dealMask(5)
+            deck.dealMask(3)
+    def dealOrdered(n):
+        Deck = utility.Deck
+        for k in range(n):
+            deck = Deck(order=orders[k % HAND_COUNT])
+            deck.dealMask(5)
+            deck.dealMask(5)
+            deck.dealMask(3)
+    return [('dealer.Deck',construct),('dealer.deal',deal),('dealer.dealMask',dealMask),
+            ('dealer.dealMask.ordered',dealOrdered)]
+
+def benchBet():
+    def operations(n): # a bet, a raise and a call
+        Bet = utility.Bet
+        for _ in range(n):
+            bet = Bet()
+            bet.bet('P1',10)
+            bet.raiseBet('P2',5)
+            bet.call('P1')
+            bet.isFolded()
+    return [('bet.operations',operations)]
+
+def benchChange():
+    import Ref01
+    import team18
+    hands = sampleHands()
+    def changeCards(module):
+        def bench(n):
+            change = module.changeCards
+            for k in range(n):
+                change(hands[k % HAND_COUNT],5)
+        return bench
+    return [('change.Ref01.changeCards',changeCards(Ref01)),('change.team18.changeCards',changeCards(team18))]
+
+def benchBetting():
+    import Ref01
+    import team18
+    hands = [evaluator.cardsToMask(cards) for cards in sampleHands()]
+    ref01Targets = [int(Ref01.setTarget(hand) * 10 + 5) for hand in hands]
+    team18Args = list()
+    for hand in hands:
+        adjustscore = team18.setTarget(hand)
+        team18Args.append((adjustscore,team18.Target(adjustscore,engine.MAX_BET1),hand))
+    def ref01(script):
+        def bench(n):
+            betting = Ref01.betting2
+            for k in range(n):
+                queues = ScriptedQueues(script)
+                betting(Ref01.name,queues,queues,engine.MIN_BET,engine.MAX_BET1,ref01Targets[k % HAND_COUNT])
+        return bench
+    def team18Betting(script):
+        def bench(n):
+            betting = team18.betting2
+            for k in range(n):
+                queues = ScriptedQueues(script)
+                betting(team18.name,queues,queues,engine.MIN_BET,engine.MAX_BET1,*team18Args[k % HAND_COUNT])
+        return bench
+    return [('betting.Ref01.open',ref01(OPEN)),('betting.Ref01.answer',ref01(ANSWER)),
+            ('betting.team18.open',team18Betting(OPEN)),('betting.team18.answer',team18Betting(ANSWER))]
+
+def benchMatch():
+    def direct(n):
+        seats = [engine.DirectSeat.fromModule('Ref01'),engine.DirectSeat.fromModule('team18')]
+        engine.Match(seats,n,SEED).run()
+    def queued(n):
+        seats = [engine.QueueSeat.fromModule('Ref01',n),engine.QueueSeat.fromModule('team18',n)]
+        engine.Match(seats,n,SEED).run()
+        for seat in seats:
+            seat.player.join()
+    return [('match.direct',direct),('match.queue',queued)]
+
+SUITES = (benchEvaluator,benchDealer,benchBet,benchChange,benchBetting,benchMatch)
+
+
+
+########## ########## ########## ########## ########## runner
+def measure(bench,minTime=0.2,repeats=5):
+    """
+    Time bench(n) with n calibrated so that one repeat takes about minTime seconds.
+
+    Returns: (n, the seconds of every repeat).
+    """
+    n = 1
+    while True:
+        random.seed(SEED)
+        start = time.perf_counter()
+        bench(n)
+        elapsed = time.perf_counter() - start
+        if elapsed >= minTime / 4 or n >= 1 << 30:
+            break
+        n *= 4 if elapsed < minTime / 40 else 2
+    n = max(1,int(n * minTime / max(elapsed,1e-9)))
+    times = list()
+    for _ in range(repeats):
+        random.seed(SEED)
+        start = time.perf_counter()
+        bench(n)
+        times.append(time.perf_counter() - start)
+    return n,times
+
+def run(only=None,minTime=0.2,repeats=5,report=None):
+    """
+    Run the benchmarks whose name contains "only" (all if None).
+
+    report: an optional callable that receives every (name, result) as it is measured.
+
+    Returns: a JSON-ready dict with the environment ('meta') and, by benchmark name, the
+        operations per second, nanoseconds per operation and the raw repeat times ('results').
+    """
+    previous = utility.logLevel
+    utility.configureLogging(utility.ERROR) # no player chatter inside the timings
+    results = dict()
+    try:
+        for suite in SUITES:
+            for name,bench in suite():
+                if only is not None and only not in name:
+                    continue
+                n,times = measure(bench,minTime,repeats)
+                best = min(times)
+                result = results[name] = {'n': n,'opsPerSecond': n / best,'nsPerOp': best / n * 1e9,
+                                          'times': times}
+                if report is not None:
+                    report(name,result)
+    finally:
+        utility.configureLogging(previous)
+    meta = {'python': platform.python_version(),'implementation': platform.python_implementation(),
+            'machine': platform.machine(),'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),'minTime': minTime,'repeats': repeats,'seed': SEED}
+    return {'meta': meta,'results': results}
+
+def compare(results,baseline,threshold=THRESHOLD):
+    """
+    Compare two result dicts benchmark by benchmark.
+
+    Returns: a list of (name, current ops/s, baseline ops/s, ratio, regressed), for the
+        benchmarks in both; regressed if the ratio is below 1 - threshold.
+    """
+    rows = list()
+    old = baseline['results']
+    for name,result in sorted(results['results'].items()):
+        if name in old:
+            ratio = result['opsPerSecond'] / old[name]['opsPerSecond']
+            rows.append((name,result['opsPerSecond'],old[name]['opsPerSecond'],ratio,ratio < 1 - threshold))
+    return rows
+
+def formatResult(name,result):
+    return '%-32s %14.0f ops/s %12.1f ns/op' % (name,result['opsPerSecond'],result['nsPerOp'])
+
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark the evaluator, dealer, players and engine.')
+    parser.add_argument('--only',default=None,help='run the benchmarks whose name contains this')
+    parser.add_argument('--json',default=None,help='write the results to this JSON file')
+    parser.add_argument('--save',default=None,help='save the results as a baseline (same as --json)')
+    parser.add_argument('--compare',default=None,help='compare against this baseline file')
+    parser.add_argument('--threshold',type=float,default=THRESHOLD,help='allowed slowdown, e.g. 0.1 for 10%%')
+    parser.add_argument('--quick',action='store_true',help='shorter repeats, for a smoke test')
+    args = parser.parse_args()
+    minTime,repeats = (0.05,3) if args.quick else (0.2,5)
+    results = run(args.only,minTime,repeats,lambda name,result: print(formatResult(name,result),flush=True))
+    for path in (args.json,args.save):
+        if path:
+            with open(path,'w') as f:
+                json.dump(results,f,indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(results,baseline,args.threshold)
+        print('\n%-32s %14s %14s %8s' % ('vs ' + args.compare,'ops/s','baseline','ratio'))
+        for name,current,old,ratio,regressed in rows:
+            print('%-32s %14.0f %14.0f %7.2fx%s' % (name,current,old,ratio,'  REGRESSION' if regressed else ''))
+        regressions = [row[0] for row in rows if row[4]]
+        if regressions:
+            print('%d of %d benchmarks regressed by more than %g%%' % (len(regressions),len(rows),100*args.threshold))
+            sys.exit(1)
+        print('no regression beyond %g%%' % (100*args.threshold))
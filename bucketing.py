@@ -0,0 +1,235 @@
+"""
+Hand-strength buckets for strategy precomputation.
+
+Every one of the 6188 hands gets two features:
+    pre-draw value: the expected showdown share (see "equity") of the final hand after the
+        discard of the shipped policy ("policy", maxChange 5), over every replacement draw
+        from the 12 unseen cards;
+    post-draw equity: the showdown share of the hand as it is, against a random opponent
+        hand from the 12 unseen cards.
+The hands are clustered by k-means into "count" buckets per phase: PRE (the dealt hand, betting
+interval I) on both features, POST (the final hand, interval II) on the equity. Buckets are
+numbered from the weakest, so bucket 0 of PRE has the lowest pre-draw value.
+
+The tables are cached on disk, one file per bucket count next to this module:
+    a 16-byte header (magic, version, phase count, bucket count, hand count, fingerprint),
+    then one uint8 per (phase, hand index), row-major by phase.
+The fingerprint is a CRC of the evaluator's score table and the discard policy table, so a
+cache is rebuilt when the bucket count, the evaluator or the policy changes. A cached file is
+mapped read-only; "bucketOf" is one index lookup.
+
+Usage:
+    python bucketing.py [--buckets K] [--rebuild]    # build the cache and show the buckets
+"""
+
+import os
+import mmap
+import struct
+import zlib
+import evaluator
+import equity
+import policy
+import discard
+
+BUCKETS = 10
+PRE = 0 # the dealt hand, before the change
+POST = 1 # the final hand, after the change
+PHASES = (PRE,POST)
+BUCKET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),'buckets%d.f17b')
+MAGIC = b'F17B'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBxHxxI') # magic, version, phase count, bucket count, hand count, fingerprint
+ITERATIONS = 100 # the most k-means rounds
+
+_tables = dict() # bucket count -> the mmap of its cache
+_features = None
+
+
+
+########## ########## ########## ########## ########## features
+def fingerprint():
+    """
+    A CRC of what the buckets depend on: the evaluator's scores and the discard policy.
+    """
+    crc = zlib.crc32(repr(evaluator.SCORES).encode('ascii'))
+    return zlib.crc32(policy.table(),crc)
+
+def features():
+    """
+    Returns: (pre-draw value, post-draw equity), two lists by hand index.
+    """
+    global _features
+    if _features is None:
+        handIndex = evaluator.HAND_INDEX
+        shares = [equity.winShare(hand) for hand in evaluator.HANDS]
+        values = list()
+        draws = dict() # (unseen,count) -> the replacement draws
+        for hand in evaluator.HANDS:
+            cards = policy.policyDiscard(hand,5)
+            keep = hand & ~cards
+            key = (evaluator.FULL_MASK & ~hand,evaluator.cardCount(cards))
+            if key not in draws:
+                draws[key] = discard.drawMasks(*key)
+            total = 0.0
+            for draw in draws[key]:
+                total += shares[handIndex[keep | draw]]
+            values.append(total / len(draws[key]))
+        _features = (values,shares)
+    return _features
+
+def cluster(points,count,iterations=ITERATIONS):
+    """
+    Weighted k-means (Lloyd) of feature tuples, started from quantiles of the first feature.
+    The features are scaled to unit variance first, so that each counts the same.
+
+    points: a list of equal-length tuples.
+    count: the number of clusters.
+
+    Returns: a list, point -> cluster, numbered by increasing centroid.
+    """
+    dimension = len(points[0])
+    scales = list()
+    for d in range(dimension):
+        mean = sum(point[d] for point in points) / len(points)
+        deviation = (sum((point[d] - mean) ** 2 for point in points) / len(points)) ** 0.5
+        scales.append(1 / deviation if deviation > 0 else 1.0)
+    points = [tuple(point[d] * scales[d] for d in range(dimension)) for point in points]
+    weights = dict()
+    for point in points:
+        weights[point] = weights.get(point,0) + 1
+    unique = sorted(weights)
+    if len(unique) < count:
+        raise ValueError('%d distinct points cannot make %d buckets' % (len(unique),count))
+    centers = [unique[(2*k + 1) * len(unique) // (2*count)] for k in range(count)]
+    labels = [0] * len(unique)
+    for _ in range(iterations):
+        changed = False
+        for j,point in enumerate(unique):
+            best = min(range(count),key=lambda k: sum((point[d] - centers[k][d]) ** 2 for d in range(dimension)))
+            if best != labels[j]:
+                labels[j] = best
+                changed = True
+        sums = [[0.0] * dimension for _ in range(count)]
+        totals = [0] * count
+        for point,label in zip(unique,labels):
+            w = weights[point]
+            totals[label] += w
+            for d in range(dimension):
+                sums[label][d] += w * point[d]
+        for k in range(count):
+            if totals[k]:
+                centers[k] = tuple(s / totals[k] for s in sums[k])
+            else: # an empty cluster takes the point farthest from its center
+                far = max(range(len(unique)),key=lambda j: sum((unique[j][d] - centers[labels[j]][d]) ** 2
+                                                               for d in range(dimension)))
+                centers[k] = unique[far]
+                labels[far] = k
+                changed = True
+        if not changed:
+            break
+    order = sorted(range(count),key=lambda k: centers[k])
+    rank = [0] * count
+    for r,k in enumerate(order):
+        rank[k] = r
+    labelOf = dict((point,rank[label]) for point,label in zip(unique,labels))
+    return [labelOf[point] for point in points]
+
+def build(count=BUCKETS,path=None):
+    """
+    Cluster the hands and write the cache file of "count" buckets. The file is written under
+    a temporary name and renamed into place, so a reader (or a concurrent build, e.g. by the
+    tournament workers) never maps a partly written cache.
+
+    Returns: the path written.
+    """
+    if not 1 <= count <= 255:
+        raise ValueError('the bucket count must be 1..255')
+    path = path or BUCKET_FILE % count
+    values,shares = features()
+    pre = cluster(list(zip(values,shares)),count)
+    post = cluster([(share,) for share in shares],count)
+    temporary = '%s.%d.tmp' % (path,os.getpid()) # written whole, then renamed over the cache
+    try:
+        with open(temporary,'wb') as f:
+            f.write(HEADER.pack(MAGIC,VERSION,len(PHASES),count,len(evaluator.HANDS),fingerprint()))
+            f.write(bytes(pre))
+            f.write(bytes(post))
+        os.replace(temporary,path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return path
+
+
+
+########## ########## ########## ########## ########## lookup
+def load(count=BUCKETS,rebuild=True):
+    """
+    Map the cache of "count" buckets read-only, building it first if it is missing or stale.
+    Called on the first lookup; the mapping is kept.
+
+    Returns: the mmap. Raises ValueError if the file is stale and rebuild is False.
+    """
+    path = BUCKET_FILE % count
+    for attempt in (0,1):
+        if os.path.exists(path):
+            with open(path,'rb') as f:
+                table = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+            magic,version,phaseCount,bucketCount,handCount,crc = HEADER.unpack_from(table,0)
+            if (magic == MAGIC and version == VERSION and phaseCount == len(PHASES) and bucketCount == count
+                    and handCount == len(evaluator.HANDS) and len(table) == HEADER.size + phaseCount*handCount
+                    and crc == fingerprint()):
+                _tables[count] = table
+                return table
+            table.close()
+        if attempt or not rebuild:
+            raise ValueError('%s is not a bucket table for this evaluator and policy' % path)
+        build(count,path)
+
+def bucketOf(hand,phase,count=BUCKETS):
+    """
+    The bucket of a hand.
+
+    hand: the mask of five cards.
+    phase: PRE for the dealt hand, POST for the final hand.
+    count: the number of buckets.
+
+    Returns: the bucket, 0 (weakest) to count-1.
+    """
+    table = _tables.get(count)
+    if table is None:
+        table = load(count)
+    return table[HEADER.size + phase*len(evaluator.HANDS) + evaluator.HAND_INDEX[hand]]
+
+def bucketTable(count=BUCKETS,phase=PRE):
+    """
+    Returns: the buckets of one phase as a list, hand index -> bucket.
+    """
+    table = _tables.get(count)
+    if table is None:
+        table = load(count)
+    start = HEADER.size + phase*len(evaluator.HANDS)
+    return list(table[start:start + len(evaluator.HANDS)])
+
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+    parser = argparse.ArgumentParser(description='Build and show the hand buckets.')
+    parser.add_argument('--buckets',type=int,default=BUCKETS)
+    parser.add_argument('--rebuild',action='store_true',help='rebuild the cache even if it is up to date')
+    args = parser.parse_args()
+    start = time.perf_counter()
+    if args.rebuild:
+        build(args.buckets)
+    load(args.buckets)
+    print('%d buckets ready in %.2f seconds (%s)' % (args.buckets,time.perf_counter() - start,BUCKET_FILE % args.buckets))
+    values,shares = features()
+    for phase,label in ((PRE,'pre-draw'),(POST,'post-draw')):
+        buckets = bucketTable(args.buckets,phase)
+        print('%s bucket   hands   value range     equity range' % label)
+        for b in range(args.buckets):
+            members = [k for k,bucket in enumerate(buckets) if bucket == b]
+            print('%15d %7d   %.3f..%.3f     %.3f..%.3f' % (b,len(members),min(values[k] for k in members),
+                  max(values[k] for k in members),min(shares[k] for k in members),max(shares[k] for k in members)))
@@ -0,0 +1,496 @@
+"""
+CFR+ solver for an abstracted fate17.
+
+The game: both players pay the ante and get five cards; betting interval I (bets 5..15, the
+first player opens); the setter of interval I changes up to 5 cards, then the other player up
+to 7 minus that count; betting interval II (bets from bet1 up to 30, the setter opens); the
+showdown. The abstraction:
+    hands: a player's private state is the bucket of the dealt hand in interval I, and the
+        pair (dealt bucket, final bucket) in interval II, from the equity buckets of
+        "bucketing" ("scoreBuckets" with --abstraction score);
+    bets: bets and raises go to the levels of a grid, BET_GRID1 in interval I and
+        LEVELS2 levels from bet1 to 30 in interval II (see "betGrid2");
+    change: both players change cards with the shipped discard policy ("policy"), so the
+        change is chance and the two change counts are public, as in the real game.
+The chance nodes are sampled once: a few million deals are played through the discard
+policy with NumPy, giving for every setter and pair of change counts the joint probability
+of the players' private states and their showdown result. The evaluator's hand tables and
+the policy table make that a handful of array gathers per deal.
+
+The payoff is half the difference of the two balance changes, what "engine.Match.edge"
+measures, which makes the game zero-sum (the host's cut of the antes cancels). The solver
+runs vector CFR+ over the public tree: a decision node keeps its regrets and average
+strategy as (private state x action) arrays, and one traversal updates all private states
+at once. Every "every" iterations it reports the exploitability (chips per game, the mean
+gain of two best responses) and writes a checkpoint it can resume from.
+
+The strategy file (for "tablePlayer"):
+    HEADER, the bucket tables of interval I and II (one uint8 per hand index each),
+    the index: one line per decision node, 'key actor actions offset' separated by tabs,
+    padding to 8 bytes, then per node a (state x action) array of uint16 cumulative
+    probabilities (the last action of a state is 65535).
+A node key is the public history: the interval I actions, then '/<setter count>:<other count>/'
+and the interval II actions; an action is 'k' (check), 'b<level>', 'r<level>' (raise to a
+total of level), 'c' (call) or 'f' (fold), separated by commas, e.g. 'b5,r10,c/2:3/b10'.
+
+Needs NumPy.
+
+Usage:
+    python cfr.py [--iterations N] [--buckets B1 B2] [--abstraction equity|score] [--deals N] [--output strategy.f17s]
+                  [--checkpoint PATH [--resume]]
+"""
+
+import os
+import time
+import struct
+import evaluator
+import policy
+import bucketing
+import engine
+from utility import ANTE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BET_GRID1 = (5,10,15) # the bet levels of interval I
+LEVELS2 = 3 # the bet levels of interval II, from bet1 to MAX_BET2
+BUCKETS1 = 10
+BUCKETS2 = 10
+DEALS = 2000000
+CHUNK = 1 << 18 # deals sampled at once
+COUNTS = policy.CHANGE_COUNT # change counts 0..5
+STRATEGY_FILE = 'strategy.f17s'
+MAGIC = b'F17S'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHHHII4x') # magic, version, flags, hand count, buckets I, buckets II, nodes, index bytes
+CUMULATIVE_MAX = 65535
+
+DECISION = 0
+FOLD = 1
+CHECK = 2
+SHOWDOWN = 3
+DRAW = 4
+
+
+
+########## ########## ########## ########## ########## abstraction
+def scoreBuckets(count,scores=evaluator.SCORES):
+    """
+    Bucket the hands by score percentile; hands with the same score share a bucket.
+
+    Returns: a list, hand index -> bucket (0 is the weakest).
+    """
+    ranked = sorted(scores)
+    below = dict()
+    for k,score in enumerate(ranked):
+        below.setdefault(score,k)
+    return [below[score] * count // len(ranked) for score in scores]
+
+def betGrid2(bet1,levels=LEVELS2):
+    """
+    The bet levels of interval II after a bet of bet1 in interval I.
+    """
+    if levels < 2:
+        return (engine.MAX_BET2,)
+    return tuple(sorted(set(bet1 + (engine.MAX_BET2 - bet1) * k // (levels - 1) for k in range(levels))))
+
+def sampleChance(deals,buckets1,buckets2,seed=0):
+    """
+    Play "deals" random deals through the discard policy.
+
+    buckets1, buckets2: lists, hand index -> bucket, of the dealt and the final hands.
+
+    Returns: (W, P, S) with X = B1*B2 private states in interval II:
+        W: (B1, B1), the probability of the dealt buckets of (first, second);
+        P: (2, COUNTS, COUNTS, X, X), by setter (0 first, 1 second) and the change counts
+            of (setter, other), the probability of the private states of (first, second);
+        S: like P, the probability times the showdown result for first (1, 0 or -1).
+    """
+    b1Count = max(buckets1) + 1
+    b2Count = max(buckets2) + 1
+    x = b1Count * b2Count
+    rng = numpy.random.default_rng(seed)
+    handIndex = numpy.array(evaluator.HAND_INDEX,dtype=numpy.int32)
+    scores = numpy.array(evaluator.SCORES,dtype=numpy.int32)
+    bucket1 = numpy.array(buckets1,dtype=numpy.int64)
+    bucket2 = numpy.array(buckets2,dtype=numpy.int64)
+    table = policy.table()
+    discards = numpy.frombuffer(table,numpy.uint8,len(evaluator.HANDS)*COUNTS,policy.HEADER.size)
+    discards = discards.reshape(len(evaluator.HANDS),COUNTS).astype(numpy.int64)
+    popcount = numpy.array([bin(k).count('1') for k in range(32)],dtype=numpy.int64)
+    shifts = numpy.arange(5,dtype=numpy.int64)
+    W = numpy.zeros(b1Count*b1Count)
+    P = numpy.zeros((2,COUNTS*COUNTS*x*x))
+    S = numpy.zeros((2,COUNTS*COUNTS*x*x))
+    for start in range(0,deals,CHUNK):
+        n = min(CHUNK,deals - start)
+        rows = numpy.arange(n)
+        order = numpy.argsort(rng.random((n,len(evaluator.CARDS))),axis=1).astype(numpy.int64)
+        ids = [numpy.sort(order[:,0:5],axis=1),numpy.sort(order[:,5:10],axis=1)] # first, second
+        masks = [(1 << hand).sum(axis=1) for hand in ids]
+        index = [handIndex[mask] for mask in masks]
+        prefix = numpy.zeros((n,8),dtype=numpy.int64) # prefix[:,t]: the first t replacement cards
+        prefix[:,1:] = numpy.cumsum(1 << order[:,10:],axis=1)
+        W += numpy.bincount(bucket1[index[0]] * b1Count + bucket1[index[1]],minlength=b1Count*b1Count)
+        for setter in (0,1):
+            other = 1 - setter
+            final = [None,None]
+            rel = discards[index[setter],COUNTS - 1]
+            setterCount = popcount[rel]
+            given = ((1 << ids[setter]) * ((rel[:,None] >> shifts) & 1)).sum(axis=1)
+            final[setter] = (masks[setter] & ~given) | prefix[rows,setterCount]
+            rel = discards[index[other],numpy.minimum(COUNTS - 1,engine.TOTAL_CHANGE - setterCount)]
+            otherCount = popcount[rel]
+            given = ((1 << ids[other]) * ((rel[:,None] >> shifts) & 1)).sum(axis=1)
+            final[other] = ((masks[other] & ~given) | (prefix[rows,setterCount + otherCount]
+                                                        ^ prefix[rows,setterCount]))
+            finalIndex = [handIndex[mask] for mask in final]
+            states = [bucket1[index[i]] * b2Count + bucket2[finalIndex[i]] for i in (0,1)]
+            result = numpy.sign(scores[finalIndex[0]] - scores[finalIndex[1]]).astype(numpy.float64)
+            flat = ((setterCount * COUNTS + otherCount) * x + states[0]) * x + states[1]
+            P[setter] += numpy.bincount(flat,minlength=P.shape[1])
+            S[setter] += numpy.bincount(flat,result,minlength=S.shape[1])
+    shape = (2,COUNTS,COUNTS,x,x)
+    return (W.reshape(b1Count,b1Count) / deals,P.reshape(shape) / deals,S.reshape(shape) / deals)
+
+
+
+########## ########## ########## ########## ########## game tree
+class Node:
+    """
+    A node of the public tree.
+
+    kind: DECISION, FOLD, CHECK, SHOWDOWN or DRAW (the change between the intervals).
+    actor: the player to act (0 first, 1 second) at a DECISION; the setter at a DRAW.
+    value: the payoff to first per unit of probability at a FOLD, the stake at a SHOWDOWN
+        (bet1 at a DRAW).
+    children: the child nodes by action; at a DRAW a list of (setter count, other count,
+        interval II root, P, S).
+    """
+    __slots__ = ('kind','key','actor','actions','children','value','regrets','strategySum')
+    def __init__(self,kind,key,actor=None,value=0):
+        self.kind = kind
+        self.key = key
+        self.actor = actor
+        self.actions = ()
+        self.children = ()
+        self.value = value
+        self.regrets = None
+        self.strategySum = None
+
+def buildTree(P,S,levels2=LEVELS2):
+    """
+    The public tree of the abstract game; the interval II subtrees are built for the change
+    counts that have a probability in P.
+
+    Returns: the root, the first player's interval I decision.
+    """
+    def interval(prefix,starter,grid,bet1,onCall):
+        def node(history,actor,level,bets):
+            key = prefix + ','.join(history)
+            result = Node(DECISION,key,actor)
+            other = 1 - actor
+            actions = list()
+            children = list()
+            if level == 0: # nobody has bet
+                actions.append('k')
+                if history: # both checked
+                    children.append(Node(CHECK,key + ',k'))
+                else:
+                    children.append(node(history + ['k'],other,0,bets))
+                for amount in grid:
+                    actions.append('b%d' % amount)
+                    children.append(node(history + ['b%d' % amount],other,amount,_with(bets,actor,amount)))
+            else:
+                lost = bet1 + bets[actor] # the folder loses its bets
+                actions.append('f')
+                children.append(Node(FOLD,key + ',f',value=-lost if actor == 0 else lost))
+                actions.append('c')
+                children.append(onCall(history + ['c'],other,level))
+                for amount in grid:
+                    if amount > level:
+                        actions.append('r%d' % amount)
+                        children.append(node(history + ['r%d' % amount],other,amount,_with(bets,actor,amount)))
+            result.actions = tuple(actions)
+            result.children = tuple(children)
+            return result
+        return node([],starter,0,(0,0))
+
+    def draw(history,setter,bet1):
+        key = ','.join(history)
+        result = Node(DRAW,key,setter,bet1)
+        children = list()
+        for setterCount in range(COUNTS):
+            for otherCount in range(COUNTS):
+                p = P[setter,setterCount,otherCount]
+                if not p.any():
+                    continue
+                prefix = '%s/%d:%d/' % (key,setterCount,otherCount)
+                showdown = lambda history2,setter2,bet2,prefix=prefix: Node(SHOWDOWN,prefix + ','.join(history2),
+                                                                           value=bet1 + bet2 + ANTE)
+                root = interval(prefix,setter,betGrid2(bet1,levels2),bet1,showdown)
+                children.append((setterCount,otherCount,root,p,S[setter,setterCount,otherCount]))
+        result.children = children
+        return result
+
+    return interval('',0,BET_GRID1,0,draw)
+
+def _with(bets,i,amount):
+    return (amount,bets[1]) if i == 0 else (bets[0],amount)
+
+def decisionNodes(root):
+    """
+    The decision nodes in depth-first order, the order of checkpoints and strategy files.
+    """
+    result = list()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.kind == DECISION:
+            result.append(node)
+            stack.extend(reversed(node.children))
+        elif node.kind == DRAW:
+            stack.extend(child[2] for child in reversed(node.children))
+    return result
+
+
+
+########## ########## ########## ########## ########## solver
+class Solver:
+    """
+    Vector CFR+ over the public tree.
+
+    buckets1, buckets2: lists, hand index -> bucket, of the dealt and the final hands; the
+        strategy file keeps a bucket in one byte, so they must be 0..255 (ValueError if not).
+    deals: the deals sampled for the chance nodes.
+    """
+    def __init__(self,buckets1,buckets2,deals=DEALS,seed=0,levels2=LEVELS2):
+        if numpy is None:
+            raise ImportError('the CFR solver needs NumPy')
+        for buckets in (buckets1,buckets2):
+            if len(buckets) != len(evaluator.HANDS) or min(buckets) < 0 or max(buckets) > 255:
+                raise ValueError('a bucket table needs a bucket 0..255 for each of the %d hands' % len(evaluator.HANDS))
+        self.buckets1 = list(buckets1)
+        self.buckets2 = list(buckets2)
+        self.b1Count = max(buckets1) + 1
+        self.b2Count = max(buckets2) + 1
+        self.deals = deals
+        self.seed = seed
+        self.levels2 = levels2
+        self.W,P,S = sampleChance(deals,buckets1,buckets2,seed)
+        self.root = buildTree(P,S,levels2)
+        self.nodes = decisionNodes(self.root)
+        for node in self.nodes:
+            states = self.b1Count if '/' not in node.key else self.b1Count * self.b2Count
+            node.regrets = numpy.zeros((states,len(node.actions)))
+            node.strategySum = numpy.zeros((states,len(node.actions)))
+        self.iteration = 0
+
+    def iterate(self,count=1):
+        """
+        Run count CFR+ iterations (alternating updates, linear averaging).
+        """
+        ones = numpy.ones(self.b1Count)
+        for _ in range(count):
+            self.iteration += 1
+            for p in (0,1):
+                self._walk(self.root,p,ones,ones,self.W,None)
+
+    def _walk(self,node,p,reachP,reachO,P,S):
+        """
+        The counterfactual values of player p's private states at node, updating p's regrets.
+        P and S are the chance matrices of the interval (S is None in interval I).
+        """
+        kind = node.kind
+        if kind == DECISION:
+            strategy = _current(node.regrets)
+            if node.actor != p:
+                value = numpy.zeros(len(reachP))
+                for a,child in enumerate(node.children):
+                    reach = reachO * strategy[:,a]
+                    if reach.any():
+                        value += self._walk(child,p,reachP,reach,P,S)
+                return value
+            values = numpy.array([self._walk(child,p,reachP * strategy[:,a],reachO,P,S)
+                                  for a,child in enumerate(node.children)]).T # (state, action)
+            value = (values * strategy).sum(axis=1)
+            regrets = node.regrets
+            regrets += values - value[:,None]
+            numpy.maximum(regrets,0,out=regrets)
+            node.strategySum += self.iteration * reachP[:,None] * strategy
+            return value
+        if kind == FOLD:
+            return node.value * (P @ reachO) if p == 0 else -node.value * (reachO @ P)
+        if kind == SHOWDOWN:
+            return node.value * (S @ reachO) if p == 0 else -node.value * (reachO @ S)
+        if kind == CHECK:
+            return numpy.zeros(len(reachP))
+        # DRAW: expand the private states by the final bucket, collapse them back after
+        b1Count = self.b1Count
+        b2Count = self.b2Count
+        reachP2 = numpy.repeat(reachP,b2Count)
+        reachO2 = numpy.repeat(reachO,b2Count)
+        value = numpy.zeros(b1Count)
+        for setterCount,otherCount,child,P2,S2 in node.children:
+            value += self._walk(child,p,reachP2,reachO2,P2,S2).reshape(b1Count,b2Count).sum(axis=1)
+        return value
+
+    def bestResponse(self,node,p,reachO,P,S,average=True):
+        """
+        The values of player p's private states at node when p best-responds to the other's
+        average (or current) strategy.
+        """
+        kind = node.kind
+        if kind == DECISION:
+            strategy = _average(node) if average else _current(node.regrets)
+            if node.actor != p:
+                value = 0
+                for a,child in enumerate(node.children):
+                    reach = reachO * strategy[:,a]
+                    if reach.any():
+                        value = value + self.bestResponse(child,p,reach,P,S,average)
+                return value if not numpy.isscalar(value) else numpy.zeros(len(reachO))
+            return numpy.max([self.bestResponse(child,p,reachO,P,S,average) for child in node.children],axis=0)
+        if kind == FOLD:
+            return node.value * (P @ reachO) if p == 0 else -node.value * (reachO @ P)
+        if kind == SHOWDOWN:
+            return node.value * (S @ reachO) if p == 0 else -node.value * (reachO @ S)
+        if kind == CHECK:
+            return numpy.zeros(len(reachO))
+        b1Count = self.b1Count
+        b2Count = self.b2Count
+        reachO2 = numpy.repeat(reachO,b2Count)
+        value = numpy.zeros(b1Count)
+        for setterCount,otherCount,child,P2,S2 in node.children:
+            value += self.bestResponse(child,p,reachO2,P2,S2,average).reshape(b1Count,b2Count).sum(axis=1)
+        return value
+
+    def exploitability(self):
+        """
+        The mean gain of a best response against each player's average strategy, in chips per
+        game; 0 at an equilibrium of the abstract game.
+
+        Returns: (exploitability, the best-response value of first, of second).
+        """
+        ones = numpy.ones(self.b1Count)
+        values = [float(self.bestResponse(self.root,p,ones,self.W,None).sum()) for p in (0,1)]
+        return (values[0] + values[1]) / 2,values[0],values[1]
+
+    ########## ########## ########## ########## ########## checkpoints
+    def config(self):
+        return numpy.array([self.b1Count,self.b2Count,self.deals,self.seed,self.levels2,len(self.nodes)],
+                           dtype=numpy.int64)
+
+    def save(self,path):
+        """
+        Write a checkpoint: the iteration, the configuration and every regret and average.
+        """
+        temporary = path + '.tmp'
+        with open(temporary,'wb') as f:
+            numpy.savez(f,iteration=self.iteration,config=self.config(),
+                        buckets1=numpy.array(self.buckets1),buckets2=numpy.array(self.buckets2),
+                        regrets=numpy.concatenate([node.regrets.ravel() for node in self.nodes]),
+                        strategySum=numpy.concatenate([node.strategySum.ravel() for node in self.nodes]))
+        os.replace(temporary,path) # a crash while saving keeps the previous checkpoint
+
+    def load(self,path):
+        """
+        Resume from a checkpoint of a solver with the same configuration.
+        """
+        with numpy.load(path) as data:
+            if (not numpy.array_equal(data['config'],self.config())
+                    or data['buckets1'].tolist() != self.buckets1 or data['buckets2'].tolist() != self.buckets2):
+                raise ValueError('%s is a checkpoint of another configuration' % path)
+            regrets = data['regrets']
+            strategySum = data['strategySum']
+            self.iteration = int(data['iteration'])
+        offset = 0
+        for node in self.nodes:
+            size = node.regrets.size
+            node.regrets[...] = regrets[offset:offset + size].reshape(node.regrets.shape)
+            node.strategySum[...] = strategySum[offset:offset + size].reshape(node.strategySum.shape)
+            offset += size
+
+    ########## ########## ########## ########## ########## output
+    def write(self,path=STRATEGY_FILE):
+        """
+        Write the average strategy as a strategy file (see the module docstring).
+        """
+        lines = list()
+        blocks = list()
+        offset = 0
+        for node in self.nodes:
+            cumulative = numpy.cumsum(_average(node),axis=1)
+            block = numpy.minimum(numpy.rint(cumulative * CUMULATIVE_MAX),CUMULATIVE_MAX).astype('<u2')
+            block[:,-1] = CUMULATIVE_MAX
+            lines.append('%s\t%d\t%s\t%d\n' % (node.key,node.actor,','.join(node.actions),offset))
+            blocks.append(block.tobytes())
+            offset += len(blocks[-1])
+        index = ''.join(lines).encode('ascii')
+        index += b'\n' * (-(HEADER.size + 2*len(self.buckets1) + len(index)) % 8)
+        with open(path,'wb') as f:
+            f.write(HEADER.pack(MAGIC,VERSION,0,len(self.buckets1),self.b1Count,self.b2Count,
+                                len(self.nodes),len(index)))
+            f.write(bytes(self.buckets1))
+            f.write(bytes(self.buckets2))
+            f.write(index)
+            f.write(b''.join(blocks))
+
+def _current(regrets):
+    # regret matching; a state without positive regret plays uniformly
+    total = regrets.sum(axis=1,keepdims=True)
+    return numpy.where(total > 0,regrets / numpy.where(total > 0,total,1),1 / regrets.shape[1])
+
+def _average(node):
+    total = node.strategySum.sum(axis=1,keepdims=True)
+    return numpy.where(total > 0,node.strategySum / numpy.where(total > 0,total,1),_current(node.regrets))
+
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Solve the abstracted fate17 betting game with CFR+.')
+    parser.add_argument('--iterations',type=int,default=1000,help='iterations to run (in total, with --resume)')
+    parser.add_argument('--buckets',type=int,nargs=2,default=(BUCKETS1,BUCKETS2),metavar=('B1','B2'))
+    parser.add_argument('--abstraction',choices=('equity','score'),default='equity',
+                        help='hand buckets: equity clusters of "bucketing" or score percentiles')
+    parser.add_argument('--levels',type=int,default=LEVELS2,help='bet levels of interval II')
+    parser.add_argument('--deals',type=int,default=DEALS,help='deals sampled for the chance nodes')
+    parser.add_argument('--seed',type=int,default=0)
+    parser.add_argument('--every',type=int,default=100,help='report and checkpoint every N iterations')
+    parser.add_argument('--checkpoint',default=None,help='checkpoint file (.npz)')
+    parser.add_argument('--resume',action='store_true',help='continue from the checkpoint')
+    parser.add_argument('--output',default=STRATEGY_FILE)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    if args.abstraction == 'equity':
+        buckets1 = bucketing.bucketTable(args.buckets[0],bucketing.PRE)
+        buckets2 = bucketing.bucketTable(args.buckets[1],bucketing.POST)
+    else:
+        buckets1 = scoreBuckets(args.buckets[0])
+        buckets2 = scoreBuckets(args.buckets[1])
+    try:
+        solver = Solver(buckets1,buckets2,args.deals,args.seed,args.levels)
+    except ValueError as error:
+        parser.error(str(error))
+    print('%d deals sampled, %d decision nodes, %d regrets in %.1f seconds' % (args.deals,len(solver.nodes),
+          sum(node.regrets.size for node in solver.nodes),time.perf_counter() - start))
+    if args.resume and args.checkpoint and os.path.exists(args.checkpoint):
+        solver.load(args.checkpoint)
+        print('resumed at iteration %d' % solver.iteration)
+    try:
+        while solver.iteration < args.iterations:
+            solver.iterate(min(args.every,args.iterations - solver.iteration))
+            exploitability,first,second = solver.exploitability()
+            print('iteration %6d: exploitability %.4f chips per game (first %+.4f, second %+.4f), %.1f seconds'
+                  % (solver.iteration,exploitability,first,second,time.perf_counter() - start),flush=True)
+            if args.checkpoint:
+                solver.save(args.checkpoint)
+    except KeyboardInterrupt:
+        print('interrupted at iteration %d' % solver.iteration)
+        if args.checkpoint:
+            solver.save(args.checkpoint)
+    solver.write(args.output)
+    print('%s written (%d bytes)' % (args.output,os.path.getsize(args.output)))
@@ -0,0 +1,185 @@
+"""
+A batched instruction channel between the host and a player thread.
+
+"Channel" has the get()/put() interface of queue.Queue that the players use, but:
+    put() and get() touch no lock while the consumer has items to take;
+    putMany(items) hands a whole batch over with at most one wakeup;
+    a producer only wakes the consumer when it is actually parked.
+"engine.QueueSeat" keeps the instructions that need no response ('first', 'ante', 'cards ...',
+'opponent ...') and sends them together with the next 'action:' instruction, so a player
+thread wakes up once per action instead of once per instruction.
+
+Run "python channel.py" for the micro-benchmark: it plays the same queued match over
+queue.Queue (one put per instruction, as before) and over Channel, and counts the calls
+into locks and condition variables (acquire, release, wait, notify) per game.
+"""
+
+import time
+import queue
+import threading
+from collections import deque
+
+
+
+class Channel:
+    """
+    A FIFO for one consumer thread and any number of producers.
+
+    The items live in a collections.deque, whose append, extend and popleft are atomic.
+    A consumer that finds it empty announces itself in "waiting", checks again and parks
+    on "wake", a lock used as a binary semaphore: a producer that sees "waiting" releases it.
+    A wakeup can be spurious (the consumer just checks again), never lost.
+
+    lock: the lock to park on; a plain threading.Lock by default.
+    """
+    def __init__(self,lock=None):
+        self.items = deque()
+        self.wake = lock if lock is not None else threading.Lock()
+        self.wake.acquire() # held while no wakeup is pending
+        self.waiting = False # True while the consumer is (about to be) parked
+    def _wakeup(self):
+        self.waiting = False
+        try:
+            self.wake.release()
+        except RuntimeError: # a wakeup is already pending
+            pass
+    def put(self,item,block=True,timeout=None): # block and timeout as in queue.Queue; never blocks
+        self.items.append(item)
+        if self.waiting:
+            self._wakeup()
+    def putMany(self,items):
+        """
+        Append all items in order, waking the consumer at most once.
+        """
+        self.items.extend(items)
+        if self.waiting:
+            self._wakeup()
+    def get(self,block=True,timeout=None):
+        """
+        Remove and return the next item, as queue.Queue.get. Raises queue.Empty if no item
+        arrives in time (or at once, if block is False).
+        """
+        items = self.items
+        if items:
+            return items.popleft()
+        if not block:
+            raise queue.Empty
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.waiting = True # a producer that appends after this line wakes us up
+            if items:
+                break
+            if deadline is None:
+                self.wake.acquire()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.wake.acquire(timeout=remaining):
+                    if items:
+                        break
+                    self.waiting = False
+                    raise queue.Empty
+            if items:
+                break
+        self.waiting = False
+        return items.popleft()
+    def get_nowait(self):
+        return self.get(False)
+    def put_nowait(self,item):
+        self.put(item)
+    def qsize(self):
+        return len(self.items)
+    def empty(self):
+        return not self.items
+
+
+
+########## ########## ########## ########## ########## micro-benchmark
+class CountingLock:
+    """
+    A threading.Lock that counts the calls of acquire and release; for the benchmark.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+    def acquire(self,blocking=True,timeout=-1):
+        self.count += 1
+        return self.lock.acquire(blocking,timeout)
+    def release(self):
+        self.count += 1
+        self.lock.release()
+    def _is_owned(self): # used by threading.Condition
+        return self.lock.locked()
+    __enter__ = acquire
+    def __exit__(self,*args):
+        self.release()
+
+class CountingCondition(threading.Condition):
+    """
+    A threading.Condition that counts the calls of wait and notify in its lock's counter.
+    """
+    def wait(self,timeout=None):
+        self._lock.count += 1
+        return threading.Condition.wait(self,timeout)
+    def notify(self,n=1):
+        self._lock.count += 1
+        threading.Condition.notify(self,n)
+
+class CountingQueue(queue.Queue):
+    """
+    A queue.Queue whose mutex and conditions count their calls.
+    """
+    def __init__(self):
+        queue.Queue.__init__(self)
+        self.mutex = CountingLock()
+        self.not_empty = CountingCondition(self.mutex)
+        self.not_full = CountingCondition(self.mutex)
+        self.all_tasks_done = CountingCondition(self.mutex)
+    def syncCount(self):
+        return self.mutex.count
+
+class CountingChannel(Channel):
+    """
+    A "Channel" whose wake lock counts its calls.
+    """
+    def __init__(self):
+        Channel.__init__(self,CountingLock())
+        self.wake.count = 0 # not the initial acquire
+    def syncCount(self):
+        return self.wake.count
+
+def benchmark(p1='Ref01',p2='team18',gameCount=5000,seed=1):
+    """
+    Play the same queued match over queue.Queue and over Channel.
+
+    Returns: a dict, 'queue' and 'channel' -> (synchronization calls per game, microseconds per game).
+    """
+    import engine
+    import utility
+    results = dict()
+    for kind,queueType in (('queue',CountingQueue),('channel',CountingChannel)):
+        players = [utility.Player(p1,gameCount,queueType),utility.Player(p2,gameCount,queueType)]
+        seats = [engine.QueueSeat(player) for player in players]
+        match = engine.Match(seats,gameCount,seed)
+        start = time.perf_counter()
+        match.run()
+        elapsed = time.perf_counter() - start
+        for player in players:
+            player.join()
+        calls = sum(q.syncCount() for player in players for q in (player.iQ,player.rQ))
+        results[kind] = (calls / gameCount,elapsed / gameCount * 1e6)
+    return results
+
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Count lock traffic of queued matches.')
+    parser.add_argument('P1',nargs='?',default='Ref01')
+    parser.add_argument('P2',nargs='?',default='team18')
+    parser.add_argument('--games',type=int,default=5000)
+    parser.add_argument('--seed',type=int,default=1)
+    args = parser.parse_args()
+    results = benchmark(args.P1,args.P2,args.games,args.seed)
+    for kind in ('queue','channel'):
+        print('%-8s %6.1f lock/condition calls per game, %7.1f us per game' % ((kind,) + results[kind]))
+    print('lock traffic cut %.1fx' % (results['queue'][0] / results['channel'][0]))
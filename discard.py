@@ -0,0 +1,121 @@
+"""
+Optimal discard solver.
+
+For a hand, every subset of its five cards that "maxChange" allows is scored by the exact
+expected value of the final hand over every possible replacement draw from the unseen cards.
+    objective SCORE: the expected "analyzeHand" score of the final hand.
+    objective EQUITY: the expected showdown share (P(win) + P(tie)/2, see "equity") of the
+        final hand against an opponent hand drawn from the cards still unseen.
+The values of all 32 subsets are computed once per (hand, dead cards, objective) and kept,
+so asking again -- with any maxChange -- costs one dict lookup.
+"""
+
+from itertools import combinations
+import evaluator
+import equity
+
+SCORE = 'score'
+EQUITY = 'equity'
+
+_CACHE = dict() # (hand,dead,objective) -> list of (discard,value), sorted best first
+_BEST = dict() # (hand,maxChange,dead,objective) -> (discard,value)
+CACHE_LIMIT = 1 << 16
+
+
+
+def subsets(hand):
+    """
+    All sub-masks of a card mask, the empty one first.
+    """
+    result = [0]
+    while True:
+        sub = (result[-1] - hand) & hand # next sub-mask in increasing order
+        if sub == 0:
+            return result
+        result.append(sub)
+
+def drawMasks(unseen,count):
+    """
+    Every draw of "count" cards from the mask "unseen", as masks.
+    """
+    bits = [1 << c for c in range(len(evaluator.CARDS)) if unseen >> c & 1]
+    return [sum(combo) for combo in combinations(bits,count)]
+
+def discardValues(hand,dead=0,objective=SCORE):
+    """
+    Score every way of changing cards.
+
+    hand: the mask of my five cards.
+    dead: the mask of cards known to be out of the deck besides my hand.
+    objective: SCORE or EQUITY.
+
+    Returns: a list of (discard mask, expected value), best first. Ties prefer changing fewer
+        cards, then the smaller mask.
+    """
+    dead &= ~hand
+    key = (hand,dead,objective)
+    values = _CACHE.get(key)
+    if values is not None:
+        return values
+    if len(_CACHE) >= CACHE_LIMIT:
+        _CACHE.clear()
+        _BEST.clear()
+    unseen = evaluator.FULL_MASK & ~hand & ~dead
+    draws = dict()
+    values = list()
+    score = equity.MASK_SCORE
+    for discard in subsets(hand):
+        count = evaluator.cardCount(discard)
+        if count not in draws:
+            draws[count] = drawMasks(unseen,count)
+        keep = hand & ~discard
+        if objective == SCORE:
+            total = 0
+            for draw in draws[count]:
+                total += score[keep | draw]
+        else:
+            known = dead | discard
+            total = 0.0
+            for draw in draws[count]:
+                final = keep | draw
+                win,tie,lose = equity.equityCounts(final,known)
+                total += (win + tie / 2) / (win + tie + lose)
+        values.append((discard,total / len(draws[count])))
+    values.sort(key=lambda item: (-item[1],evaluator.cardCount(item[0]),item[0]))
+    _CACHE[key] = values
+    return values
+
+def bestDiscard(hand,maxChange=5,dead=0,objective=SCORE):
+    """
+    The best discard allowed by "maxChange" (e.g. 7 - oppChangeCount for the second changer).
+
+    Returns: (discard mask, expected value).
+    """
+    key = (hand,maxChange,dead,objective)
+    best = _BEST.get(key)
+    if best is None:
+        for best in discardValues(hand,dead,objective):
+            if evaluator.cardCount(best[0]) <= maxChange:
+                break
+        _BEST[key] = best
+    return best
+
+def bestDiscardMask(hand,maxChange=5,dead=0,objective=SCORE):
+    """
+    Like "bestDiscard" but returns only the mask, so it can stand in for a player's
+    "changeMask(hand,maxChange)".
+    """
+    return bestDiscard(hand,maxChange,dead,objective)[0]
+
+
+
+if __name__ == '__main__':
+    import time
+    for cards in (['SA','HA','DK','CQ','SJ'],['J','SA','SK','HQ','DJ'],['SA','HA','DA','CK','SQ']):
+        hand = evaluator.cardsToMask(cards)
+        for objective in (SCORE,EQUITY):
+            start = time.perf_counter()
+            discard,value = bestDiscard(hand,5,0,objective)
+            elapsed = time.perf_counter() - start
+            print('%s %-6s: change [%s], expected %.4f (%.1f ms)' % (','.join(cards),objective,
+                        evaluator.maskToString(discard),value,elapsed * 1000))
@@ -0,0 +1,823 @@
+"""
+Fate17 match engine.
+
+The game flow -- dealing, the two betting intervals, changing cards and the showdown --
+is written once in "Match". The players are reached through seats:
+    QueueSeat: the original protocol. A "utility.Player" thread is fed instruction strings
+        through its iQ and answers through its rQ.
+    DirectSeat: the headless fast path. The strategy callables "decideBet(state)" and
+        "changeMask(hand,maxChange)" are called directly in the host thread; no thread,
+        queue or string is involved.
+    "sandbox.SubprocessSeat": the player runs in its own process over pipes.
+All seats see the same instructions in the same order, so for a given seed and
+deterministic strategies a headless match plays exactly the games of a queued match.
+
+Usage:
+    python engine.py [P1] [P2] [gameCount] [--queue|--sandbox] [--seed N] [--verbose|--quiet] [--sample N] [--duplicate] [--latency] [--log PATH] [--profile] [--profile-dump DIR]
+"""
+
+import queue
+import random
+import importlib
+import traceback
+from time import perf_counter_ns
+import evaluator
+import utility
+import protocol
+import profiler
+from utility import ANTE,Deck,Bet,dealOrder
+from protocol import BET_CHECK,RAISE_CALL_FOLD,CALL_FOLD,CHANGE,instructionText,responseText,parseResponse,parseInstruction
+
+MIN_BET = 5 # lower bound of the bet in betting interval I
+MAX_BET1 = 15 # upper bound of the bet in betting interval I
+MAX_BET2 = 30 # upper bound of the bet in betting interval II
+MAX_CHANGE = 5 # the most cards the b1 setter can change
+TOTAL_CHANGE = 7 # the two players change at most this many cards together
+ACTION_TIMEOUT = 10 # seconds a player has to answer an "action:" instruction
+# the instructions a betting interval can start with, and the others that need the betting state
+BETTING_KINDS = (BET_CHECK,RAISE_CALL_FOLD,CALL_FOLD,protocol.OPP_BET,protocol.OPP_RAISE,protocol.OPP_CHECK)
+
+# game outcomes
+BOTH_CHECK1 = 'check1' # both checked in betting interval I
+FOLD1 = 'fold1' # somebody folded in betting interval I
+BOTH_CHECK2 = 'check2' # both checked in betting interval II
+FOLD2 = 'fold2' # somebody folded in betting interval II
+SHOWDOWN = 'showdown'
+OUTCOMES = (BOTH_CHECK1,FOLD1,BOTH_CHECK2,FOLD2,SHOWDOWN)
+
+
+
+class SeatState:
+    """
+    What a player knows when an action instruction arrives; the argument of "decideBet".
+
+    hand: the mask of the five cards in hand.
+    leader: True if the player got 'first' in this game.
+    interval: 1 or 2, the betting interval.
+    options: the kind of the action instruction, e.g. "protocol.RAISE_CALL_FOLD".
+    minBet, maxBet: the bet limits the host enforces in this interval.
+    myBet, oppBet: the bets placed in this interval so far, as in "betting2".
+    bet1: the bet agreed in betting interval I (0 during interval I).
+    oppChangeCount: the number of cards the opponent changed, or None if not known yet.
+    maxChange: the most cards the player can change, at 'action:change'.
+    memo: a dict the strategy may use freely; cleared when a betting interval starts.
+    context: any object the strategy keeps for the whole game; None at the deal.
+    """
+    __slots__ = ('hand','leader','interval','options','minBet','maxBet',
+                 'myBet','oppBet','bet1','oppChangeCount','maxChange','memo','context')
+    def __init__(self):
+        self.memo = dict()
+        self.reset(0,False)
+    def reset(self,hand,leader):
+        self.hand = hand
+        self.leader = leader
+        self.interval = 1
+        self.options = None
+        self.minBet = MIN_BET
+        self.maxBet = MAX_BET1
+        self.myBet = 0
+        self.oppBet = 0
+        self.bet1 = 0
+        self.oppChangeCount = None
+        self.maxChange = MAX_CHANGE
+        self.memo.clear()
+        self.context = None
+
+class GameRecord:
+    """
+    The result of one game, seen from the host.
+    Seat indices refer to the match: 0 is P1 and 1 is P2.
+
+    starter: the seat that got 'first'.
+    hands: the dealt hands (masks), by seat.
+    discards: the changed cards (masks), by seat.
+    finals: the hands after changing cards, by seat.
+    bet1, bet2: the agreed bets of the two intervals (0 if not agreed).
+    outcome: one of OUTCOMES.
+    winner: the seat that took the pot, or None (both checked or tie).
+    folder: the seat that folded, or None.
+    deltas: the balance change of each seat.
+    """
+    __slots__ = ('index','starter','hands','discards','finals','bet1','bet2',
+                 'outcome','winner','folder','deltas')
+    def __init__(self,index,starter):
+        self.index = index
+        self.starter = starter
+        self.hands = [0,0]
+        self.discards = [0,0]
+        self.finals = [0,0]
+        self.bet1 = 0
+        self.bet2 = 0
+        self.outcome = None
+        self.winner = None
+        self.folder = None
+        self.deltas = [0,0]
+
+
+
+class Seat:
+    """
+    The host side of one player. Subclasses decide how instructions reach the player.
+    """
+    def __init__(self,name):
+        self.name = name
+        self.balance = 0
+        self.misbehave = False
+    def start(self,gameCount): # called once before the first game
+        pass
+    def tell(self,kind,arg=None): # an instruction that needs no response
+        pass
+    def flush(self): # called after the last game
+        pass
+    def act(self,state): # an action instruction; returns a response tuple or None
+        raise NotImplementedError
+
+class DirectSeat(Seat):
+    """
+    A headless seat that calls the strategy in the host thread.
+
+    decideBet: decideBet(state) -> response tuple, see "SeatState" and "parseResponse".
+    changeMask: changeMask(hand,maxChange) -> mask of the cards to give up.
+    """
+    def __init__(self,name,decideBet,changeMask):
+        Seat.__init__(self,name)
+        self.decideBet = decideBet
+        self.changeMask = changeMask
+        self.failed = False # True once the strategy has raised
+    @classmethod
+    def fromModule(cls,source):
+        """
+        Build the seat from a player module that defines "name", "decideBet" and "changeMask".
+        """
+        module = importlib.import_module(source)
+        return cls(module.name,module.decideBet,module.changeMask)
+    def act(self,state):
+        try:
+            if state.options == CHANGE:
+                return ('change',self.changeMask(state.hand,state.maxChange))
+            return self.decideBet(state)
+        except Exception:
+            # the response is then invalid; only the first exception of a seat is logged
+            if not self.failed:
+                utility.log('host','%s raised in %r; later exceptions are not logged\n%s',self.name,
+                            instructionText(state.options),traceback.format_exc().rstrip(),level=utility.WARNING)
+                self.failed = True
+            return None
+
+class StrategyAdapter:
+    """
+    The player side of the protocol for a headless strategy: "handle" takes the instructions
+    one by one, keeps the "SeatState" a "DirectSeat" would give "decideBet" and "changeMask",
+    and asks the strategy at every action instruction. Used by "strategyPlay" and by
+    "asynchost.strategyPlay".
+
+    state: the "SeatState" of the running game.
+    gameOver: True once the running game has ended for the player (a fold, two checks in an
+        interval, or the showdown result); the next 'first' or 'second' clears it.
+    """
+    def __init__(self,decideBet,changeMask):
+        self.decideBet = decideBet
+        self.changeMask = changeMask
+        self.state = SeatState()
+        self.leader = False
+        self.selected = 0 # the cards given up at the last change, -1 before the deal
+        self.nextInterval = 1 # the betting interval to set up at its first betting message, 0 once set up
+        self.checks = 0 # the checks in the running interval
+        self.gameOver = False
+    def startInterval(self,interval):
+        # set up a betting interval as "Match.betting" does
+        state = self.state
+        if interval == 2:
+            state.bet1 = state.myBet
+        state.interval = interval
+        state.minBet = MIN_BET if interval == 1 else state.bet1
+        state.maxBet = MAX_BET1 if interval == 1 else MAX_BET2
+        state.myBet = 0
+        state.oppBet = 0
+        state.memo.clear()
+        self.checks = 0
+    def handle(self,text):
+        """
+        Take one instruction.
+
+        Returns: the response text for an action instruction, else None.
+        """
+        kind,value = parseInstruction(text)
+        state = self.state
+        if kind == protocol.FIRST or kind == protocol.SECOND:
+            self.leader = kind == protocol.FIRST
+            self.selected = -1
+            self.gameOver = False
+        elif kind == protocol.CARDS:
+            if self.selected == -1: # the deal
+                state.reset(value,self.leader)
+                self.nextInterval = 1
+            else: # the replacement cards
+                state.hand = (state.hand & ~self.selected) | value
+            self.selected = 0
+        elif kind == protocol.OPP_CHANGE:
+            state.oppChangeCount = value
+            self.nextInterval = 2
+        elif kind == CHANGE:
+            state.options = kind
+            state.maxChange = MAX_CHANGE if state.oppChangeCount is None else TOTAL_CHANGE - state.oppChangeCount
+            self.nextInterval = 2
+            try:
+                self.selected = self.changeMask(state.hand,state.maxChange)
+            except Exception:
+                self.selected = 0
+                return responseText(None)
+            return responseText(('change',self.selected))
+        elif kind in BETTING_KINDS:
+            if self.nextInterval: # the first betting message of an interval
+                self.startInterval(self.nextInterval)
+                self.nextInterval = 0
+            if kind == protocol.OPP_BET:
+                state.oppBet = value
+            elif kind == protocol.OPP_RAISE:
+                state.oppBet = state.myBet + value
+            elif kind == protocol.OPP_CHECK:
+                self.checks += 1
+                self.gameOver = self.checks == 2
+            else:
+                state.options = kind
+                try:
+                    response = self.decideBet(state)
+                except Exception:
+                    response = None
+                if response is not None:
+                    if response[0] == 'bet':
+                        state.myBet = response[1]
+                    elif response[0] == 'raise':
+                        state.myBet = state.oppBet + response[1]
+                    elif response[0] == 'call':
+                        state.myBet = state.oppBet
+                    elif response[0] == 'check':
+                        self.checks += 1
+                        self.gameOver = self.checks == 2
+                    elif response[0] == 'fold':
+                        self.gameOver = True
+                return responseText(response,state.myBet)
+        elif kind == protocol.OPP_CALL:
+            state.oppBet = state.myBet
+        elif kind == protocol.OPP_FOLD or kind == protocol.WIN or kind == protocol.LOSE or kind == protocol.TIE:
+            self.gameOver = True
+        return None
+
+def strategyPlay(name,decideBet,changeMask):
+    """
+    Adapt a headless strategy to the play contract of a queued player (see "StrategyAdapter").
+
+    Returns: play(gameCount,iQ,rQ).
+    """
+    def play(gameCount,iQ,rQ):
+        rQ.put('%s report for %d games' % (name,gameCount))
+        adapter = StrategyAdapter(decideBet,changeMask)
+        for gameIndex in range(gameCount):
+            adapter.gameOver = False
+            while not adapter.gameOver:
+                response = adapter.handle(iQ.get())
+                if response is not None:
+                    rQ.put(response)
+    return play
+
+class QueueSeat(Seat):
+    """
+    A seat that drives a "utility.Player" thread over the instruction/response queues.
+    If the instruction queue has "putMany" (see "channel.Channel"), the instructions that
+    need no response are held back and sent in one batch with the next action instruction.
+
+    timeout: seconds the player has to greet and to answer an action instruction. A player
+        that misses it is stopped for good: its thread cannot be killed, so it is no longer
+        fed and later actions get no response (a late answer is never read as the next one).
+    """
+    def __init__(self,player,timeout=ACTION_TIMEOUT):
+        Seat.__init__(self,player.name)
+        self.player = player
+        self.timeout = timeout
+        self.pending = list() # the instructions not sent yet
+        self.batch = hasattr(player.iQ,'putMany')
+        self.dead = False
+    @classmethod
+    def fromModule(cls,source,gameCount):
+        return cls(utility.Player(source,gameCount))
+    def start(self,gameCount):
+        self.player.start()
+        self._response() # the player's greeting, e.g. 'sandy report for 1000 games'
+    def tell(self,kind,arg=None):
+        if self.dead:
+            return
+        if self.batch:
+            self.pending.append(instructionText(kind,arg))
+        else:
+            self.player.iQ.put(instructionText(kind,arg))
+    def flush(self):
+        if self.pending and not self.dead:
+            self.player.iQ.putMany(self.pending)
+        self.pending = list()
+    def act(self,state):
+        if self.dead:
+            return None
+        if self.batch:
+            self.pending.append(instructionText(state.options))
+            self.flush()
+        else:
+            self.player.iQ.put(instructionText(state.options))
+        text = self._response()
+        return None if text is None else parseResponse(text)
+    def _response(self):
+        # the next line of the player, or None (and the seat stopped) if it does not come in time
+        try:
+            return self.player.rQ.get(timeout=self.timeout)
+        except queue.Empty:
+            utility.log('host','player %s gave no response in %g seconds; stopped',self.name,self.timeout,
+                        level=utility.WARNING)
+            self.dead = True
+            return None
+
+
+
+class Match:
+    """
+    A fate17 match between two seats.
+
+    seats: the two seats, P1 first. P1 gets 'first' in odd games.
+    gameCount: the number of games to play.
+    seed: seeds the deck, and the global random module the players use.
+        None leaves both unseeded.
+    verbose: if True, echo the instructions and responses like the host in the README;
+        None (the default) echoes if "utility.logLevel" is DEBUG. Either way only the games
+        kept by "utility.logSampled" are echoed.
+    onGame: an optional callable that receives each "GameRecord".
+    duplicate: if True, every deal order is played twice -- games 2k-1 and 2k -- with the
+        seats and hands swapped, so card luck cancels out of the paired result ("pairedEdge").
+    latency: an optional "latency.LatencyRecorder" that times every action.
+    trace: an optional callable trace(seat index, kind, value) that sees every instruction
+        (a "protocol" kind and its argument) and every validated response (its kind and value).
+    profile: an optional "profiler.MatchProfiler" that times the game phases and the seats.
+    """
+    def __init__(self,seats,gameCount,seed=None,verbose=None,onGame=None,duplicate=False,latency=None,
+                 trace=None,profile=None):
+        if duplicate and gameCount % 2:
+            raise ValueError('duplicate mode needs an even number of games, not %d' % gameCount)
+        self.seats = seats
+        self.gameCount = gameCount
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.verbose = verbose if verbose is not None else utility.logLevel >= utility.DEBUG
+        self.echo = False # echo the current game
+        self.onGame = onGame
+        self.states = (SeatState(),SeatState())
+        self.gameIndex = 0
+        self.outcomes = dict((o,0) for o in OUTCOMES)
+        self.wins = [0,0] # games in which the seat took the pot
+        self.folds = [0,0] # games in which the seat folded
+        self.ties = 0
+        self.duplicate = duplicate
+        # P1's edge over P2 (the difference of their balance changes), per game and per pair of games
+        self.edgeStats = [0,0,0] # count, sum, sum of squares
+        self.pairStats = [0,0,0]
+        self.order = None # the deal order of the current pair of games (duplicate mode)
+        self.pairEdge = 0 # P1's edge in the current pair of games so far
+        self.latency = latency
+        self.trace = trace
+        self.profile = profile
+        if profile is not None:
+            profile.attach(seats)
+        if latency is not None and latency.names is None:
+            latency.names = [seat.name for seat in seats]
+
+    def run(self):
+        """
+        Play all games.
+
+        Returns: the balances of the two seats.
+        """
+        if self.seed is not None:
+            random.seed(self.seed)
+        for seat in self.seats:
+            seat.start(self.gameCount)
+        for gameIndex in range(1,self.gameCount+1):
+            self.recordGame(self.playGame(gameIndex,self.dealFor(gameIndex)))
+        for seat in self.seats:
+            seat.flush()
+        return [seat.balance for seat in self.seats]
+
+    def dealFor(self,gameIndex):
+        """
+        The deal order of a game: None (a fresh deal in "playGame"), or in duplicate mode one
+        order for each pair of games.
+        """
+        if not self.duplicate:
+            return None
+        if gameIndex % 2 == 1:
+            self.order = dealOrder(self.rng)
+        return self.order
+
+    def recordGame(self,record):
+        """
+        Account a finished game in the duplicate-pair statistics.
+        """
+        if self.duplicate:
+            self.pairEdge += record.deltas[0] - record.deltas[1]
+            if record.index % 2 == 0:
+                _accumulate(self.pairStats,self.pairEdge)
+                self.pairEdge = 0
+
+    def edge(self,z=1.96):
+        """
+        P1's mean edge over P2 per game, from independent games.
+
+        Returns: (mean, half width of the confidence interval for normal quantile z).
+        """
+        return confidenceInterval(self.edgeStats,z)
+
+    def pairedEdge(self,z=1.96):
+        """
+        P1's mean edge over P2 per game, from the duplicate pairs (duplicate mode only).
+        Each pair saw the same cards from both seats, so the interval is much narrower.
+
+        Returns: (mean, half width of the confidence interval for normal quantile z).
+        """
+        mean,half = confidenceInterval(self.pairStats,z)
+        return mean / 2,half / 2
+
+    ########## ########## ########## ########## ########## host <-> player
+    def tell(self,i,kind,arg=None):
+        if self.trace is not None:
+            self.trace(i,kind,arg)
+        if self.echo:
+            print('> %s: %s' % (self.seats[i].name,instructionText(kind,arg)))
+        self.seats[i].tell(kind,arg)
+
+    def act(self,i,options,limit=None):
+        """
+        Send action instruction "options" to seat i and return a valid response tuple.
+        An invalid or missing response marks the seat as misbehaving; it is then taken
+        as 'check' or 'fold' (no change for 'action:change').
+
+        limit: the most cards the seat can change, for 'action:change'.
+        """
+        state = self.ask(i,options,limit)
+        if self.latency is None and self.profile is None:
+            return self.accept(i,self.seats[i].act(state))
+        start = perf_counter_ns()
+        if self.profile is None:
+            response = self.seats[i].act(state)
+        else:
+            response = self.profile.act(i,self.seats[i],state)
+        if self.latency is not None:
+            self.latency.record(i,state,perf_counter_ns() - start)
+        return self.accept(i,response)
+
+    def ask(self,i,options,limit=None):
+        """
+        Prepare seat i's state for action instruction "options"; the first half of "act".
+
+        Returns: the "SeatState" to hand to the seat.
+        """
+        state = self.states[i]
+        state.options = options
+        if options == CHANGE:
+            state.maxChange = limit
+        if self.trace is not None:
+            self.trace(i,options,None)
+        if self.echo:
+            print('> %s: %s' % (self.seats[i].name,instructionText(options)))
+        return state
+
+    def accept(self,i,response):
+        """
+        Validate the response of seat i to its pending action; the second half of "act".
+        """
+        seat = self.seats[i]
+        state = self.states[i]
+        if state.options == CHANGE:
+            if (response is None or response[0] != 'change' or response[1] & ~state.hand
+                    or evaluator.cardCount(response[1]) > state.maxChange):
+                self.misbehaved(seat,state,response)
+                response = ('change',0)
+        elif not self.isValid(state,response):
+            self.misbehaved(seat,state,response)
+            response = ('check',0) if state.options == BET_CHECK else ('fold',0)
+        if self.trace is not None:
+            self.trace(i,response[0],response[1])
+        if self.echo:
+            print('%s > %s' % (seat.name,responseText(response)))
+        return response
+
+    def misbehaved(self,seat,state,response):
+        # only the first invalid response of a seat is logged; "misbehave" marks the rest
+        if not seat.misbehave:
+            utility.log('host','%s answered %r to %r in game %d; later ones are not logged',seat.name,
+                        response,instructionText(state.options),self.gameIndex,level=utility.WARNING)
+        seat.misbehave = True
+
+    def isValid(self,state,response):
+        if response is None:
+            return False
+        kind = response[0]
+        if state.options == BET_CHECK:
+            return kind == 'check' or (kind == 'bet' and state.minBet <= response[1] <= state.maxBet)
+        if kind == 'call' or kind == 'fold':
+            return True
+        return (kind == 'raise' and state.options == RAISE_CALL_FOLD
+                and 1 <= response[1] and state.oppBet + response[1] <= state.maxBet)
+
+    ########## ########## ########## ########## ########## game flow
+    def playGame(self,gameIndex,order=None):
+        """
+        Play one game and update the balances.
+
+        order: the deal order of the game (see "utility.dealOrder"); drawn from the match's
+            rng if None. P1 gets 'first' in odd games, so replaying an order in the next game
+            swaps the seats and the hands.
+
+        Returns: the "GameRecord" of the game.
+        """
+        game = self.game(gameIndex,order)
+        try:
+            request = next(game)
+            while True:
+                request = game.send(self.act(*request))
+        except StopIteration as stop:
+            return stop.value
+
+    def game(self,gameIndex,order=None):
+        """
+        The game flow of "playGame" as a generator, so that other drivers (see "asynchost")
+        can wait for the players their own way. It yields (seat, options, limit) at every
+        action and expects the validated response to be sent back (see "ask" and "accept").
+
+        Returns: the "GameRecord" of the game, as the value of StopIteration.
+        """
+        self.gameIndex = gameIndex
+        seats = self.seats
+        states = self.states
+        first = 0 if gameIndex % 2 == 1 else 1
+        record = GameRecord(gameIndex,first)
+        if self.profile is not None:
+            self.profile.phase(profiler.INIT)
+        self.echo = self.verbose and utility.logSampled(gameIndex)
+        if self.echo:
+            print('<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<< Game %d of %d' % (gameIndex,self.gameCount))
+        ########## ########## ########## ########## INITIALIZATION
+        deck = Deck(order=order if order is not None else dealOrder(self.rng))
+        hands = record.hands
+        hands[first] = deck.dealMask(5)
+        hands[1-first] = deck.dealMask(5)
+        states[first].reset(hands[first],True)
+        states[1-first].reset(hands[1-first],False)
+        self.tell(first,protocol.FIRST)
+        self.tell(1-first,protocol.SECOND)
+        self.tell(first,protocol.ANTE)
+        self.tell(1-first,protocol.ANTE)
+        self.tell(first,protocol.CARDS,hands[first])
+        self.tell(1-first,protocol.CARDS,hands[1-first])
+        deltas = record.deltas
+        deltas[0] = deltas[1] = -ANTE
+        ########## ########## ########## ########## BETTING INTERVAL I
+        if self.profile is not None:
+            self.profile.phase(profiler.INTERVAL1)
+        if self.echo:
+            print('<<<<<<<<<<<<<<<<<<<<< BETTING INTERVAL I')
+        bet = yield from self.betting(first,1,MIN_BET,MAX_BET1)
+        if bet is None: # both check: ante to host
+            self.finish(record,BOTH_CHECK1)
+            return record
+        setter = seats.index(bet.setter)
+        deltas[0] -= states[0].myBet
+        deltas[1] -= states[1].myBet
+        if bet.isFolded(): # ante to host, the rest to the setter
+            deltas[setter] += bet.pot
+            record.winner = setter
+            record.folder = 1-setter
+            self.finish(record,FOLD1)
+            return record
+        bet1 = record.bet1 = states[0].myBet
+        ########## ########## ########## ########## CHANGING CARDS
+        if self.profile is not None:
+            self.profile.phase(profiler.CHANGE)
+        if self.echo:
+            print('<<<<<<<<<<<<<<<<<<<<<<<<< CHANGING CARDS')
+        count = yield from self.change(deck,record,setter,MAX_CHANGE)
+        self.tell(1-setter,protocol.OPP_CHANGE,count)
+        states[1-setter].oppChangeCount = count
+        oppCount = yield from self.change(deck,record,1-setter,TOTAL_CHANGE-count)
+        self.tell(setter,protocol.OPP_CHANGE,oppCount)
+        states[setter].oppChangeCount = oppCount
+        ########## ########## ########## ########## BETTING INTERVAL II
+        if self.profile is not None:
+            self.profile.phase(profiler.INTERVAL2)
+        if self.echo:
+            print('<<<<<<<<<<<<<<<<<<<< BETTING INTERVAL II')
+        states[0].bet1 = states[1].bet1 = bet1
+        bet = yield from self.betting(setter,2,bet1,MAX_BET2)
+        if bet is None: # both check: split the pot, ante to host
+            deltas[0] += bet1
+            deltas[1] += bet1
+            self.finish(record,BOTH_CHECK2)
+            return record
+        setter = seats.index(bet.setter)
+        deltas[0] -= states[0].myBet
+        deltas[1] -= states[1].myBet
+        if bet.isFolded(): # the bets in the pot go to the setter, ante to host
+            deltas[setter] += bet.pot + 2*bet1
+            record.winner = setter
+            record.folder = 1-setter
+            self.finish(record,FOLD2)
+            return record
+        bet2 = record.bet2 = states[0].myBet
+        ########## ########## ########## ########## SHOW HANDS
+        if self.profile is not None:
+            self.profile.phase(profiler.SHOWDOWN)
+        if self.echo:
+            print('<<<<<<<<<<<<<<<<<<<<<<<<<<<<< SHOW HANDS')
+        finals = record.finals
+        self.tell(first,protocol.OPP_CARDS,finals[1-first])
+        self.tell(1-first,protocol.OPP_CARDS,finals[first])
+        score0 = evaluator.RESULT[finals[0]][0]
+        score1 = evaluator.RESULT[finals[1]][0]
+        stake = bet1 + bet2 + ANTE
+        if score0 == score1: # split the pot and the ante
+            deltas[0] += stake
+            deltas[1] += stake
+            self.tell(first,protocol.TIE)
+            self.tell(1-first,protocol.TIE)
+        else:
+            winner = record.winner = 0 if score0 > score1 else 1
+            deltas[winner] += 2*stake
+            self.tell(winner,protocol.WIN)
+            self.tell(1-winner,protocol.LOSE)
+        self.finish(record,SHOWDOWN)
+        return record
+
+    def betting(self,starter,interval,minBet,maxBet):
+        """
+        Run one betting interval; "starter" is the red player of the game flow.
+        A generator, like "game".
+
+        Returns: the "utility.Bet" of the interval, or None if both players checked.
+            The bets of the two seats are left in their states' "myBet".
+        """
+        seats = self.seats
+        states = self.states
+        for state in states:
+            state.interval = interval
+            state.minBet = minBet
+            state.maxBet = maxBet
+            state.myBet = 0
+            state.oppBet = 0
+            state.memo.clear()
+        s = starter
+        o = 1-starter
+        response = yield s,BET_CHECK,None
+        if response[0] == 'check':
+            self.tell(o,protocol.OPP_CHECK)
+            response = yield o,BET_CHECK,None
+            if response[0] == 'check':
+                self.tell(s,protocol.OPP_CHECK)
+                return None
+            s,o = o,s
+        amount = response[1]
+        bet = Bet()
+        bet.bet(seats[s],amount)
+        states[s].myBet = states[o].oppBet = amount
+        self.tell(o,protocol.OPP_BET,amount)
+        while True:
+            response = yield o,(CALL_FOLD if states[o].oppBet >= maxBet else RAISE_CALL_FOLD),None
+            kind = response[0]
+            if kind == 'call':
+                bet.call(seats[o])
+                states[o].myBet = states[s].myBet
+                self.tell(s,protocol.OPP_CALL)
+                return bet
+            if kind == 'fold':
+                self.tell(s,protocol.OPP_FOLD)
+                return bet
+            r = response[1] # raise
+            bet.raiseBet(seats[o],r)
+            states[o].myBet = states[s].oppBet = states[o].oppBet + r
+            self.tell(s,protocol.OPP_RAISE,r)
+            s,o = o,s
+
+    def change(self,deck,record,i,limit):
+        """
+        Let seat i change up to "limit" cards. A generator, like "game".
+
+        Returns: the number of changed cards.
+        """
+        state = self.states[i]
+        selected = (yield i,CHANGE,limit)[1]
+        count = evaluator.cardCount(selected)
+        newCards = deck.dealMask(count) if count else 0
+        self.tell(i,protocol.CARDS,newCards)
+        state.hand = (state.hand & ~selected) | newCards
+        record.discards[i] = selected
+        record.finals[i] = state.hand
+        return count
+
+    def finish(self,record,outcome):
+        record.outcome = outcome
+        if outcome == BOTH_CHECK1 or outcome == FOLD1: # no change of cards
+            record.finals[0] = record.hands[0]
+            record.finals[1] = record.hands[1]
+        self.outcomes[outcome] += 1
+        if record.winner is not None:
+            self.wins[record.winner] += 1
+        elif outcome == SHOWDOWN:
+            self.ties += 1
+        if record.folder is not None:
+            self.folds[record.folder] += 1
+        for i in (0,1):
+            self.seats[i].balance += record.deltas[i]
+        _accumulate(self.edgeStats,record.deltas[0] - record.deltas[1])
+        if self.profile is not None:
+            self.profile.end()
+        if self.echo:
+            for seat in self.seats:
+                print("> %s's balance: %d" % (seat.name,seat.balance))
+        if self.onGame:
+            self.onGame(record)
+
+
+def _accumulate(stats,value):
+    stats[0] += 1
+    stats[1] += value
+    stats[2] += value * value
+
+def confidenceInterval(stats,z=1.96):
+    """
+    The mean and the half width of its normal confidence interval.
+
+    stats: [count, sum, sum of squares] of the samples.
+    """
+    count,total,totalSq = stats
+    if count < 2:
+        return (total / count if count else 0.0),float('inf')
+    mean = total / count
+    variance = max(0.0,(totalSq - count * mean * mean) / (count - 1))
+    return mean,z * (variance / count) ** 0.5
+
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Play a fate17 match.')
+    parser.add_argument('P1',nargs='?',default='Ref01')
+    parser.add_argument('P2',nargs='?',default='team18')
+    parser.add_argument('gameCount',nargs='?',type=int,default=1000)
+    parser.add_argument('--queue',action='store_true',help='run the players as threads over the queue protocol')
+    parser.add_argument('--sandbox',action='store_true',help='run each player in its own process over pipes')
+    parser.add_argument('--seed',type=int,default=None)
+    parser.add_argument('--verbose',action='store_true',help='echo the games like the host in the README')
+    parser.add_argument('--quiet',action='store_true',help='no player or host messages, not even warnings')
+    parser.add_argument('--sample',type=int,default=None,help='echo and log only every Nth game')
+    parser.add_argument('--duplicate',action='store_true',help='play every deal twice with the seats swapped')
+    parser.add_argument('--latency',action='store_true',help='report the answer time of every action')
+    parser.add_argument('--log',default=None,help='write the games to this binary log (see "gamelog")')
+    parser.add_argument('--log-instructions',action='store_true',help='log every instruction and response too')
+    parser.add_argument('--profile',action='store_true',help='time the game phases and the players')
+    parser.add_argument('--profile-dump',default=None,help='also cProfile every player into this directory')
+    args = parser.parse_args()
+    if args.verbose or args.quiet or args.sample:
+        utility.configureLogging(utility.DEBUG if args.verbose else utility.QUIET if args.quiet else None,args.sample)
+    if args.sandbox:
+        import sandbox
+        seats = [sandbox.SubprocessSeat(args.P1,args.gameCount,seed=args.seed),
+                 sandbox.SubprocessSeat(args.P2,args.gameCount,seed=args.seed)]
+    elif args.queue:
+        seats = [QueueSeat.fromModule(args.P1,args.gameCount),QueueSeat.fromModule(args.P2,args.gameCount)]
+    else:
+        seats = [DirectSeat.fromModule(args.P1),DirectSeat.fromModule(args.P2)]
+    recorder = None
+    if args.latency:
+        import latency
+        recorder = latency.LatencyRecorder(timeout=ACTION_TIMEOUT)
+    writer = None
+    if args.log:
+        import gamelog
+        writer = gamelog.GameLogWriter(args.log,args.log_instructions)
+    phases = None
+    if args.profile or args.profile_dump:
+        phases = profiler.MatchProfiler(args.profile_dump)
+    match = Match(seats,args.gameCount,args.seed,duplicate=args.duplicate,latency=recorder,
+                  onGame=writer.write if writer else None,
+                  trace=writer.trace if writer and args.log_instructions else None,profile=phases)
+    match.run()
+    dumps = phases.finish() if phases is not None else []
+    if writer is not None:
+        writer.close()
+    for i,seat in enumerate(seats):
+        print('%s: balance %d, won %d, folded %d%s' % (seat.name,seat.balance,match.wins[i],match.folds[i],
+                                                     ' (misbehaved)' if seat.misbehave else ''))
+    print('outcomes: %s' % ', '.join('%s %d' % (o,match.outcomes[o]) for o in OUTCOMES))
+    print('%s edge per game: %.3f +- %.3f (95%%, independent games)' % ((seats[0].name,) + match.edge()))
+    if args.duplicate:
+        print('%s edge per game: %.3f +- %.3f (95%%, duplicate pairs)' % ((seats[0].name,) + match.pairedEdge()))
+    if recorder is not None:
+        print(recorder.summary())
+    if phases is not None:
+        print(phases.summary())
+    for path in dumps:
+        print('%s:\n%s' % (path,profiler.topFunctions(path)))
@@ -0,0 +1,111 @@
+"""
+Exact heads-up showdown equity.
+
+Given my five cards and the cards known to be out of play, every hand the opponent can hold
+is drawn from the remaining cards -- C(12,5) = 792 hands when nothing else is known -- and
+each is compared with mine through the score table of "evaluator".
+
+With NumPy the comparison is one vectorized pass over the 6188 precomputed scores, masked to
+the hands disjoint from the known cards (about 20us). Without NumPy the 792 hands are
+enumerated in Python. Either way each (hand, dead) position is computed only once.
+"""
+
+import bisect
+from itertools import combinations
+import evaluator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# MASK_SCORE[mask] is the score of a five-card mask (0 for other masks).
+MASK_SCORE = [result[0] if result else 0 for result in evaluator.RESULT]
+_COMBOS = dict() # card count -> the 5-subsets of that many positions
+_CACHE = dict() # (hand,dead) -> (win,tie,lose)
+CACHE_LIMIT = 1 << 16
+
+if numpy is not None:
+    _HANDS = numpy.array(evaluator.HANDS,dtype=numpy.int32)
+    _SCORES = numpy.array(evaluator.SCORES,dtype=numpy.int32)
+
+
+
+def _countNumpy(score,known):
+    scores = _SCORES[(_HANDS & known) == 0]
+    win = int(numpy.count_nonzero(scores < score))
+    tie = int(numpy.count_nonzero(scores == score))
+    return win,tie,len(scores) - win - tie
+
+def _countPython(score,known):
+    bits = [1 << c for c in range(len(evaluator.CARDS)) if not known >> c & 1]
+    combos = _COMBOS.get(len(bits))
+    if combos is None:
+        combos = _COMBOS[len(bits)] = list(combinations(range(len(bits)),5))
+    scores = [MASK_SCORE[bits[a] | bits[b] | bits[c] | bits[d] | bits[e]] for a,b,c,d,e in combos]
+    scores.sort()
+    win = bisect.bisect_left(scores,score)
+    tie = bisect.bisect_right(scores,score) - win
+    return win,tie,len(scores) - win - tie
+
+_count = _countNumpy if numpy is not None else _countPython
+
+def equityCounts(hand,dead=0):
+    """
+    Count the opponent hands that my hand beats, ties and loses to.
+
+    hand: the mask of my five cards.
+    dead: the mask of other cards known not to be in the opponent's hand,
+        e.g. the cards I changed away.
+
+    Returns: (win, tie, lose), the numbers of possible opponent hands.
+    """
+    key = (hand,dead)
+    counts = _CACHE.get(key)
+    if counts is None:
+        if len(_CACHE) >= CACHE_LIMIT:
+            _CACHE.clear()
+        counts = _CACHE[key] = _count(MASK_SCORE[hand],hand | dead)
+    return counts
+
+def equity(hand,dead=0):
+    """
+    The exact showdown probabilities against a uniformly random opponent hand.
+
+    hand: the mask (or list of card strings) of my five cards.
+    dead: the mask (or list of card strings) of other cards the opponent cannot hold.
+
+    Returns: (pWin, pTie, pLose). Raises ValueError if the hand and the dead cards leave
+        fewer than five cards for the opponent.
+    """
+    if type(hand) is not int:
+        hand = evaluator.cardsToMask(hand)
+    if type(dead) is not int:
+        dead = evaluator.cardsToMask(dead)
+    win,tie,lose = equityCounts(hand,dead & ~hand)
+    total = win + tie + lose
+    if total == 0:
+        raise ValueError('no opponent hand is left beside %s and %d dead cards'
+                         % (evaluator.maskToString(hand),evaluator.cardCount(dead & ~hand)))
+    return win / total,tie / total,lose / total
+
+def winShare(hand,dead=0):
+    """
+    The expected share of the pot at showdown, pWin + pTie/2.
+    """
+    pWin,pTie,pLose = equity(hand,dead)
+    return pWin + pTie / 2
+
+
+
+if __name__ == '__main__':
+    import time
+    hands = evaluator.HANDS
+    start = time.perf_counter()
+    for hand in hands:
+        equityCounts(hand)
+    elapsed = time.perf_counter() - start
+    print('%s: %.1f us per equity (%d hands)' % ('numpy' if numpy is not None else 'python',
+                                                  elapsed / len(hands) * 1e6,len(hands)))
+    for cards in (['J','SA','HA','DA','CA'],['SA','HA','DK','CQ','SJ'],['SA','SK','SQ','SJ','J']):
+        print('%s: win %.4f, tie %.4f, lose %.4f' % (','.join(cards),*equity(cards)))
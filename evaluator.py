@@ -0,0 +1,239 @@
+"""
+Shared fate17 hand evaluator.
+
+All C(17,5) = 6188 five-card hands are graded once at import time.
+A hand is keyed by a 17-bit card mask, so grading a hand is one list index
+instead of building dictionaries and walking the if/elif chain.
+
+Card ids:
+    0..15 are {'S','H','D','C'} x {'A','K','Q','J'}, i.e. id = suit*4 + rank,
+    16 is the joker 'J'.
+    The bit of a card is (1 << id); a hand is the sum of the bits of its cards.
+"""
+
+from itertools import combinations
+
+SUITS = ('S','H','D','C')
+RANKS = ('A','K','Q','J')
+JOKER = 16
+JOKER_BIT = 1 << JOKER
+CARDS = tuple(suit + rank for suit in SUITS for rank in RANKS) + ('J',) # card id -> string
+CARD_ID = {card: i for i,card in enumerate(CARDS)} # string -> card id
+CARD_BIT = {card: 1 << i for i,card in enumerate(CARDS)} # string -> bit
+FULL_MASK = (1 << len(CARDS)) - 1
+CATEGORIES = ('one pair','two pair','three card','straight','full house','four card',
+              'royal straight flush','five card') # category code -> category
+NOT_A_HAND = (0,None) # the result of "analyzeHand" for anything that is not a hand
+RANK_MASK = tuple(0x1111 << r for r in range(4)) # the four suits of a rank (no joker)
+SUIT_MASK = tuple(0xF << (4*s) for s in range(4)) # the four ranks of a suit (no joker)
+
+
+
+def gradeCards(cards):
+    """
+    The original if/elif grading of "analyzeHand", kept as the reference the table is built from.
+
+    cards: a list or set of five card strings.
+
+    Returns: (score, category). See "analyzeHand".
+    """
+    rankWeight = {'A': 8, 'K': 6, 'Q': 4, 'J': 2}
+    hasJoker = False
+    rankToCount = dict()
+    suitToCount = dict() # needed to tell straight from royal straight flush
+    score = 0
+    category = None
+    ### pre-processing
+    for card in cards:
+        if len(card) == 1: # joker
+            hasJoker = True
+        else:
+            rankToCount[card[1]] = rankToCount.get(card[1],0) + 1
+            suitToCount[card[0]] = suitToCount.get(card[0],0) + 1
+    countToRank = dict()
+    for k in rankToCount:
+        countToRank.setdefault(rankToCount[k],list()).append(k)
+    ###
+    if hasJoker and 4 in countToRank: # five card
+        category = 'five card'
+        score = 90000
+    elif hasJoker and len(rankToCount) == 4: # straight
+        if len(suitToCount) == 1: # same suit: royal straight flush
+            category = 'royal straight flush'
+            score = 80000
+        else: # straight
+            category = 'straight'
+            score = 50000
+    elif not hasJoker and 4 in countToRank: # four card w/o joker
+        category = 'four card'
+        score = 70000
+        score += rankWeight[countToRank[4][0]] * 1000
+        score += rankWeight[countToRank[1][0]] * 100
+    elif hasJoker and 3 in countToRank: # four card w/ joker
+        category = 'four card'
+        score = 70000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[1][0]] * 100
+    elif 3 in countToRank and 2 in countToRank: # full house w/o joker
+        category = 'full house'
+        score = 60000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[2][0]] * 100
+    elif hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # full house w/ joker
+        category = 'full house'
+        r1 = countToRank[2][0]
+        r2 = countToRank[2][1]
+        score = 60000 + max(rankWeight[r1] * 1000 + rankWeight[r2] * 100,
+                                rankWeight[r2] * 1000 + rankWeight[r1] * 100)
+    elif not hasJoker and 3 in countToRank and 2 not in countToRank: # 3 card w/o joker
+        category = 'three card'
+        r1 = countToRank[1][0]
+        r2 = countToRank[1][1]
+        score = 40000 + rankWeight[countToRank[3][0]] * 1000 + \
+                    max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
+    elif hasJoker and 2 in countToRank and 1 in countToRank: # 3 card w/ joker
+        category = 'three card'
+        r1 = countToRank[1][0]
+        r2 = countToRank[1][1]
+        score = 40000 + rankWeight[countToRank[2][0]] * 1000 + \
+                    max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
+    elif not hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # 2 pair (must be w/o joker)
+        category = 'two pair'
+        p1 = countToRank[2][0]
+        p2 = countToRank[2][1]
+        score = 30000 +  \
+                    max(rankWeight[p1] * 1000 + rankWeight[p2] * 100,
+                        rankWeight[p2] * 1000 + rankWeight[p1] * 100) + \
+                    rankWeight[countToRank[1][0]] * 10
+    elif not hasJoker and len(rankToCount) == 4: # 1 pair (must be w/o joker)
+        category = 'one pair'
+        p = countToRank[2][0]
+        score = 20000 + rankWeight[p] * 1000
+        if p == 'A':
+            score += rankWeight['K'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
+        elif p == 'K':
+            score += rankWeight['A'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
+        elif p == 'Q':
+            score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['J']
+        else: # p = 'J'
+            score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['Q']
+    else:
+        print('ops, this one is out of my analysis... %s' % (','.join(cards)))
+    ###
+    return score,category
+
+
+
+########## ########## ########## ########## ########## TABLES
+# HANDS[i] is the mask of the i-th hand; HAND_INDEX[mask] is i (or -1 if mask is not a hand).
+# RESULT[mask] is the (score, category) tuple; the same tuple object is returned on every lookup.
+HANDS = tuple(sum(1 << i for i in ids) for ids in combinations(range(len(CARDS)),5))
+HAND_INDEX = [-1] * (FULL_MASK + 1)
+RESULT = [None] * (FULL_MASK + 1)
+for _i,_mask in enumerate(HANDS):
+    HAND_INDEX[_mask] = _i
+    RESULT[_mask] = gradeCards([CARDS[c] for c in range(len(CARDS)) if _mask >> c & 1])
+del _i,_mask
+SCORES = tuple(RESULT[mask][0] for mask in HANDS) # score by hand index
+CATEGORY_CODES = tuple(CATEGORIES.index(RESULT[mask][1]) for mask in HANDS) # category code by hand index
+
+
+
+def cardsToMask(cards):
+    """
+    cards: an iterable of card strings.
+
+    Returns: the 17-bit mask of the cards.
+    """
+    mask = 0
+    for card in cards:
+        mask |= CARD_BIT[card]
+    return mask
+
+def maskToCards(mask):
+    """
+    mask: a 17-bit card mask.
+
+    Returns: the list of card strings in the mask, in card id order.
+    """
+    return [CARDS[c] for c in range(len(CARDS)) if mask >> c & 1]
+
+def maskToString(mask):
+    """
+    Format a card mask the way the protocol does, e.g. 'SA,HK,J'.
+    """
+    return ','.join(maskToCards(mask))
+
+def stringToMask(text):
+    """
+    Parse a protocol card list such as 'SA,HK,J' into a card mask. An empty string gives 0.
+    """
+    mask = 0
+    for card in text.split(','):
+        if card:
+            mask |= CARD_BIT[card]
+    return mask
+
+def cardCount(mask):
+    """
+    The number of cards in a mask.
+    """
+    return bin(mask).count('1')
+
+def analyzeMask(mask):
+    """
+    Grade a hand given as a 17-bit mask. See "analyzeHand".
+    """
+    result = RESULT[mask] if 0 <= mask <= FULL_MASK else None
+    return result if result is not None else NOT_A_HAND
+
+def analyzeHand(cards):
+    """
+    Grade a fate17 hand by table lookup.
+    Returns exactly what the original "analyzeHand" returns, for every possible hand.
+    Anything else -- not five cards, repeated or unknown cards -- gives NOT_A_HAND, (0, None),
+    as the original's fallthrough did (without its printed note).
+
+    cards: a list or set of five card strings, or the 17-bit mask of the hand.
+
+    Returns: (score, category)
+        90000: five card
+        80000: royal straight flush
+        >= 70000: four card
+        >= 60000: full house
+        >= 50000: straight
+        >= 40000: three card
+        >= 30000: two pair
+        >= 20000: one pair
+    """
+    if type(cards) is int:
+        return analyzeMask(cards)
+    mask = 0
+    for card in cards:
+        bit = CARD_BIT.get(card)
+        if bit is None or mask & bit:
+            return NOT_A_HAND
+        mask |= bit
+    result = RESULT[mask]
+    return result if result is not None else NOT_A_HAND
+
+def selfCheck():
+    """
+    Compare the table against the reference grading, "utility.analyzeHand" and
+    "utility.Fate17Hand.analyze" for every one of the 6188 hands.
+
+    Returns: the number of hands checked. Raises AssertionError on the first mismatch.
+    """
+    import utility
+    for mask in HANDS:
+        cards = [CARDS[c] for c in range(len(CARDS)) if mask >> c & 1]
+        expected = gradeCards(cards)
+        assert analyzeMask(mask) == expected, cards
+        assert analyzeHand(cards) == expected, cards
+        assert analyzeHand(set(cards)) == expected, cards
+        assert analyzeHand(mask) == expected, cards
+        assert utility.analyzeHand(mask) == expected, cards
+        assert utility.analyzeHand(cards) == expected, cards
+        hand = utility.Fate17Hand(cards)
+        hand.analyze()
+        assert (hand.getScore(),hand.type) == expected, cards
+    return len(HANDS)
+
+if __name__ == '__main__':
+    print('%d hands checked' % selfCheck())
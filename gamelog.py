@@ -0,0 +1,289 @@
+"""
+Binary game log.
+
+A log is an append-only file of fixed-width game records after a 16-byte header, so game k
+is at byte HEADER.size + k*GAME.size and the file is its own index. A game record (32 bytes):
+    index (uint32), starter, outcome, winner, folder (uint8 each; 255 for no winner/folder),
+    hands, finals (uint16 each, per seat: the dense hand index of "evaluator.HAND_INDEX"),
+    discards (uint8 per seat: the changed cards as a 5-bit mask over the dealt hand, see
+    "policy.toRelative"), bet1, bet2 (uint8), deltas (int16 per seat),
+    first, count (uint32, uint16): the game's slice of the instruction records, if any.
+With instruction logging the host instructions and player responses go to the sidecar file
+"<log>.ins" as 6-byte records (seat, code, value): the code is the "protocol" kind of an
+instruction, or RESPONSE_BASE plus the index in RESPONSES of a response; the value is its
+amount, count or card mask. The (first, count) pair of every game record is the offset
+table into that stream.
+
+"GameLogWriter" packs into a bytearray and writes it in large blocks; it is an "onGame"
+(and "trace") callback of "engine.Match". "GameLog" maps the files read-only: one game is a
+struct unpack at a computed offset, and "table" hands out a slice of games as a zero-copy
+NumPy structured array when NumPy is installed.
+
+Usage:
+    python engine.py Ref01 team18 1000000 --log games.f17 [--log-instructions]
+    python gamelog.py games.f17 [--game N]
+"""
+
+import os
+import mmap
+import struct
+import evaluator
+import policy
+import protocol
+import engine
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b'F17G'
+VERSION = 1
+INSTRUCTIONS = 1 # header flag: the instruction sidecar is written
+HEADER = struct.Struct('<4sBBH8x') # magic, version, flags, game record size
+GAME = struct.Struct('<IBBBB2H2H2BBB2hIH2x')
+INSTRUCTION = struct.Struct('<BBi') # seat, code, value
+NONE = 255 # winner or folder: nobody
+RESPONSES = ('bet','raise','check','call','fold','change')
+RESPONSE_BASE = 32
+RESPONSE_CODE = dict((kind,RESPONSE_BASE + k) for k,kind in enumerate(RESPONSES))
+OUTCOME_CODE = dict((outcome,k) for k,outcome in enumerate(engine.OUTCOMES))
+BUFFER_SIZE = 1 << 20
+
+if numpy is not None:
+    GAME_DTYPE = numpy.dtype([('index','<u4'),('starter','u1'),('outcome','u1'),('winner','u1'),
+                              ('folder','u1'),('hands','<u2',2),('finals','<u2',2),('discards','u1',2),
+                              ('bet1','u1'),('bet2','u1'),('deltas','<i2',2),('first','<u4'),
+                              ('count','<u2'),('pad','V2')])
+
+
+
+class GameLogWriter:
+    """
+    Stream games to a log.
+
+    path: the log file; it is created, or appended to if it is a log already.
+    instructions: also log every instruction and response (the "<path>.ins" sidecar).
+    bufferSize: bytes collected before a write.
+
+    Use "write" as the "onGame" callback and "trace" as the "trace" callback of "engine.Match";
+    call "close" (or use the writer in a with statement) at the end.
+    """
+    def __init__(self,path,instructions=False,bufferSize=BUFFER_SIZE):
+        self.path = path
+        self.bufferSize = bufferSize
+        self.buffer = bytearray()
+        self.pending = bytearray() # the instruction records of the current game
+        self.pendingCount = 0
+        self.instructionFile = None
+        self.instructionBuffer = bytearray()
+        flags = INSTRUCTIONS if instructions else 0
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER.size:
+            with open(path,'rb') as f:
+                magic,version,oldFlags,size = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION or size != GAME.size or oldFlags != flags:
+                raise ValueError('%s is not a game log of this format' % path)
+            self.file = open(path,'ab')
+            self.games = (os.path.getsize(path) - HEADER.size) // GAME.size
+        else:
+            self.file = open(path,'wb')
+            self.file.write(HEADER.pack(MAGIC,VERSION,flags,GAME.size))
+            self.games = 0
+        self.instructionCount = 0
+        if instructions:
+            self.instructionFile = open(path + '.ins','ab')
+            self.instructionCount = self.instructionFile.tell() // INSTRUCTION.size
+    def trace(self,seat,kind,value):
+        """
+        Log one host instruction (kind is a "protocol" kind) or response (kind is a response kind).
+        """
+        if self.instructionFile is None:
+            return
+        code = kind if type(kind) is int else RESPONSE_CODE[kind]
+        self.pending += INSTRUCTION.pack(seat,code,value or 0)
+        self.pendingCount += 1
+    def write(self,record):
+        """
+        Log a finished "engine.GameRecord", with the instructions traced since the last one.
+        """
+        handIndex = evaluator.HAND_INDEX
+        hands = record.hands
+        finals = record.finals
+        discards = record.discards
+        self.buffer += GAME.pack(record.index,record.starter,OUTCOME_CODE[record.outcome],
+                                 NONE if record.winner is None else record.winner,
+                                 NONE if record.folder is None else record.folder,
+                                 handIndex[hands[0]],handIndex[hands[1]],handIndex[finals[0]],handIndex[finals[1]],
+                                 policy.toRelative(hands[0],discards[0]) if discards[0] else 0,
+                                 policy.toRelative(hands[1],discards[1]) if discards[1] else 0,
+                                 record.bet1,record.bet2,record.deltas[0],record.deltas[1],
+                                 self.instructionCount,self.pendingCount)
+        self.games += 1
+        if self.pendingCount:
+            self.instructionBuffer += self.pending
+            self.instructionCount += self.pendingCount
+            self.pending = bytearray()
+            self.pendingCount = 0
+        if len(self.buffer) >= self.bufferSize or len(self.instructionBuffer) >= self.bufferSize:
+            self.flush()
+    def flush(self):
+        # the instructions first, so that every logged game finds its instructions on disk
+        if self.instructionBuffer:
+            self.instructionFile.write(self.instructionBuffer)
+            self.instructionFile.flush()
+            self.instructionBuffer = bytearray()
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.buffer = bytearray()
+    def close(self):
+        self.flush()
+        self.file.close()
+        if self.instructionFile is not None:
+            self.instructionFile.close()
+    def __enter__(self):
+        return self
+    def __exit__(self,*args):
+        self.close()
+
+
+
+class Game:
+    """
+    One decoded game record; the fields are those of "engine.GameRecord" (masks for the cards).
+    """
+    __slots__ = ('index','starter','outcome','winner','folder','hands','finals','discards',
+                 'bet1','bet2','deltas','first','count')
+    def __init__(self,fields):
+        (self.index,self.starter,outcome,winner,folder,h0,h1,f0,f1,d0,d1,
+         self.bet1,self.bet2,x0,x1,self.first,self.count) = fields
+        hands = evaluator.HANDS
+        self.outcome = engine.OUTCOMES[outcome]
+        self.winner = None if winner == NONE else winner
+        self.folder = None if folder == NONE else folder
+        self.hands = (hands[h0],hands[h1])
+        self.finals = (hands[f0],hands[f1])
+        self.discards = (policy.fromRelative(self.hands[0],d0),policy.fromRelative(self.hands[1],d1))
+        self.deltas = (x0,x1)
+    def toString(self):
+        msg = 'game %d (%s first): %s' % (self.index,'P1' if self.starter == 0 else 'P2',self.outcome)
+        for i in (0,1):
+            msg += '\n    P%d %s -> [%s] -> %s, %+d' % (i+1,evaluator.maskToString(self.hands[i]),
+                        evaluator.maskToString(self.discards[i]),evaluator.maskToString(self.finals[i]),self.deltas[i])
+        return msg + '\n    bets %d/%d, winner %s, folder %s' % (self.bet1,self.bet2,
+                        'none' if self.winner is None else 'P%d' % (self.winner+1),
+                        'none' if self.folder is None else 'P%d' % (self.folder+1))
+
+class GameLog:
+    """
+    A game log mapped read-only. len() is the number of complete games on disk; log[k] is game k.
+    If the log was written with instructions but its "<path>.ins" sidecar is missing, the games
+    are still readable; "instructions" then raises FileNotFoundError naming the sidecar.
+    """
+    def __init__(self,path):
+        self.path = path
+        self.file = open(path,'rb')
+        self.map = mmap.mmap(self.file.fileno(),0,access=mmap.ACCESS_READ)
+        magic,version,self.flags,size = HEADER.unpack_from(self.map,0)
+        if magic != MAGIC or version != VERSION or size != GAME.size:
+            self.close()
+            raise ValueError('%s is not a game log of this format' % path)
+        self.games = (len(self.map) - HEADER.size) // GAME.size
+        self.instructionMap = None
+        self.instructionsMissing = bool(self.flags & INSTRUCTIONS) and not os.path.exists(path + '.ins')
+        if self.flags & INSTRUCTIONS and not self.instructionsMissing and os.path.getsize(path + '.ins') > 0:
+            self.instructionFile = open(path + '.ins','rb')
+            self.instructionMap = mmap.mmap(self.instructionFile.fileno(),0,access=mmap.ACCESS_READ)
+    def __len__(self):
+        return self.games
+    def __getitem__(self,k):
+        if k < 0:
+            k += self.games
+        if not 0 <= k < self.games:
+            raise IndexError('game %d of %d' % (k,self.games))
+        return Game(GAME.unpack_from(self.map,HEADER.size + k*GAME.size))
+    def __iter__(self):
+        return (Game(fields) for fields in self.rows())
+    def rows(self,start=0,stop=None):
+        """
+        The raw field tuples of games start..stop-1, without decoding.
+        """
+        stop = self.games if stop is None else min(stop,self.games)
+        view = memoryview(self.map)[HEADER.size + start*GAME.size:HEADER.size + stop*GAME.size]
+        return GAME.iter_unpack(view)
+    def table(self,start=0,stop=None):
+        """
+        Games start..stop-1 as a NumPy structured array over the mapped file (no copy),
+        with the fields of GAME_DTYPE. Needs NumPy. Drop the array before "close".
+        """
+        if numpy is None:
+            raise ImportError('GameLog.table needs NumPy')
+        stop = self.games if stop is None else min(stop,self.games)
+        return numpy.frombuffer(self.map,GAME_DTYPE,stop - start,HEADER.size + start*GAME.size)
+    def instructions(self,k):
+        """
+        The instructions and responses of game k as (seat, kind, value); the kind is a
+        "protocol" kind for an instruction and a response kind string for a response.
+        """
+        if self.instructionsMissing:
+            raise FileNotFoundError('the instruction sidecar %s.ins of this log is missing' % self.path)
+        if self.instructionMap is None:
+            return []
+        game = GAME.unpack_from(self.map,HEADER.size + k*GAME.size)
+        first,count = game[-2],game[-1]
+        result = list()
+        for seat,code,value in INSTRUCTION.iter_unpack(
+                self.instructionMap[first*INSTRUCTION.size:(first + count)*INSTRUCTION.size]):
+            result.append((seat,RESPONSES[code - RESPONSE_BASE] if code >= RESPONSE_BASE else code,value))
+        return result
+    def close(self):
+        self.map.close()
+        self.file.close()
+        if getattr(self,'instructionMap',None) is not None:
+            self.instructionMap.close()
+            self.instructionFile.close()
+
+def instructionString(seat,kind,value):
+    """
+    Format a logged instruction like the host's verbose output.
+    """
+    if type(kind) is int:
+        return '> P%d: %s' % (seat+1,protocol.instructionText(kind,value if kind != protocol.UNKNOWN else ''))
+    return 'P%d > %s' % (seat+1,protocol.responseText((kind,value)))
+
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+    parser = argparse.ArgumentParser(description='Summarize or show a fate17 game log.')
+    parser.add_argument('path')
+    parser.add_argument('--game',type=int,default=None,help='show one game (0-based)')
+    args = parser.parse_args()
+    log = GameLog(args.path)
+    if args.game is not None:
+        print(log[args.game].toString())
+        if log.instructionsMissing:
+            print('    (instructions not shown: %s.ins is missing)' % args.path)
+        else:
+            for entry in log.instructions(args.game):
+                print('    ' + instructionString(*entry))
+    else:
+        start = time.perf_counter()
+        if numpy is not None:
+            table = log.table()
+            balances = table['deltas'].sum(axis=0,dtype=numpy.int64).tolist()
+            outcomes = numpy.bincount(table['outcome'],minlength=len(engine.OUTCOMES)).tolist()
+            del table # the map cannot close while a view of it exists
+        else:
+            balances = [0,0]
+            outcomes = [0] * len(engine.OUTCOMES)
+            for row in log.rows():
+                outcomes[row[2]] += 1
+                balances[0] += row[13]
+                balances[1] += row[14]
+        elapsed = time.perf_counter() - start
+        print('%s: %d games, balances %d / %d' % (args.path,len(log),balances[0],balances[1]))
+        print('outcomes: %s' % ', '.join('%s %d' % item for item in zip(engine.OUTCOMES,outcomes)))
+        print('scanned in %.3f seconds' % elapsed)
+    log.close()
@@ -0,0 +1,235 @@
+"""
+Bayesian range of the opponent's hand.
+
+From a player's seat the opponent's dealt hand is one of the C(12,5) = 792 hands of the 12
+cards it cannot see. "HandRange" keeps a probability for each and multiplies in the likelihood
+of every event, one vectorized pass over the 792 hands:
+    the change count: the opponent is assumed to change cards with a known policy (the
+        shipped discard policy by default, or e.g. "Ref01.changeMask"); the hands whose
+        policy change has the observed count keep their weight, the others keep EPSILON of it
+        (the opponent may play another policy);
+    a bet, raise or check: the opponent is assumed to bet about in proportion to the
+        strength of its hand, the percentile of its pre-draw value (see "bucketing"); the
+        likelihood is a Gaussian of width SPREAD around the bet's place between the bet
+        limits, plus EPSILON (a check counts as the lowest place);
+    card removal: cards the opponent cannot hold -- our replacement cards, which came from
+        the deck -- rule out the hands that contain them. Our discards are out of play and
+        were never in the range.
+For betting interval II "equity" plays the range forward through the opponent's change: every
+hand keeps the cards its policy keeps and draws the rest from the cards still in the deck
+(neither its own nor ours), and the final hands are compared with ours through the score table.
+
+Every update costs tens of microseconds and "equity" about a hundred (see "python
+handRange.py"). The first range also builds the tables: the policy's change of every hand and
+the pre-draw strength (about half a second).
+
+Needs NumPy.
+
+Usage:
+    python handRange.py [--games N]    # time the updates and the equity on random deals
+"""
+
+from itertools import combinations
+import evaluator
+import policy
+import bucketing
+from engine import MAX_CHANGE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EPSILON = 0.02 # the likelihood left to hands that contradict the model
+SPREAD = 0.25 # the width of the bet likelihood, in strength percentiles
+
+_tables = dict() # changeMask -> (change counts, kept cards), arrays of (hand index, maxChange)
+_strength = None
+_combos = dict() # (n,k) -> the k-subsets of range(n), an array
+
+
+
+def _changeTable(changeMask):
+    # the policy's change count and kept cards of every hand and maxChange
+    table = _tables.get(changeMask)
+    if table is None:
+        counts = numpy.zeros((len(evaluator.HANDS),MAX_CHANGE + 1),dtype=numpy.int8)
+        keeps = numpy.zeros((len(evaluator.HANDS),MAX_CHANGE + 1),dtype=numpy.int64)
+        for k,hand in enumerate(evaluator.HANDS):
+            for maxChange in range(MAX_CHANGE + 1):
+                selected = changeMask(hand,maxChange)
+                counts[k,maxChange] = evaluator.cardCount(selected)
+                keeps[k,maxChange] = hand & ~selected
+        table = _tables[changeMask] = (counts,keeps)
+    return table
+
+def strength():
+    """
+    The pre-draw strength of every hand: the percentile of its pre-draw value, by hand index.
+    """
+    global _strength
+    if _strength is None:
+        values = numpy.array(bucketing.features()[0])
+        _strength = (numpy.argsort(numpy.argsort(values,kind='stable'),kind='stable') + 0.5) / len(values)
+    return _strength
+
+def _combinations(n,k):
+    combos = _combos.get((n,k))
+    if combos is None:
+        combos = _combos[(n,k)] = numpy.array(list(combinations(range(n),k)),dtype=numpy.int64).reshape(-1,k)
+    return combos
+
+if numpy is not None:
+    HANDS = numpy.array(evaluator.HANDS,dtype=numpy.int64)
+    SCORE = numpy.array([result[0] if result else 0 for result in evaluator.RESULT],dtype=numpy.int32) # by mask
+    BITS = numpy.int64(1) << numpy.arange(len(evaluator.CARDS),dtype=numpy.int64)
+
+
+
+class HandRange:
+    """
+    The probabilities of the opponent's dealt hands in one game.
+
+    changeMask: the opponent's assumed "changeMask(hand,maxChange)"; the shipped discard
+        policy if None.
+
+    Call "reset" with our hand at the deal, then the "observe..." methods as the game goes.
+    """
+    def __init__(self,changeMask=None):
+        if numpy is None:
+            raise ImportError('HandRange needs NumPy')
+        self.counts,self.keeps = _changeTable(changeMask or policy.policyDiscard)
+        self.strength = strength()
+        self.reset(0)
+    def reset(self,hand):
+        """
+        Start a game: our dealt hand, every hand of the other 12 cards equally likely.
+        """
+        self.index = numpy.flatnonzero((HANDS & hand) == 0)
+        self.hands = HANDS[self.index]
+        self.weights = numpy.full(len(self.index),1 / len(self.index))
+        self.unseen = evaluator.FULL_MASK & ~hand
+        self.removed = 0
+        self.changeCount = None
+        self.kept = None
+        self.consistent = None # the hands whose policy change has the observed count
+    def _update(self,likelihood):
+        weights = self.weights * likelihood
+        total = weights.sum()
+        if total > 0: # all hands ruled out: the evidence is ignored
+            self.weights = weights / total
+    def observeRemoval(self,cards):
+        """
+        Cards the opponent can neither hold nor draw, e.g. our replacement cards.
+        """
+        self.removed |= cards & self.unseen
+        self._update((self.hands & cards) == 0)
+    def observeChange(self,count,maxChange=MAX_CHANGE):
+        """
+        The opponent changed "count" cards, allowed "maxChange" (5 if it changed first,
+        else 7 minus our count).
+        """
+        maxChange = min(maxChange,MAX_CHANGE)
+        self.changeCount = count
+        self.kept = self.keeps[self.index,maxChange]
+        self.consistent = self.counts[self.index,maxChange] == count
+        self._update(numpy.where(self.consistent,1.0,EPSILON))
+    def observeBet(self,amount,minBet,maxBet):
+        """
+        The opponent's total bet in the interval after a bet or raise (0 for a check),
+        with the bet limits of the interval.
+        """
+        place = 0.0 if amount <= 0 or maxBet <= minBet else min(1.0,max(0.0,(amount - minBet) / (maxBet - minBet)))
+        distance = self.strength[self.index] - place
+        self._update(EPSILON + numpy.exp(-0.5 * (distance / SPREAD) ** 2))
+    def probabilities(self):
+        """
+        Returns: (hands, probabilities), arrays of the opponent's possible dealt hands (masks).
+        """
+        return self.hands,self.weights
+    def finals(self):
+        """
+        The opponent's final hands: after its change if it has been observed, else the dealt hands.
+        Only the hands whose policy change has the observed count are played forward (the
+        cards another policy would keep are not known); if there are none, the dealt hands.
+
+        Returns: (finals, probabilities), arrays of shape (hands, draws) and (hands,); every
+            draw of a hand is equally likely.
+        """
+        live = numpy.flatnonzero(self.weights)
+        if self.consistent is not None and self.consistent[live].any():
+            live = live[self.consistent[live]]
+        else:
+            return self.hands[live][:,None],self.weights[live]
+        weights = self.weights[live]
+        if self.changeCount == 0:
+            return self.kept[live][:,None],weights
+        hands = self.hands[live]
+        free = (self.unseen & ~self.removed) & ~hands # the cards still in the deck for each hand
+        rows,cols = numpy.nonzero((free[:,None] & BITS) != 0)
+        size = len(cols) // len(hands)
+        if size * len(hands) != len(cols) or size < self.changeCount: # a hand clashes with the removal
+            return hands[:,None],weights
+        cards = BITS[cols.reshape(len(hands),size)]
+        draws = cards[:,_combinations(size,self.changeCount)].sum(axis=2)
+        return self.kept[live][:,None] | draws,weights
+    def equity(self,hand):
+        """
+        The showdown probabilities of our hand against the range.
+
+        hand: the mask of our five cards (our final hand in interval II).
+
+        Returns: (pWin, pTie, pLose)
+        """
+        finals,weights = self.finals()
+        scores = SCORE[finals]
+        score = SCORE[hand]
+        total = float(weights.sum())
+        win = float(weights @ (scores < score).mean(axis=1)) / total
+        tie = float(weights @ (scores == score).mean(axis=1)) / total
+        return win,tie,max(0.0,1.0 - win - tie)
+
+
+
+if __name__ == '__main__':
+    import time
+    import random
+    import argparse
+    import equity
+    from utility import Deck
+    parser = argparse.ArgumentParser(description='Time the range updates and the equity query.')
+    parser.add_argument('--games',type=int,default=200)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    hr = HandRange()
+    print('tables built in %.2f seconds' % (time.perf_counter() - start))
+    rng = random.Random(17)
+    timings = dict((name,0.0) for name in ('reset','bet','change','removal','equity'))
+    uniform = ranged = 0.0
+    for _ in range(args.games):
+        deck = Deck(rng)
+        mine = deck.dealMask(5)
+        theirs = deck.dealMask(5)
+        myDiscard = policy.policyDiscard(mine,5)
+        myNew = deck.dealMask(evaluator.cardCount(myDiscard)) if myDiscard else 0
+        theirDiscard = policy.policyDiscard(theirs,7 - evaluator.cardCount(myDiscard))
+        theirNew = deck.dealMask(evaluator.cardCount(theirDiscard)) if theirDiscard else 0
+        myFinal = (mine & ~myDiscard) | myNew
+        theirFinal = (theirs & ~theirDiscard) | theirNew
+        for name,call in (('reset',lambda: hr.reset(mine)),('bet',lambda: hr.observeBet(10,5,15)),
+                          ('removal',lambda: hr.observeRemoval(myNew)),
+                          ('change',lambda: hr.observeChange(evaluator.cardCount(theirDiscard),
+                                                             7 - evaluator.cardCount(myDiscard)))):
+            t = time.perf_counter()
+            call()
+            timings[name] += time.perf_counter() - t
+        t = time.perf_counter()
+        pWin,pTie,pLose = hr.equity(myFinal)
+        timings['equity'] += time.perf_counter() - t
+        actual = 1.0 if equity.MASK_SCORE[myFinal] > equity.MASK_SCORE[theirFinal] else (
+            0.5 if equity.MASK_SCORE[myFinal] == equity.MASK_SCORE[theirFinal] else 0.0)
+        ranged += (pWin + pTie / 2 - actual) ** 2
+        uniform += (equity.winShare(myFinal,myDiscard) - actual) ** 2
+    for name,total in timings.items():
+        print('%-8s %8.1f us' % (name,total / args.games * 1e6))
+    print('mean squared error of the showdown share: range %.4f, uniform %.4f' % (ranged / args.games,uniform / args.games))
@@ -0,0 +1,205 @@
+"""
+Per-decision latency histograms.
+
+The host times every action instruction from the moment it hands the instruction to the seat
+until the response is back (see "engine.Match.act"), so the time includes the queue, pipe or
+event-loop hop of the seat as well as the strategy itself. The times go into HDR-style
+histograms, one per (player, phase, instruction kind); the phases are interval I, the change
+and interval II.
+
+"Histogram" is log-linear: values below 128 ns are exact, above that every power of two is
+cut into 64 buckets, so any quantile is off by less than 1.6% whatever the range, with a
+fixed array of counts and two shifts per value. Recording costs well under a microsecond,
+so the recorder can stay on in long runs. Histograms merge by adding their counts, e.g.
+across the shards of a tournament.
+"""
+
+import protocol
+
+SUB_BITS = 6
+SUB_COUNT = 1 << SUB_BITS # buckets per power of two
+EXACT = 2 * SUB_COUNT # values below this have a bucket each
+MAX_SHIFT = 40 # up to 2**46 ns, about 19 hours
+BUCKET_COUNT = EXACT + MAX_SHIFT * SUB_COUNT
+
+INTERVAL1 = 'interval I'
+CHANGE = 'change'
+INTERVAL2 = 'interval II'
+PHASES = (INTERVAL1,CHANGE,INTERVAL2)
+QUANTILES = (0.5,0.99,0.999)
+WARN_FRACTION = 0.1 # flag a quantile above this fraction of the timeout
+
+
+
+def bucketIndex(value):
+    """
+    The bucket of a value in nanoseconds.
+    """
+    if value < EXACT:
+        return value if value > 0 else 0
+    shift = value.bit_length() - SUB_BITS - 1
+    if shift > MAX_SHIFT:
+        return BUCKET_COUNT - 1
+    return shift * SUB_COUNT + (value >> shift)
+
+def bucketValue(index):
+    """
+    The highest value of a bucket, the value reported for a quantile that falls in it.
+    """
+    if index < EXACT:
+        return index
+    shift = (index - SUB_COUNT) // SUB_COUNT
+    top = index - shift * SUB_COUNT
+    return ((top + 1) << shift) - 1
+
+class Histogram:
+    """
+    A log-linear histogram of nanosecond values.
+    """
+    __slots__ = ('counts','count','total','max')
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+    def record(self,value):
+        if value < EXACT:
+            index = value if value > 0 else 0
+        else: # bucketIndex, inlined
+            shift = value.bit_length() - SUB_BITS - 1
+            index = shift * SUB_COUNT + (value >> shift) if shift <= MAX_SHIFT else BUCKET_COUNT - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+    def merge(self,other):
+        counts = self.counts
+        for index,n in enumerate(other.counts):
+            if n:
+                counts[index] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max,other.max)
+    def quantile(self,q):
+        """
+        The value at quantile q (0 < q <= 1), within the bucket precision; 0 if empty.
+        """
+        if self.count == 0:
+            return 0
+        rank = max(1,int(q * self.count + 0.5))
+        seen = 0
+        for index,n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bucketValue(index),self.max)
+        return self.max
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+def phaseOf(state):
+    """
+    The phase of the action in a "engine.SeatState".
+    """
+    if state.options == protocol.CHANGE:
+        return CHANGE
+    return INTERVAL1 if state.interval == 1 else INTERVAL2
+
+class LatencyRecorder:
+    """
+    The latency histograms of a match, keyed by (seat index, phase, instruction kind).
+
+    names: the player names by seat index, for the summary.
+    timeout: the action timeout in seconds the quantiles are held against.
+    """
+    def __init__(self,names=None,timeout=10):
+        self.names = list(names) if names is not None else None
+        self.timeout = timeout
+        self.histograms = dict()
+        self.lookup = dict() # (seat index, interval, kind) -> histogram, saves "phaseOf" per action
+    def record(self,i,state,elapsed):
+        """
+        Record the answer time (ns) of seat i to the action in "state".
+        """
+        histogram = self.lookup.get((i,state.interval,state.options))
+        if histogram is None:
+            key = (i,phaseOf(state),state.options)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            self.lookup[(i,state.interval,state.options)] = histogram
+        histogram.record(elapsed)
+    def merge(self,other):
+        if self.names is None:
+            self.names = other.names
+        for key,histogram in other.histograms.items():
+            if key in self.histograms:
+                self.histograms[key].merge(histogram)
+            else:
+                merged = self.histograms[key] = Histogram()
+                merged.merge(histogram)
+    def total(self,i,phase=None):
+        """
+        All actions of seat i, or of one phase of it, in one histogram.
+        """
+        merged = Histogram()
+        for (seat,p,kind),histogram in self.histograms.items():
+            if seat == i and (phase is None or p == phase):
+                merged.merge(histogram)
+        return merged
+    def flags(self):
+        """
+        The histograms whose p99 or p999 reaches WARN_FRACTION of the timeout.
+
+        Returns: a list of (seat index, phase, kind, quantile, value in ns).
+        """
+        limit = self.timeout * 1e9 * WARN_FRACTION
+        result = list()
+        for (i,phase,kind),histogram in sorted(self.histograms.items()):
+            for q in (0.99,0.999):
+                value = histogram.quantile(q)
+                if value >= limit:
+                    result.append((i,phase,kind,q,value))
+        return result
+    def summary(self):
+        """
+        One line per player, phase and instruction kind with the quantiles in microseconds,
+        then the flags against the timeout.
+        """
+        lines = ['action latency (us)            count      p50      p99     p999      max']
+        seats = sorted(set(key[0] for key in self.histograms))
+        for i in seats:
+            name = self.names[i] if self.names else 'seat %d' % i
+            histogram = self.total(i)
+            lines.append('%-28s %7d %s' % (name,histogram.count,_quantiles(histogram)))
+            for phase in PHASES:
+                for kind in protocol.ACTION_KINDS:
+                    histogram = self.histograms.get((i,phase,kind))
+                    if histogram is not None:
+                        label = '  %s %s' % (phase,protocol.KIND_TEXT[kind][7:])
+                        lines.append('%-28s %7d %s' % (label,histogram.count,_quantiles(histogram)))
+        flags = self.flags()
+        for i,phase,kind,q,value in flags:
+            name = self.names[i] if self.names else 'seat %d' % i
+            lines.append('!! %s %s %s: p%s %.3f ms is %.0f%% of the %g s timeout' % (name,phase,
+                         protocol.KIND_TEXT[kind],('%g' % (q*100)).replace('.',''),value / 1e6,
+                         100 * value / (self.timeout * 1e9),self.timeout))
+        if not flags and self.histograms:
+            worst = max(h.quantile(0.999) for h in self.histograms.values())
+            lines.append('worst p999 is %.4f%% of the %g s timeout' % (100 * worst / (self.timeout * 1e9),self.timeout))
+        return '\n'.join(lines)
+    def toDict(self):
+        """
+        The quantiles of every histogram in nanoseconds, for JSON export.
+        """
+        result = list()
+        for (i,phase,kind),histogram in sorted(self.histograms.items()):
+            result.append({'player': self.names[i] if self.names else i,'phase': phase,
+                           'kind': protocol.KIND_TEXT[kind],'count': histogram.count,
+                           'mean': histogram.mean(),'max': histogram.max,
+                           'quantiles': dict(('p%g' % (q*100),histogram.quantile(q)) for q in QUANTILES)})
+        return result
+
+def _quantiles(histogram):
+    return ' '.join('%8.1f' % (value / 1000) for value in
+                    [histogram.quantile(q) for q in QUANTILES] + [histogram.max])
@@ -0,0 +1,169 @@
+"""
+Opponent modeling from the protocol stream.
+
+"OpponentModel" reads the host instructions a player gets -- 'opponent bet N', 'opponent raise N',
+'opponent check/call/fold', 'opponent change N cards' and, at a showdown, 'opponent cards ...' --
+and keeps running counts; every message costs a few integer operations and nothing is stored
+per game. The statistics, by betting interval:
+    opening: how often the opponent bets or checks when the action is on it without a bet;
+    bet and raise sizes: histograms of the amounts;
+    facing a bet: how often it raises, calls or folds (only a bet or raise can be folded to,
+        so those three messages are exactly the opponent's answers to a bet);
+and over the match: the change counts, and at the showdowns the category of the revealed
+hand by the change count and by whether the opponent bet or raised in interval II.
+
+"rangeEstimate" turns the showdown counts into a Bayesian estimate of the category of the
+opponent's final hand: Dirichlet posterior means shrunk from (change count, aggression) to
+the change count alone and from there to the category frequencies of a random hand, so a
+few showdowns move the estimate a little and many move it a lot. Showdowns only reveal the
+hands that were not folded, which the estimate does not correct for.
+
+A player feeds the model by reading its instructions through "TappedQueue":
+    iQ = TappedQueue(iQ,model)
+Ref01 and team18 do so when "play" is given a model.
+"""
+
+import evaluator
+import protocol
+from engine import MAX_BET2,MAX_CHANGE
+
+CATEGORY_COUNT = len(evaluator.CATEGORIES)
+BASE = tuple(evaluator.CATEGORY_CODES.count(code) / len(evaluator.HANDS) for code in range(CATEGORY_COUNT))
+PRIOR = 4.0 # the weight of the prior of "rangeEstimate", in showdowns
+RAISE,CALL,FOLD = 0,1,2 # the answers to a bet
+BET,CHECK = 0,1 # the openings
+
+
+
+class OpponentModel:
+    """
+    Running statistics of one opponent; feed it with "observe".
+
+    games, showdowns: the games started and the hands revealed.
+    opens[i]: [bets, checks] of interval i+1.
+    answers[i]: [raises, calls, folds] to a bet in interval i+1.
+    betSizes[i], raiseSizes[i]: count by amount (0..MAX_BET2) in interval i+1.
+    changes: count by the number of cards changed (0..MAX_CHANGE).
+    strength[c][a]: count by category of the hands revealed after changing c cards,
+        a = 1 if the opponent bet or raised in interval II.
+    ignored: the revealed hands that were not five distinct cards, left out of the counts.
+    """
+    def __init__(self):
+        self.games = 0
+        self.showdowns = 0
+        self.ignored = 0
+        self.opens = [[0,0],[0,0]]
+        self.answers = [[0,0,0],[0,0,0]]
+        self.betSizes = [[0] * (MAX_BET2 + 1) for _ in range(2)]
+        self.raiseSizes = [[0] * (MAX_BET2 + 1) for _ in range(2)]
+        self.changes = [0] * (MAX_CHANGE + 1)
+        self.strength = [[[0] * CATEGORY_COUNT for _ in range(2)] for _ in range(MAX_CHANGE + 1)]
+        self.interval = 0 # the index of the running interval, 0 or 1
+        self.changeCount = 0 # the opponent's change count in the running game
+        self.aggressive = 0 # 1 if the opponent bet or raised in interval II of the running game
+    def observe(self,kind,value):
+        """
+        Update the statistics with one host instruction (a parsed "protocol.Message").
+        """
+        if kind == protocol.OPP_BET:
+            self.opens[self.interval][BET] += 1
+            self.betSizes[self.interval][min(value,MAX_BET2)] += 1
+            if self.interval:
+                self.aggressive = 1
+        elif kind == protocol.OPP_CHECK:
+            self.opens[self.interval][CHECK] += 1
+        elif kind == protocol.OPP_CALL:
+            self.answers[self.interval][CALL] += 1
+        elif kind == protocol.OPP_RAISE:
+            self.answers[self.interval][RAISE] += 1
+            self.raiseSizes[self.interval][min(value,MAX_BET2)] += 1
+            if self.interval:
+                self.aggressive = 1
+        elif kind == protocol.OPP_FOLD:
+            self.answers[self.interval][FOLD] += 1
+        elif kind == protocol.FIRST or kind == protocol.SECOND:
+            self.games += 1
+            self.interval = 0
+            self.changeCount = 0
+            self.aggressive = 0
+        elif kind == protocol.OPP_CHANGE:
+            self.changes[min(value,MAX_CHANGE)] += 1
+            self.changeCount = min(value,MAX_CHANGE)
+            self.interval = 1
+        elif kind == protocol.CHANGE:
+            self.interval = 1
+        elif kind == protocol.OPP_CARDS:
+            index = evaluator.HAND_INDEX[value] if 0 <= value <= evaluator.FULL_MASK else -1
+            if index < 0: # a malformed reveal
+                self.ignored += 1
+                return
+            self.showdowns += 1
+            self.strength[self.changeCount][self.aggressive][evaluator.CATEGORY_CODES[index]] += 1
+
+    ########## ########## ########## ########## ########## queries
+    def answerRates(self,interval):
+        """
+        The opponent's (raise, call, fold) frequencies facing a bet in interval 1 or 2,
+        as posterior means under a uniform prior (1/3 each before any data).
+        """
+        counts = self.answers[interval - 1]
+        total = counts[0] + counts[1] + counts[2] + 3
+        return ((counts[0] + 1) / total,(counts[1] + 1) / total,(counts[2] + 1) / total)
+    def foldRate(self,interval):
+        return self.answerRates(interval)[FOLD]
+    def callRate(self,interval):
+        return self.answerRates(interval)[CALL]
+    def betRate(self,interval):
+        """
+        How often the opponent bets rather than checks when it may open, with a uniform prior.
+        """
+        counts = self.opens[interval - 1]
+        return (counts[BET] + 1) / (counts[BET] + counts[CHECK] + 2)
+    def meanBet(self,interval):
+        """
+        The mean opening bet of the opponent in interval 1 or 2, or None before the first.
+        """
+        sizes = self.betSizes[interval - 1]
+        count = sum(sizes)
+        return sum(amount * n for amount,n in enumerate(sizes)) / count if count else None
+    def rangeEstimate(self,changeCount,aggressive=False):
+        """
+        The probability of every hand category ("evaluator.CATEGORIES") for the opponent's
+        final hand, given its change count and whether it bet or raised in interval II.
+
+        Returns: a tuple of CATEGORY_COUNT probabilities.
+        """
+        byChange = self.strength[changeCount]
+        counts = byChange[1 if aggressive else 0]
+        changeTotal = 0
+        for k in range(CATEGORY_COUNT):
+            changeTotal += byChange[0][k] + byChange[1][k]
+        total = sum(counts)
+        result = list()
+        for k in range(CATEGORY_COUNT):
+            prior = (byChange[0][k] + byChange[1][k] + PRIOR * BASE[k]) / (changeTotal + PRIOR)
+            result.append((counts[k] + PRIOR * prior) / (total + PRIOR))
+        return tuple(result)
+    def summary(self):
+        lines = ['%d games, %d showdowns' % (self.games,self.showdowns)]
+        for interval in (1,2):
+            raiseRate,callRate,foldRate = self.answerRates(interval)
+            meanBet = self.meanBet(interval)
+            lines.append('interval %d: bets %.2f of openings (mean %s), facing a bet raises %.2f calls %.2f folds %.2f'
+                         % (interval,self.betRate(interval),'-' if meanBet is None else '%.1f' % meanBet,
+                            raiseRate,callRate,foldRate))
+        lines.append('changes: %s' % ' '.join('%d:%d' % item for item in enumerate(self.changes)))
+        return '\n'.join(lines)
+
+class TappedQueue:
+    """
+    An instruction queue that shows every instruction to a model on the way to the player.
+    """
+    def __init__(self,queue,model):
+        self.queue = queue
+        self.model = model
+    def get(self,*args):
+        text = self.queue.get(*args)
+        message = protocol.parseInstruction(text)
+        self.model.observe(message.kind,message.value)
+        return text
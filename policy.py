@@ -0,0 +1,155 @@
+"""
+Precomputed discard policy for every starting hand.
+
+There are only 6188 hands and 6 useful values of maxChange (0..5), so the best discard of
+every case (see "discard") is computed offline and saved in a compact binary file:
+    a 16-byte header (magic, version, objective, maxChange count, hand count),
+    then one uint8 per (hand index, maxChange), row-major by hand index (see "evaluator.HANDS").
+Each byte is a 5-bit mask over the hand's five cards taken in card id order.
+
+The file is opened lazily with mmap, read-only, so loading costs microseconds and the pages
+are shared by every process that uses it (e.g. the tournament workers).
+
+Usage:
+    python policy.py [--objective equity|score] [--workers N]    # rebuild discardPolicy.bin
+"""
+
+import os
+import mmap
+import struct
+import evaluator
+
+POLICY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),'discardPolicy.bin')
+MAGIC = b'F17D'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBxI4x') # magic, version, objective, maxChange count, hand count
+OBJECTIVES = ('score','equity') # discard.SCORE, discard.EQUITY
+CHANGE_COUNT = 6 # maxChange = 0..5
+
+_table = None # the mmap of the loaded file
+_unavailable = False # True once loading the file has failed
+
+
+
+def toRelative(hand,cards):
+    """
+    Encode the cards (a sub-mask of hand) as a 5-bit mask over the hand's cards in card id order.
+    """
+    rel = 0
+    bit = 1
+    while hand:
+        low = hand & -hand
+        if cards & low:
+            rel |= bit
+        hand ^= low
+        bit <<= 1
+    return rel
+
+def fromRelative(hand,rel):
+    """
+    Decode a 5-bit mask of "toRelative" back into a card mask.
+    """
+    cards = 0
+    while rel:
+        low = hand & -hand
+        if rel & 1:
+            cards |= low
+        hand ^= low
+        rel >>= 1
+    return cards
+
+def _row(args):
+    import discard # only needed to build the table
+    hand,objective = args
+    return bytes(toRelative(hand,discard.bestDiscard(hand,maxChange,0,objective)[0])
+                 for maxChange in range(CHANGE_COUNT))
+
+def build(path=POLICY_FILE,objective='equity',workers=None):
+    """
+    Solve every (hand, maxChange) case and write the policy file.
+
+    objective: 'equity' (the shipped table) or 'score'; see "discard".
+    workers: worker processes for the solve; None uses every core.
+    """
+    jobs = [(hand,objective) for hand in evaluator.HANDS]
+    if workers == 1:
+        rows = list(map(_row,jobs))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(_row,jobs,chunksize=64))
+    with open(path,'wb') as f:
+        f.write(HEADER.pack(MAGIC,VERSION,OBJECTIVES.index(objective),CHANGE_COUNT,len(evaluator.HANDS)))
+        f.write(b''.join(rows))
+
+def load(path=POLICY_FILE):
+    """
+    Map the policy file read-only. Called on the first lookup; the mapping is kept.
+
+    Returns: the mmap. Raises ValueError if the file is not a policy table for this evaluator.
+    """
+    global _table
+    with open(path,'rb') as f:
+        table = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+    magic,version,objective,changeCount,handCount = HEADER.unpack_from(table,0)
+    if (magic != MAGIC or version != VERSION or changeCount != CHANGE_COUNT
+            or handCount != len(evaluator.HANDS) or len(table) != HEADER.size + handCount*changeCount):
+        table.close()
+        raise ValueError('%s is not a discard policy table (rebuild it with "python policy.py")' % path)
+    _table = table
+    return table
+
+def available():
+    """
+    True if the policy table is loaded or can be loaded. A failed load is not retried.
+    """
+    global _unavailable
+    if _table is None and not _unavailable:
+        try:
+            load()
+        except (OSError,ValueError):
+            _unavailable = True
+    return _table is not None
+
+def table():
+    """
+    The policy table, mapped on the first call (see "load").
+
+    Returns: the mmap of the policy file.
+    """
+    return _table if _table is not None else load()
+
+def objective():
+    """
+    The objective the loaded table was solved for.
+    """
+    return OBJECTIVES[table()[5]]
+
+def policyDiscard(hand,maxChange=5):
+    """
+    The precomputed best discard; a drop-in for a player's "changeMask(hand,maxChange)".
+
+    hand: the mask of the five cards.
+    maxChange: the most cards that can be changed; values above 5 mean 5.
+
+    Returns: the mask of the cards to give up.
+    """
+    table = _table if _table is not None else load()
+    if maxChange > CHANGE_COUNT - 1:
+        maxChange = CHANGE_COUNT - 1
+    return fromRelative(hand,table[HEADER.size + evaluator.HAND_INDEX[hand]*CHANGE_COUNT + maxChange])
+
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+    parser = argparse.ArgumentParser(description='Rebuild the discard policy table.')
+    parser.add_argument('--objective',choices=OBJECTIVES,default='equity')
+    parser.add_argument('--workers',type=int,default=None)
+    parser.add_argument('--output',default=POLICY_FILE)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    build(args.output,args.objective,args.workers)
+    print('%s written in %.1f seconds (%d bytes)' % (args.output,time.perf_counter() - start,
+                                                     os.path.getsize(args.output)))
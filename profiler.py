@@ -0,0 +1,210 @@
+"""
+Match profiling.
+
+"MatchProfiler" is an opt-in hook of "engine.Match" (its "profile" argument) that attributes
+the time of a match:
+    per game phase -- init (dealing, ante), interval I, change, interval II, showdown -- the
+        wall time, the CPU time of the host thread, and the part of both spent inside the
+        seats' "act" (a headless player's strategy, or the queue or pipe handoff to a player
+        thread or process); the rest is host bookkeeping ("Bet", validation, records);
+    per seat the number of actions, their wall and host CPU time and, for a "engine.QueueSeat",
+        the CPU time of the player thread itself (its "analyzeHand" calls and so on).
+With a dump directory every player also runs under cProfile: a "engine.QueueSeat" for the
+whole player thread, any other seat around its actions (for a "sandbox.SubprocessSeat" that is
+the host side of the pipe only, the player runs in another process). At the end of the match
+the stats are written to "<dir>/P<n>-<player name>.prof" for pstats or snakeviz.
+
+The clocks cost about a microsecond per phase change and action, so profiled runs are a
+little slower than plain ones; cProfile costs much more.
+
+Usage:
+    python engine.py Ref01 team18 10000 --profile [--profile-dump DIR]
+"""
+
+import os
+import cProfile
+import pstats
+from time import perf_counter_ns,thread_time_ns
+import latency
+import utility
+
+INIT = 'init'
+INTERVAL1 = latency.INTERVAL1
+CHANGE = latency.CHANGE
+INTERVAL2 = latency.INTERVAL2
+SHOWDOWN = 'showdown'
+PHASES = (INIT,INTERVAL1,CHANGE,INTERVAL2,SHOWDOWN)
+TOP = 15 # the functions listed per player in the summary of a dump
+
+
+
+class PhaseTimes:
+    """
+    The time of one game phase, in ns.
+    """
+    __slots__ = ('count','wall','cpu','actWall','actCpu')
+    def __init__(self):
+        self.count = 0 # the games that reached the phase
+        self.wall = 0
+        self.cpu = 0 # host thread
+        self.actWall = 0 # inside the seats' "act"
+        self.actCpu = 0
+
+class SeatTimes:
+    """
+    The time of one seat, in ns.
+    """
+    __slots__ = ('acts','actWall','actCpu','threadCpu')
+    def __init__(self):
+        self.acts = 0
+        self.actWall = 0
+        self.actCpu = 0 # host thread CPU inside "act"
+        self.threadCpu = None # the CPU time of the player thread, if it has one
+
+class MatchProfiler:
+    """
+    Phase and seat times of one match; pass it as "profile" to "engine.Match".
+
+    dumpDir: if given, profile every player with cProfile and dump the stats there.
+    """
+    def __init__(self,dumpDir=None):
+        self.dumpDir = dumpDir
+        self.phases = dict((phase,PhaseTimes()) for phase in PHASES)
+        self.seats = None
+        self.names = None
+        self.profiles = None
+        self.actProfiles = [None,None] # the profiles enabled around "act"
+        self.current = None # the PhaseTimes running, None between games
+        self.wallMark = 0
+        self.cpuMark = 0
+    def attach(self,seats):
+        """
+        Called by "engine.Match" with its seats, before they start.
+        """
+        self.seats = seats
+        self.names = [seat.name for seat in seats]
+        self.times = [SeatTimes(),SeatTimes()]
+        if self.dumpDir is not None:
+            self.profiles = [cProfile.Profile(),cProfile.Profile()]
+            for seat,profile in zip(seats,self.profiles):
+                player = getattr(seat,'player',None)
+                if player is not None: # the player thread runs under the profile
+                    player.profile = profile
+                else:
+                    self.actProfiles[seats.index(seat)] = profile
+
+    ########## ########## ########## ########## ########## hooks
+    def phase(self,name):
+        """
+        Start game phase "name", ending the running one.
+        """
+        wall = perf_counter_ns()
+        cpu = thread_time_ns()
+        current = self.current
+        if current is not None:
+            current.wall += wall - self.wallMark
+            current.cpu += cpu - self.cpuMark
+        self.current = current = self.phases[name]
+        current.count += 1
+        self.wallMark = wall
+        self.cpuMark = cpu
+    def end(self):
+        """
+        End the running phase at the end of a game.
+        """
+        current = self.current
+        if current is not None:
+            current.wall += perf_counter_ns() - self.wallMark
+            current.cpu += thread_time_ns() - self.cpuMark
+            self.current = None
+    def act(self,i,seat,state):
+        """
+        seat.act(state), timed (and profiled) as an action of seat i.
+        """
+        profile = self.actProfiles[i]
+        wall = perf_counter_ns()
+        cpu = thread_time_ns()
+        if profile is not None:
+            profile.enable()
+            try:
+                response = seat.act(state)
+            finally:
+                profile.disable()
+        else:
+            response = seat.act(state)
+        cpu = thread_time_ns() - cpu
+        wall = perf_counter_ns() - wall
+        times = self.times[i]
+        times.acts += 1
+        times.actWall += wall
+        times.actCpu += cpu
+        if self.current is not None:
+            self.current.actWall += wall
+            self.current.actCpu += cpu
+        return response
+    def finish(self):
+        """
+        Collect the player threads' CPU times and write the dumps; called after the match.
+        The player threads have been told the match is over and are joined here, each for at
+        most its seat's action timeout; a thread still running is logged and its CPU time
+        left unknown.
+
+        Returns: the paths of the dumps written.
+        """
+        for seat,times in zip(self.seats,self.times):
+            player = getattr(seat,'player',None)
+            if player is not None:
+                if player.join(seat.timeout):
+                    times.threadCpu = player.cpuTime
+                else:
+                    utility.log('host','player %s still running after the match',seat.name,level=utility.WARNING)
+        paths = list()
+        if self.profiles is not None:
+            os.makedirs(self.dumpDir,exist_ok=True)
+            for i,profile in enumerate(self.profiles):
+                path = os.path.join(self.dumpDir,'P%d-%s.prof' % (i+1,self.names[i]))
+                profile.dump_stats(path)
+                paths.append(path)
+        return paths
+
+    ########## ########## ########## ########## ########## reports
+    def summary(self):
+        """
+        The phase and seat tables, in milliseconds.
+        """
+        lines = ['phase            games    wall ms     cpu ms   in act ms  act cpu ms    host ms']
+        total = PhaseTimes()
+        for phase in PHASES:
+            times = self.phases[phase]
+            lines.append(_phaseLine(phase,times))
+            for field in PhaseTimes.__slots__:
+                setattr(total,field,getattr(total,field) + getattr(times,field))
+        total.count = self.phases[INIT].count
+        lines.append(_phaseLine('total',total))
+        lines.append('seat                              acts    act ms  act cpu ms  thread cpu ms')
+        for name,times in zip(self.names,self.times):
+            lines.append('%-30s %8d %9.1f %11.1f %14s' % (name,times.acts,times.actWall / 1e6,times.actCpu / 1e6,
+                         'n/a' if times.threadCpu is None else '%.1f' % (times.threadCpu / 1e6)))
+        return '\n'.join(lines)
+    def toDict(self):
+        """
+        The phase and seat times in ns, for JSON export.
+        """
+        return {'phases': dict((phase,dict((field,getattr(times,field)) for field in PhaseTimes.__slots__))
+                               for phase,times in self.phases.items()),
+                'seats': [dict([('name',name)] + [(field,getattr(times,field)) for field in SeatTimes.__slots__])
+                          for name,times in zip(self.names,self.times)]}
+
+def _phaseLine(label,times):
+    # host: the host thread's CPU outside the seats, i.e. dealing, "Bet" and the records
+    return '%-14s %7d %10.1f %10.1f %11.1f %11.1f %10.1f' % (label,times.count,times.wall / 1e6,times.cpu / 1e6,
+                times.actWall / 1e6,times.actCpu / 1e6,(times.cpu - times.actCpu) / 1e6)
+
+def topFunctions(path,count=TOP):
+    """
+    The "count" functions of a dump with the most cumulative time, as a pstats listing.
+    """
+    import io
+    out = io.StringIO()
+    pstats.Stats(path,stream=out).sort_stats('cumulative').print_stats(count)
+    return out.getvalue()
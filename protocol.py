@@ -0,0 +1,155 @@
+"""
+The fate17 wire protocol, shared by the hosts and the players.
+
+Host instructions are parsed once into a "Message", a (kind, value) pair:
+    kind: one of the instruction kinds below, a small int.
+    value: the card mask of 'cards' and 'opponent cards', the amount of 'opponent bet' and
+        'opponent raise', the count of 'opponent change N cards', the text itself for
+        UNKNOWN, and 0 otherwise.
+Instructions without an argument are parsed by one dict lookup into a shared Message;
+the others need one rpartition and one int() or "evaluator.stringToMask".
+
+Responses are tuples (kind, value) with kind 'bet', 'raise', 'check', 'call', 'fold' or
+'change', as "engine.SeatState" and the players' "decideBet" use them.
+"responseText" and "parseResponse" convert them to and from the response strings.
+"""
+
+from collections import namedtuple
+import evaluator
+
+########## ########## ########## ########## ########## instruction kinds
+FIRST = 0 # first
+SECOND = 1 # second
+ANTE = 2 # ante
+CARDS = 3 # cards X,Y,...
+BET_CHECK = 4 # action:bet,check
+RAISE_CALL_FOLD = 5 # action:raise,call,fold
+CALL_FOLD = 6 # action:call,fold
+CHANGE = 7 # action:change
+OPP_BET = 8 # opponent bet N
+OPP_RAISE = 9 # opponent raise N
+OPP_CHECK = 10 # opponent check
+OPP_CALL = 11 # opponent call
+OPP_FOLD = 12 # opponent fold
+OPP_CHANGE = 13 # opponent change N cards
+OPP_CARDS = 14 # opponent cards X,Y,...
+WIN = 15 # win
+LOSE = 16 # lose
+TIE = 17 # tie
+UNKNOWN = 18
+
+# the instruction text of every kind, without its argument
+KIND_TEXT = ('first','second','ante','cards','action:bet,check','action:raise,call,fold',
+             'action:call,fold','action:change','opponent bet','opponent raise','opponent check',
+             'opponent call','opponent fold','opponent change','opponent cards','win','lose','tie',
+             'unknown')
+ACTION_KINDS = (BET_CHECK,RAISE_CALL_FOLD,CALL_FOLD,CHANGE) # the kinds that need a response
+
+Message = namedtuple('Message','kind value')
+
+_ARGUMENT_KINDS = (CARDS,OPP_BET,OPP_RAISE,OPP_CHANGE,OPP_CARDS)
+# exact text -> the shared Message of an instruction without argument
+_PLAIN = dict((KIND_TEXT[kind],Message(kind,0)) for kind in range(UNKNOWN) if kind not in _ARGUMENT_KINDS)
+# text before the last space -> kind, for the instructions that end with their argument
+_PREFIX = {'cards': CARDS,'opponent bet': OPP_BET,'opponent raise': OPP_RAISE,'opponent cards': OPP_CARDS}
+
+
+
+def parseInstruction(text):
+    """
+    Parse a host instruction.
+
+    Returns: a "Message"; its kind is UNKNOWN (and its value the text) if the text is not
+        an instruction of the protocol.
+    """
+    message = _PLAIN.get(text)
+    if message is not None:
+        return message
+    head,_,arg = text.rpartition(' ')
+    kind = _PREFIX.get(head)
+    try:
+        if kind is not None:
+            return Message(kind,evaluator.stringToMask(arg) if kind == CARDS or kind == OPP_CARDS else int(arg))
+        if arg == 'cards' and head.startswith('opponent change '): # opponent change N cards
+            return Message(OPP_CHANGE,int(head[16:]))
+    except (ValueError,KeyError):
+        pass
+    return Message(UNKNOWN,text)
+
+def instructionText(kind,value=None):
+    """
+    Format an instruction the way it travels over the queue protocol; the inverse of "parseInstruction".
+
+    kind: an instruction kind.
+    value: the argument of the kinds that have one, see "Message".
+    """
+    if kind == CARDS or kind == OPP_CARDS:
+        return '%s %s' % (KIND_TEXT[kind],evaluator.maskToString(value))
+    if kind == OPP_CHANGE:
+        return 'opponent change %d cards' % value
+    if kind == OPP_BET or kind == OPP_RAISE:
+        return '%s %d' % (KIND_TEXT[kind],value)
+    if kind == UNKNOWN:
+        return value
+    return KIND_TEXT[kind]
+
+def responseText(response,total=None):
+    """
+    Format a response tuple, e.g. ('raise',3) to 'raise 3'.
+
+    total: the bet of the player after the response; if given, a raise is written
+        'raise r to be total' and a call 'call total', as the players send them.
+    """
+    if response is None:
+        return '(no response)'
+    kind,value = response
+    if kind == 'change':
+        return 'change %s' % evaluator.maskToString(value)
+    if kind == 'bet':
+        return 'bet %d' % value
+    if kind == 'raise':
+        return 'raise %d' % value if total is None else 'raise %d to be %d' % (value,total)
+    if kind == 'call' and total is not None:
+        return 'call %d' % total
+    return kind
+
+def parseResponse(text):
+    """
+    Parse a response string of the queue protocol into a response tuple.
+
+    Returns: ('bet',n), ('raise',r), ('check',0), ('call',0), ('fold',0), ('change',mask)
+        or None if the response cannot be parsed.
+    """
+    tokens = text.split()
+    if not tokens:
+        return None
+    kind = tokens[0]
+    try:
+        if kind == 'bet' or kind == 'raise':
+            return (kind,int(tokens[1]))
+        if kind == 'change':
+            return (kind,evaluator.stringToMask(tokens[1]) if len(tokens) > 1 else 0)
+    except (IndexError,ValueError,KeyError):
+        return None
+    if kind in ('check','call','fold'):
+        return (kind,0)
+    return None
+
+
+
+if __name__ == '__main__':
+    import time
+    samples = ['first','ante','cards J,SA,HK,DQ,CJ','action:bet,check','opponent bet 15',
+               'opponent raise 3','opponent change 4 cards','opponent cards SA,HA,DA,CA,J','win','hello']
+    for text in samples:
+        message = parseInstruction(text)
+        assert message.kind == UNKNOWN or instructionText(*message) == text or message.kind in (CARDS,OPP_CARDS)
+        print('%-28s -> %s %r' % (text,KIND_TEXT[message.kind],message.value))
+    for text in ('bet 5','raise 3 to be 8','call 8','check','fold','change SA,J','change'):
+        response = parseResponse(text)
+        print('%-28s -> %r' % (text,response))
+    start = time.perf_counter()
+    for _ in range(100000):
+        for text in samples:
+            parseInstruction(text)
+    print('%.2f us per instruction' % ((time.perf_counter() - start) / 100000 / len(samples) * 1e6))
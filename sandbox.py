@@ -0,0 +1,183 @@
+"""
+Out-of-process players.
+
+"SubprocessSeat" runs a player module in its own Python process and talks to it over the
+child's stdin/stdout with the usual line protocol: one instruction per line in, one response
+per line out. The child runs the unchanged "play(gameCount,iQ,rQ)" of the module, so a slow or
+CPU-heavy strategy no longer holds the host's GIL, and the action timeout is enforced by the
+host on the wall clock. A player that times out, crashes or closes the pipe is killed; it
+answers nothing for the rest of the match (the host takes check, fold or no change).
+
+The only addition to the protocol is a handshake line 'name <player name>' that the child
+sends before the player's greeting. Whatever the player prints goes to stderr.
+
+Usage:
+    python engine.py Ref01 team18 1000 --sandbox [--seed N]
+    python sandbox.py --serve MODULE GAMECOUNT [--seed N]    # the child side
+"""
+
+import os
+import sys
+import queue
+import random
+import importlib
+import threading
+import subprocess
+import engine
+import utility
+from channel import Channel
+from protocol import instructionText,parseResponse
+
+SANDBOX = os.path.abspath(__file__)
+SERVE = '--serve'
+START_TIMEOUT = 30 # seconds for the child to import the player and say its name
+
+
+
+########## ########## ########## ########## ########## child side
+class LineReader:
+    """
+    The iQ of a sandboxed player: one instruction per line of a text stream.
+    """
+    def __init__(self,stream):
+        self.stream = stream
+    def get(self,block=True,timeout=None):
+        line = self.stream.readline()
+        if not line: # the host has gone
+            raise SystemExit(0)
+        return line[:-1] if line.endswith('\n') else line
+
+class LineWriter:
+    """
+    The rQ of a sandboxed player: one response per line, flushed at once.
+    """
+    def __init__(self,stream):
+        self.stream = stream
+    def put(self,text,block=True,timeout=None):
+        self.stream.write(text + '\n')
+        self.stream.flush()
+
+def serve(source,gameCount,seed=None):
+    """
+    Run the player module "source" on this process's stdin/stdout.
+    """
+    out = os.fdopen(os.dup(1),'w',encoding='utf-8') # the protocol keeps the real stdout
+    os.dup2(2,1) # prints of the player go to stderr
+    sys.stdout = sys.stderr
+    sys.path.insert(1,os.getcwd())
+    module = importlib.import_module(source)
+    if seed is not None:
+        random.seed(seed)
+    writer = LineWriter(out)
+    writer.put('name %s' % module.name)
+    module.play(gameCount,LineReader(sys.stdin),writer)
+
+
+
+########## ########## ########## ########## ########## host side
+class SubprocessSeat(engine.Seat):
+    """
+    A seat whose player runs in a child process.
+
+    source: the player module, e.g. 'Ref01'.
+    gameCount: the number of games the player will be told to play.
+    timeout: seconds the player has to answer an action instruction.
+    seed: seeds the child's random module (the host seeds only its own).
+    """
+    def __init__(self,source,gameCount,timeout=engine.ACTION_TIMEOUT,seed=None):
+        command = [sys.executable,SANDBOX,SERVE,source,str(gameCount)]
+        if seed is not None:
+            command += ['--seed',str(seed)]
+        self.source = source
+        self.timeout = timeout
+        self.pending = list() # the instructions not sent yet
+        self.dead = False
+        self.process = subprocess.Popen(command,stdin=subprocess.PIPE,stdout=subprocess.PIPE,
+                                        encoding='utf-8',cwd=os.getcwd())
+        self.responses = Channel()
+        self.reader = threading.Thread(target=self._read,daemon=True)
+        self.reader.start()
+        line = self._response(START_TIMEOUT)
+        if line is None or not line.startswith('name '):
+            self.kill()
+            raise RuntimeError('player %s did not start' % source)
+        engine.Seat.__init__(self,line[5:])
+
+    def _read(self): # runs on the reader thread; blocks in the OS, not on the GIL
+        for line in self.process.stdout:
+            self.responses.put(line[:-1] if line.endswith('\n') else line)
+        self.responses.put(None) # end of file
+
+    def _response(self,timeout):
+        """
+        The next line of the player, or None (and the player killed) if it does not come in time.
+        """
+        try:
+            line = self.responses.get(timeout=timeout)
+        except queue.Empty:
+            utility.log('host','player %s gave no response in %g seconds; killed',self.source,timeout,
+                        level=utility.WARNING)
+            line = None
+        if line is None:
+            self.kill()
+        return line
+
+    def _send(self):
+        try:
+            self.process.stdin.write(''.join(text + '\n' for text in self.pending))
+            self.process.stdin.flush()
+        except (OSError,ValueError): # the child has gone
+            self.kill()
+        self.pending = list()
+
+    def kill(self):
+        """
+        Stop the player for good; later actions get no response.
+        """
+        self.dead = True
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+    def start(self,gameCount):
+        self._response(self.timeout) # the player's greeting, e.g. 'sandy report for 1000 games'
+
+    def tell(self,kind,arg=None):
+        if not self.dead:
+            self.pending.append(instructionText(kind,arg))
+
+    def act(self,state):
+        if self.dead:
+            return None
+        self.pending.append(instructionText(state.options))
+        self._send()
+        if self.dead:
+            return None
+        text = self._response(self.timeout)
+        return None if text is None else parseResponse(text)
+
+    def flush(self):
+        """
+        Send the last instructions, close the pipe and let the player exit.
+        """
+        if self.dead:
+            return
+        if self.pending:
+            self._send()
+        try:
+            self.process.stdin.close()
+            self.process.wait(self.timeout)
+        except (OSError,subprocess.TimeoutExpired):
+            self.kill()
+        self.dead = True
+
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Serve a fate17 player over stdin/stdout.')
+    parser.add_argument(SERVE,dest='source',required=True,help='the player module')
+    parser.add_argument('gameCount',type=int)
+    parser.add_argument('--seed',type=int,default=None)
+    args = parser.parse_args()
+    serve(args.source,args.gameCount,args.seed)
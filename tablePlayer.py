@@ -0,0 +1,231 @@
+"""
+A fate17 player that plays a precomputed strategy table.
+
+The table is a strategy file of "cfr" (or any tool that writes the same format), mapped
+read-only. At every action the player looks up the node of the public history -- the
+interval, the betting so far and both change counts, e.g. 'b5,r10,c/2:3/b10' -- and the row
+of its hand bucket, and samples the action from the row's cumulative probabilities with one
+random draw. The changes follow the discard policy table ("policy"), which the solver assumes.
+No strategy is computed while playing.
+
+The opponent's bets and raises are mapped to the nearest level the table has for them, and
+the player's own levels are clamped to what the host allows. A history the table does not
+have (e.g. a change count pair never sampled) is answered by check or call; "misses" counts them.
+
+The table is STRATEGY_FILE, or the file named by the environment variable FATE17_STRATEGY.
+Actions are drawn from the random module, so the host's seed applies; "seed(n)" gives the
+player a private, seeded generator instead.
+
+The player supports both the queue protocol ("play") and the headless engine ("decideBet"
+and "changeMask").
+"""
+
+import os
+import mmap
+import random
+import evaluator
+import policy
+import cfr
+from engine import strategyPlay
+from protocol import BET_CHECK,CALL_FOLD
+
+name = 'tabula'
+STRATEGY_FILE = os.environ.get('FATE17_STRATEGY') or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                   cfr.STRATEGY_FILE)
+
+rng = random # the source of getrandbits for the draws
+misses = 0 # decisions not found in the table
+
+
+
+def seed(value):
+    """
+    Draw the actions from a private random.Random(value) instead of the random module.
+    """
+    global rng
+    rng = random.Random(value)
+
+class StrategyTable:
+    """
+    A strategy file mapped read-only.
+
+    buckets1, buckets2: hand index -> bucket of the dealt and the final hand.
+    index: node key -> (actor, actions, first value of the node's rows).
+    """
+    def __init__(self,path):
+        with open(path,'rb') as f:
+            self.map = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+        magic,version,flags,handCount,self.b1Count,self.b2Count,nodeCount,indexSize = cfr.HEADER.unpack_from(self.map,0)
+        if magic != cfr.MAGIC or version != cfr.VERSION or handCount != len(evaluator.HANDS):
+            self.map.close()
+            raise ValueError('%s is not a strategy file (write one with "python cfr.py")' % path)
+        start = cfr.HEADER.size
+        self.buckets1 = self.map[start:start + handCount]
+        self.buckets2 = self.map[start + handCount:start + 2*handCount]
+        start += 2*handCount
+        data = start + indexSize
+        self.values = memoryview(self.map)[data:len(self.map) - (len(self.map) - data) % 2].cast('H')
+        self.index = dict()
+        for line in self.map[start:data].decode('ascii').split('\n'):
+            if line:
+                key,actor,actions,offset = line.split('\t')
+                self.index[key] = (int(actor),tuple(actions.split(',')),int(offset) // 2)
+        if len(self.index) != nodeCount:
+            raise ValueError('%s has a broken index' % path)
+    def stateOf(self,dealt,final=None):
+        """
+        The row of a hand: the dealt bucket in interval I, (dealt, final) in interval II.
+        """
+        b1 = self.buckets1[evaluator.HAND_INDEX[dealt]]
+        if final is None:
+            return b1
+        return b1 * self.b2Count + self.buckets2[evaluator.HAND_INDEX[final]]
+    def sample(self,key,state,draw):
+        """
+        The action of row "state" at node "key" for a 16-bit random draw, or None if the
+        table has no such node.
+        """
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        actions = entry[1]
+        values = self.values
+        row = entry[2] + state * len(actions)
+        for a in range(len(actions) - 1):
+            if draw < values[row + a]:
+                return actions[a]
+        return actions[-1]
+    def actions(self,key):
+        entry = self.index.get(key)
+        return entry[1] if entry is not None else ()
+
+_table = None
+
+def table():
+    """
+    The strategy table, mapped on the first call.
+    """
+    global _table
+    if _table is None:
+        _table = StrategyTable(STRATEGY_FILE)
+    return _table
+
+
+
+########## ########## ########## ########## ########## abstract history
+class Context:
+    """
+    The abstract history of the game a seat is in.
+    """
+    __slots__ = ('dealt','me','history1','tokens','prefix','starter','state','last')
+    def __init__(self):
+        self.dealt = 0
+        self.me = 0 # 0 if this player got 'first'
+        self.history1 = list() # the interval I tokens
+        self.tokens = self.history1 # the tokens of the running interval
+        self.prefix = ''
+        self.starter = 0
+        self.state = 0 # the table row
+        self.last = None # my last token in this interval
+
+def _setter(starter,tokens):
+    # the player of the last bet or raise; tokens alternate between the players from the starter
+    setter = starter
+    for j,token in enumerate(tokens):
+        if token[0] == 'b' or token[0] == 'r':
+            setter = starter if j % 2 == 0 else 1 - starter
+    return setter
+
+def _mapped(t,key,kind,amount):
+    # the opponent's bet or raise as the table level nearest to the amount
+    best = None
+    for token in t.actions(key):
+        if token[0] == kind and (best is None or abs(int(token[1:]) - amount) < abs(int(best[1:]) - amount)):
+            best = token
+    return best if best is not None else '%s%d' % (kind,amount)
+
+def _context(state,t):
+    """
+    The context of the seat, brought up to date with the opponent's action since the last one.
+    """
+    ctx = state.context
+    if ctx is None:
+        ctx = state.context = Context()
+    if not state.memo: # a new betting interval
+        state.memo['table'] = True
+        if state.interval == 1:
+            ctx.dealt = state.hand
+            ctx.me = 0 if state.leader else 1
+            ctx.history1 = ctx.tokens = list()
+            ctx.prefix = ''
+            ctx.starter = 0
+            ctx.state = t.stateOf(state.hand)
+        else:
+            history1 = ctx.history1
+            if history1 and history1[-1] != 'c': # the opponent called my bet
+                history1.append('c')
+            setter = _setter(0,history1)
+            myCount = evaluator.cardCount(ctx.dealt & ~state.hand)
+            oppCount = state.oppChangeCount or 0
+            counts = (myCount,oppCount) if setter == ctx.me else (oppCount,myCount)
+            ctx.prefix = '%s/%d:%d/' % (','.join(history1),counts[0],counts[1])
+            ctx.tokens = list()
+            ctx.starter = setter
+            ctx.state = t.stateOf(ctx.dealt,state.hand)
+        ctx.last = None
+        if ctx.starter != ctx.me: # the opponent opened
+            if state.oppBet == 0:
+                ctx.tokens.append('k')
+            else:
+                ctx.tokens.append(_mapped(t,ctx.prefix,'b',state.oppBet))
+    elif ctx.last is not None: # the opponent answered my last action
+        key = ctx.prefix + ','.join(ctx.tokens)
+        ctx.tokens.append(_mapped(t,key,'b' if ctx.last == 'k' else 'r',state.oppBet))
+    return ctx
+
+
+
+########## ########## ########## ########## ########## strategy
+def decideBet(state):
+    """
+    The table's decision at one action instruction.
+
+    state: an "engine.SeatState" with the hand, the interval, the action instruction and both bets.
+
+    Returns: the response as a tuple, ('bet',n), ('check',0), ('raise',r), ('call',0) or ('fold',0).
+    """
+    global misses
+    t = _table if _table is not None else table()
+    ctx = _context(state,t)
+    token = t.sample(ctx.prefix + ','.join(ctx.tokens),ctx.state,rng.getrandbits(16))
+    if token is None:
+        misses += 1
+        token = 'k' if state.options == BET_CHECK else 'c'
+    ctx.tokens.append(token)
+    ctx.last = token
+    kind = token[0]
+    if kind == 'k':
+        return ('check',0)
+    if kind == 'b':
+        return ('bet',min(state.maxBet,max(state.minBet,int(token[1:]))))
+    if kind == 'r':
+        if state.options == CALL_FOLD:
+            return ('call',0)
+        return ('raise',min(state.maxBet - state.oppBet,max(1,int(token[1:]) - state.oppBet)))
+    if kind == 'c':
+        return ('call',0)
+    return ('fold',0)
+
+def changeMask(hand,maxChange=5):
+    """
+    The discard of the policy table, as the solver assumes.
+
+    Returns: the mask of the cards to give up.
+    """
+    return policy.policyDiscard(hand,maxChange)
+
+
+
+# the queue protocol around "decideBet" and "changeMask", keeping the "engine.SeatState"
+# the host would give them (see "engine.StrategyAdapter")
+play = strategyPlay(name,decideBet,changeMask)
@@ -16,6 +16,12 @@ v2.1 20180527
 """
 
 import random
+import evaluator
+import policy
+import protocol
+import utility
+import opponent
+from protocol import BET_CHECK,RAISE_CALL_FOLD,CALL_FOLD,OPP_BET,OPP_RAISE,OPP_CHECK,OPP_FOLD,OPP_CALL
 ANTE = 5
 name = 'veryopopkai' # make decisions according to "S"core
 
@@ -29,6 +35,7 @@ def analyzeHand(cards):
 
     cards: a list or set of five cards.
         The 17 possible cards are 'J' and {'S','H','D','C'} x {'A','K','Q','J'}.
+        Graded by one lookup in the precomputed table of "evaluator".
     
     Returns:
         This function returns a tuple (score, category).
@@ -42,101 +49,121 @@ def analyzeHand(cards):
         >= 30000: two pair
         >= 20000: one pair
     """
-    rankWeight = {'A': 8, 'K': 6, 'Q': 4, 'J': 2}
-    hasJoker = False
-    rankToCount = dict()
-    suitToCount = dict() # needed to tell straight from royal straight flush
-    score = 0
-    category = None
-    ### pre-processing
-    for card in cards:
-        if len(card) == 1: # joker
-            hasJoker = True
-        else:
-            rankToCount[card[1]] = rankToCount.get(card[1],0) + 1
-            suitToCount[card[0]] = suitToCount.get(card[0],0) + 1
-    countToRank = dict()
-    for k in rankToCount:
-        countToRank.setdefault(rankToCount[k],list()).append(k)
-    ### 
-    if hasJoker and 4 in countToRank: # five card
-        category = 'five card'
-        score = 90000
-    elif hasJoker and len(rankToCount) == 4: # straight
-        if len(suitToCount) == 1: # same suit: royal straight flush
-            category = 'royal straight flush'
-            score = 80000
-        else: # straight
-            category = 'straight'
-            score = 50000
-    elif not hasJoker and 4 in countToRank: # four card w/o joker
-        category = 'four card'
-        score = 70000
-        score += rankWeight[countToRank[4][0]] * 1000
-        score += rankWeight[countToRank[1][0]] * 100
-    elif hasJoker and 3 in countToRank: # four card w/ joker
-        category = 'four card'
-        score = 70000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[1][0]] * 100
-    elif 3 in countToRank and 2 in countToRank: # full house w/o joker
-        category = 'full house'
-        score = 60000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[2][0]] * 100
-    elif hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # full house w/ joker
-        category = 'full house'
-        r1 = countToRank[2][0]
-        r2 = countToRank[2][1]
-        score = 60000 + max(rankWeight[r1] * 1000 + rankWeight[r2] * 100,
-                                rankWeight[r2] * 1000 + rankWeight[r1] * 100)
-    elif not hasJoker and 3 in countToRank and 2 not in countToRank: # 3 card w/o joker
-        category = 'three card'
-        r1 = countToRank[1][0]
-        r2 = countToRank[1][1]
-        score = 40000 + rankWeight[countToRank[3][0]] * 1000 + \
-                    max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
-    elif hasJoker and 2 in countToRank and 1 in countToRank: # 3 card w/ joker
-        category = 'three card'
-        r1 = countToRank[1][0]
-        r2 = countToRank[1][1]
-        score = 40000 + rankWeight[countToRank[2][0]] * 1000 + \
-                    max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
-    elif not hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # 2 pair (must be w/o joker)
-        category = 'two pair'
-        p1 = countToRank[2][0]
-        p2 = countToRank[2][1]
-        score = 30000 +  \
-                    max(rankWeight[p1] * 1000 + rankWeight[p2] * 100,
-                        rankWeight[p2] * 1000 + rankWeight[p1] * 100) + \
-                    rankWeight[countToRank[1][0]] * 10
-    elif not hasJoker and len(rankToCount) == 4: # 1 pair (must be w/o joker)
-        category = 'one pair'
-        p = countToRank[2][0]
-        score = 20000 + rankWeight[p] * 1000
-        if p == 'A':
-            score += rankWeight['K'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
-        elif p == 'K':
-            score += rankWeight['A'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
-        elif p == 'Q':
-            score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['J']
-        else: # p = 'J'
-            score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['Q']
-    else:
-        print('ops, this one is out of my analysis... %s' % (','.join(cards)))
-    ###
-    return score,category
+    return evaluator.analyzeHand(cards)
 
 
+########## ########## ########## ########## ########## BETTING STATE MACHINE
+# Every host instruction of a betting interval is parsed once into a "protocol.Message".
+# The response to it is looked up in ACTIONS by (kind, band), where the band is the strategy
+# that "Target" picks for the hand:
+#   TARGET_BAND: bet the target, raise up to it, otherwise call.
+#   FOLDING_BAND: no target (two pair, one pair, three card in interval II and any score
+#       outside the ranges of "Target") -- check, and fold when the opponent bets.
+TARGET_BAND = 0
+FOLDING_BAND = 1
+
+def strategyBand(adjustscore,maxBet):
+    """
+    The band of the state machine for a hand, see ACTIONS.
+    """
+    return TARGET_BAND if Target(adjustscore,maxBet) else FOLDING_BAND
+
+class Betting:
+    """
+    The state of one betting interval, as in "betting2".
+    """
+    __slots__ = ('target','myBet','oppBet','isSetter','checked','oppChecked')
+    def __init__(self,target):
+        self.target = target
+        self.myBet = 0 # The bet, excluding ante, that this player has placed in the pot.
+        self.oppBet = 0 # The bet, excluding ante, that the opponent has placed in the pot.
+        self.isSetter = None # True/False if this player/the opponent sets the agreed bet.
+        self.checked = False # True/False if this player has/hasn't checked.
+        self.oppChecked = False # True/False if the opponent has/hasn't checked.
+
+# Each action takes (betting state, amount) and returns (response, done):
+# the response tuple to send, if any, and whether the betting interval is over for this player.
+def _check(b,amount):
+    b.checked = True
+    return ('check',0),b.oppChecked # both check, end betting
+
+def _fold(b,amount):
+    return ('fold',0),True
+
+def _betTarget(b,amount):
+    b.myBet = b.target
+    b.isSetter = True
+    return ('bet',b.myBet),False
+
+def _raiseOrCall(b,amount): # the opponent has not reached the maximum bet
+    if b.target > b.oppBet: # raise
+        myRaise = b.target - b.oppBet
+        b.myBet = b.target
+        b.isSetter = True
+        return ('raise',myRaise),False
+    b.myBet = b.oppBet # call
+    return ('call',0),True
+
+def _callIfReached(b,amount): # the opponent bet the maximum
+    if b.oppBet >= b.target: # call
+        b.myBet = b.oppBet
+        return ('call',0),True
+    return ('fold',0),True
+
+def _oppBet(b,amount):
+    b.oppBet = amount
+    b.isSetter = False
+    return None,False
+
+def _oppRaise(b,amount):
+    b.oppBet = b.myBet + amount
+    b.isSetter = False
+    return None,False
+
+def _oppCheck(b,amount):
+    b.oppChecked = True
+    return None,b.checked
+
+def _oppFold(b,amount):
+    return None,True
+
+def _oppCall(b,amount):
+    b.oppBet = b.myBet
+    return None,True
+
+ACTIONS = {
+    (BET_CHECK,TARGET_BAND): _betTarget,
+    (BET_CHECK,FOLDING_BAND): _check,
+    (RAISE_CALL_FOLD,TARGET_BAND): _raiseOrCall,
+    (RAISE_CALL_FOLD,FOLDING_BAND): _fold,
+    (CALL_FOLD,TARGET_BAND): _callIfReached,
+    (CALL_FOLD,FOLDING_BAND): _fold,
+}
+for _band in (TARGET_BAND,FOLDING_BAND):
+    ACTIONS[(OPP_BET,_band)] = _oppBet
+    ACTIONS[(OPP_RAISE,_band)] = _oppRaise
+    ACTIONS[(OPP_CHECK,_band)] = _oppCheck
+    ACTIONS[(OPP_FOLD,_band)] = _oppFold
+    ACTIONS[(OPP_CALL,_band)] = _oppCall
+del _band
+
 def betting2(name,iQ,rQ,minBet,maxBet,adjustscore,target,hand):
     """
     20180524
-    This function implements a random betting strategt.
+    This function implements the betting strategy of this player as a state machine.
     During the betting process, this player gets instructions from iQ (instruction queue)
     and, if necessary, places responses in rQ (response queue).
+    Each instruction is parsed once and answered by the entry of ACTIONS for its kind
+    and the band of the hand (see "strategyBand").
 
     name: player name, a string
     iQ: the instruction queue. Use "aString = iQ.get()" to get the instruction.
     rQ: the response queue. Use "rQ.put(aString)" to put the response.
     minBet: the initial minimum bet of this betting interval.
     maxBet: the maximum bet of this betting interval.
-    target (new in v1): the target bet. If None (default), a random target is generated.
+    adjustscore: the hand score of "setTarget".
+    target: the target bet of "Target".
+    hand: the cards in hand (not used).
 
     Returns: myBet,oppBet,isSetter
         myBet/oppBet is the amount of money, excluding ante, that this player/the opponent
@@ -150,583 +177,21 @@ def betting2(name,iQ,rQ,minBet,maxBet,adjustscore,target,hand):
                 Bet agreed. If isSetter is True, this player is the one who sets the bet, i.e.,
                 the opponent "calls." Otherwise, the opponent is the one who sets the bet.
     """
-
-    oppChecked = False # True/False if the opponent has/hasn't checked.
-    checked = False # True/False if this player has/hasn't checked.
-    myBet = 0 # The bet, excluding ante, that this player has placed in the pot.
-    oppBet = 0 # The bet, excluding ante, that the opponent has placed in the pot.
-    isSetter = None # True/False if this player/the opponent sets the agreed bet. 誰是下注下到別人需要跟注的一方
-
-    #拿到two pairs and one pairs要下注的方法
-    while adjustscore == 0:                              
-        instruction = iQ.get()
-        if instruction == 'action:bet,check':
-            checked = True
-            rQ.put('check')
-            if oppChecked: # both check, end betting
-                break
-        elif instruction == 'action:raise,call,fold': 
-            rQ.put('fold')
-            break 
-        elif instruction == 'action:call,fold':
-            rQ.put('fold')
-            break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        
-    #拿到5 cards 時，第一輪要下注的方法
-    while adjustscore > 0.7 and maxBet == 15: #maxBet == 15代表是第一輪下注
-        instruction = iQ.get()
-        if instruction == 'action:bet,check': #第一輪下注，而且是從你開始下注
-            myBet = target #Target函數先計算每一種牌型要下注的金額然後匯入的target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #第一輪下注，對手先下注，而且下注的金額不到max(15元)，問你要有什麼反應
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一輪下注，對手先下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet #第一輪下注，你先check，對手下注，那會繼續進行這個while迴圈
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise #第一輪下注，你先下注一個金額，對手反raise你，那會繼續進行這個while迴圈
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check': #第一輪下注，你先check，對手也check
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold': #第一輪下注，而且是從你開始下注，對手fold掉
-            break
-        elif instruction == 'opponent call': #第一輪下注，而且是從你開始下注，對手call
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-    
-            
-    #拿到5 cards 時，第二輪要下注的方法
-    while adjustscore > 0.7 and maxBet == 30:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check'  : #第二輪下注
-            myBet = target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-
-    #拿到flush straight 時，第一輪要下注的方法
-    while(0.7>adjustscore>0.66) and maxBet==15:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
-            myBet = target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-    
-
-    #拿到flush straight 時，第二輪要下注的方法
-    while(0.7>adjustscore>0.66) and maxBet==30:        
-        instruction = iQ.get()
-        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
-            myBet = target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-
-    
-
-    #拿到4cards 時，第一輪要下注的方法
-    while (0.66>adjustscore>0.56) and maxBet==15:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
-            myBet = target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-    
-
-    #拿到4cards 時，第二輪要下注的方法
-    while 0.66>adjustscore>0.56 and maxBet==30:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
-            myBet = target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-    
-
-    #拿葫蘆時，第一輪要下注的方法
-    while (0.45<=adjustscore<=0.54) and maxBet==15:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
-            myBet = target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-    
-
-    #拿到葫蘆 時，第二輪要下注的方法
-    while (0.45<=adjustscore<=0.54) and maxBet==30:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
-            myBet = target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-
-    
-
-    #拿straight時，第一輪要下注的方法
-    while 0.33<adjustscore<0.4 and maxBet==15:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
-            myBet = target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-
-    
-
-    #拿到straight時，第二輪要下注的方法
-    while 0.33<adjustscore<0.4 and maxBet==30:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
-            myBet = target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-
-
-    #拿 3cards 時，第一輪要下注的方法
-    while 0<adjustscore<0.33 and maxBet==15:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
-            myBet = target
-            isSetter = True
-            rQ.put('bet %d' % myBet)
-        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
-            if target > oppBet: # raise
-                myBet = oppBet
-                myRaise = target-oppBet
-                myBet += myRaise
-                isSetter = True
-                rQ.put('raise %d to be %d' % (myRaise,myBet))
-            elif target == oppBet: # call
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-            else:
-                myBet = oppBet
-                rQ.put('call %d' % oppBet)
-                break
-        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
-            if oppBet >= target: # call
-                myBet = oppBet
-                rQ.put('call %d' % myBet)
-                break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
-            break
-        else:
-            print('%s > unknown instruction: %s' % (name,instruction))
-
-
-    #拿到 3cards 時，第二輪要下注的方法
-    while 0<adjustscore<0.33 and maxBet==30:
-        instruction = iQ.get()
-        if instruction == 'action:bet,check':
-            checked = True
-            rQ.put('check')
-            if oppChecked: # both check, end betting
-                break
-        elif instruction == 'action:raise,call,fold': 
-            rQ.put('fold')
-            break 
-        elif instruction == 'action:call,fold':
-            rQ.put('fold')
-            break
-        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
-            oppBet = int(instruction.split()[2])
-            isSetter = False
-        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
-            oppBet = myBet + int(instruction.split()[2])
-            isSetter = False
-        elif instruction == 'opponent check':
-            oppChecked = True
-            if checked:
-                break
-        elif instruction == 'opponent fold':
-            break
-        elif instruction == 'opponent call':
-            oppBet = myBet
+    band = strategyBand(adjustscore,maxBet)
+    b = Betting(target)
+    while True:
+        message = protocol.parseInstruction(iQ.get())
+        action = ACTIONS.get((message.kind,band))
+        if action is None:
+            utility.log(name,'unknown instruction: %s',protocol.instructionText(*message),level=utility.WARNING)
+            continue
+        response,done = action(b,message.value)
+        if response is not None:
+            rQ.put(protocol.responseText(response,b.myBet))
+        if done:
             break
-    return myBet,oppBet,isSetter
+    return b.myBet,b.oppBet,b.isSetter
 
-    
             
 def setTarget(cards):
     """
@@ -799,11 +264,48 @@ def Target(adjustscore,maxBet):
         target=0
         return target
     
+def changeMask(hand,maxChange=5):
+    """
+    Determine which cards to change, working on card masks.
+    The best discard is looked up in the precomputed table of "policy" (one array index).
+    Without the table, this is the strategy of "changeCards" without any string handling.
+
+    hand: The 17-bit mask of the five cards. See "evaluator" for the card ids.
+    maxChange: The maximum number of cards that can be changed.
+        If there are more cards than "maxChange" that we would like to give up,
+        randomly pick "maxChange" ones to replace.
+
+    Returns: The mask of the cards to give up.
+    """
+    if policy.available():
+        return policy.policyDiscard(hand,maxChange)
+    score,cat = analyzeHand(hand)
+    targetCards = 0 # the cards to change
+    if cat == 'five card' or cat == 'royal straight flush' or cat == 'full house':
+        pass
+    elif cat == 'straight': # give up one of K, Q and J (the one with the lowest card id)
+        candidates = hand & (evaluator.RANK_MASK[1] | evaluator.RANK_MASK[2] | evaluator.RANK_MASK[3])
+        targetCards = candidates & -candidates
+    elif cat == 'four card' or cat == 'three card' or cat == 'two pair' or cat == 'one pair': # give up the singletons
+        for rankMask in evaluator.RANK_MASK:
+            if evaluator.cardCount(hand & rankMask) == 1:
+                targetCards |= hand & rankMask
+    else:
+        utility.log(name,'SOMETHING WRONG in "changeMask()": %s is a %s',evaluator.maskToString(hand),cat,level=utility.WARNING)
+    ###
+    if maxChange < evaluator.cardCount(targetCards):
+        ids = [c for c in range(evaluator.JOKER) if targetCards >> c & 1]
+        targetCards = 0
+        for c in random.sample(ids,maxChange):
+            targetCards |= 1 << c
+    return targetCards
+
 def changeCards(cards,maxChange=5):
     """
     20180524
     Determine which cards to change.
-    The strategy is simple -- give up the singltons except for when the hand is straight.
+    The precomputed discard policy is used when available (see "changeMask"); otherwise
+    the strategy is simple -- give up the singltons except for when the hand is straight.
 
     cards: The five cards. See "analyzeHand" for more details.
     maxChange: The maximum number of cards that can be changed.
@@ -812,50 +314,27 @@ def changeCards(cards,maxChange=5):
 
     Returns: The set of cards to give up.
     """
-    hasJoker = False
-    rankToCount = dict()
-    suitToCount = dict() # needed to tell straight from royal straight flush
-    ### pre-processing
-    for card in cards:
-        if len(card) == 1: # joker
-            hasJoker = True
-        else:
-            rankToCount[card[1]] = rankToCount.get(card[1],0) + 1
-            suitToCount[card[0]] = suitToCount.get(card[0],0) + 1
-    countToRank = dict()
-    for k in rankToCount:
-        countToRank.setdefault(rankToCount[k],list()).append(k) #這個會創建一個反向的dictionary ex.{2: ['A', 'K'], 1: ['J']}
-   
-    score,cat = analyzeHand(cards)
-    targetCards = set() # the cards to change
-    if cat == 'five card' or cat == 'royal straight flush' or cat == 'full house':
-        pass        #不做任何事
-    elif cat == 'straight' :
-        for card in cards:
-            if card != 'J' and (card[1]=='J'or card[1]=='Q' or card[1]=='K'):
-                targetCards.add(card)
-                break
-    elif cat == 'four card': # change the singleton
-        for card in cards:
-            if card != 'J' and card[1] in countToRank[1]:
-                targetCards.add(card)
-                break
-    elif cat == 'three card': # give up the two singleton cards
-        for card in cards:
-            if card != 'J' and card[1] in countToRank[1]: # skip singltons
-                targetCards.add(card)
-    elif cat == 'two pair' or cat == 'one pair': # give up the singletons
-        for card in cards:
-            if card != 'J' and card[1] in countToRank[1]:
-                targetCards.add(card)
-    else:
-        print('SOMETHING WRONG in "changeCards()" .........................................')
-    ###
-    if maxChange < len(targetCards):
-        targetCards = random.sample(targetCards,maxChange)
-    return targetCards
+    return set(evaluator.maskToCards(changeMask(evaluator.cardsToMask(cards),maxChange)))
+
+def decideBet(state):
+    """
+    The decision "betting2" makes at one action instruction, for the headless engine
+    (see "engine.DirectSeat"). Uses the same ACTIONS table.
 
-def play(gameCount,iQ,rQ):
+    state: an "engine.SeatState" with the hand, the interval, the action instruction and both bets.
+
+    Returns: the response as a tuple, ('bet',n), ('check',0), ('raise',r), ('call',0) or ('fold',0).
+    """
+    maxBet = 15 if state.interval == 1 else 30
+    adjustscore = state.memo.get('adjustscore')
+    if adjustscore is None:
+        adjustscore = state.memo['adjustscore'] = setTarget(state.hand)
+    b = Betting(Target(adjustscore,maxBet))
+    b.myBet = state.myBet
+    b.oppBet = state.oppBet
+    return ACTIONS[(state.options,strategyBand(adjustscore,maxBet))](b,0)[0]
+
+def play(gameCount,iQ,rQ,model=None):
     """
     This function implements the fate17 protocol.
     Compared to the players in v1, decisions are now somewhat determinnistic, according to
@@ -867,21 +346,22 @@ def play(gameCount,iQ,rQ):
     gameCount: the number of games to play.
     iQ: the instruction queue. (See "betting2" for more.)
     rQ: the response queue. (See "betting2" for more.)
+    model: an "opponent.OpponentModel" to feed with the instructions of the match, or None.
     """
     ########## ########## ########## ########## ########## INITIALIZATION
+    if model is not None:
+        iQ = opponent.TappedQueue(iQ,model)
     balance = 0
     rQ.put('%s report for %d games' % (name,gameCount)) # You can say anything here ...
     ##### start games
     for gameIndex in range(1,gameCount+1):
         ##### receive the assigned order (first or second)
-        instruction = iQ.get() # first or second
-        leader = True if instruction == 'first' else False
+        leader = protocol.parseInstruction(iQ.get()).kind == protocol.FIRST # first or second
         ##### pay ante
         instruction = iQ.get()
         balance -= 5
         ##### receive cards
-        instruction = iQ.get()
-        hand = instruction.split(' ')[1].split(',') #輸出一個排長怎樣的list
+        hand = protocol.parseInstruction(iQ.get()).value # cards X,Y,...; the hand is kept as a card mask
         ########## ########## ########## ########## BETTING INTERVAL I
         minBet = 5
         maxBet = 15
@@ -900,23 +380,17 @@ def play(gameCount,iQ,rQ):
         ########## ########## ########## ########## CHANGING CARDS
         if isSetter1: # me change first
             instruction = iQ.get() # action:change
-            selected = changeCards(hand,5) # can change up to 5 cards
-            rQ.put('change %s' % (','.join(selected)))
-            instruction = iQ.get() # cards J,QH -- was missing in v0 and v1
-            newCards = list() if len(selected) == 0 else instruction.split()[1].split(',')
+            selected = changeMask(hand,5) # can change up to 5 cards
+            rQ.put(protocol.responseText(('change',selected)))
+            newCards = protocol.parseInstruction(iQ.get()).value # cards J,QH -- was missing in v0 and v1
             iQ.get() # opponent change X cards
         else: # the opponent changes first
-            instruction = iQ.get() # opponent change X cards
-            oppChangeCount = int(instruction.split()[2])
+            oppChangeCount = protocol.parseInstruction(iQ.get()).value # opponent change X cards
             iQ.get() # action:change
-            selected = changeCards(hand,7-oppChangeCount)
-            rQ.put('change %s' % (','.join(selected)))
-            instruction = iQ.get() # cards J,QH -- was missing in v0
-            newCards = list() if len(selected) == 0 else instruction.split()[1].split(',')
-        for i in selected: # remove changed cards
-            hand.remove(i)
-        for i in newCards: # include new cards
-            hand.append(i)
+            selected = changeMask(hand,7-oppChangeCount)
+            rQ.put(protocol.responseText(('change',selected)))
+            newCards = protocol.parseInstruction(iQ.get()).value # cards J,QH -- was missing in v0
+        hand = (hand & ~selected) | newCards # remove changed cards, include new cards
         ########## ########## ########## ########## BETTING INTERVAL II
         minBet = myBet1 + 1
         maxBet = 30
@@ -935,10 +409,10 @@ def play(gameCount,iQ,rQ):
             continue
         ########## ########## ########## ########## SHOW HANDS
         response = iQ.get() # opponent cards J,HA,DA,CQ,CA <=== added in v2.1
-        response = iQ.get() # win, lose, or tie
-        if response == 'win': # win the pot and ante (myBet == oppBet)
+        result = protocol.parseInstruction(iQ.get()).kind # win, lose, or tie
+        if result == protocol.WIN: # win the pot and ante (myBet == oppBet)
             balance += (myBet1 + myBet2 + ANTE) * 2
-        elif response == 'tie': # split the pot and get ante back
+        elif result == protocol.TIE: # split the pot and get ante back
             balance += myBet1 + myBet2 + ANTE
     #print('Hi, this is %s. My final balance should be %d.' % (name,balance))
     
@@ -0,0 +1,85 @@
+"""
+The hand grading of the original "utility.analyzeHand", frozen as the oracle of the evaluator tests.
+"""
+
+def analyzeHand(cards): # a list or set of 5 cards -- the baseline code, unchanged
+    rankWeight = {'A': 8, 'K': 6, 'Q': 4, 'J': 2}
+    hasJoker = False
+    rankToCount = dict()
+    suitToCount = dict() # needed to tell straight from royal straight flush
+    score = 0
+    category = None
+    ### pre-processing
+    for card in cards:
+        if len(card) == 1: # joker
+            hasJoker = True
+        else:
+            rankToCount[card[1]] = rankToCount.get(card[1],0) + 1
+            suitToCount[card[0]] = suitToCount.get(card[0],0) + 1
+    countToRank = dict()
+    for k in rankToCount:
+        countToRank.setdefault(rankToCount[k],list()).append(k)
+    ### 
+    if hasJoker and 4 in countToRank: # five card
+        category = 'five card'
+        score = 90000
+    elif hasJoker and len(rankToCount) == 4: # straight
+        if len(suitToCount) == 1: # same suit: royal straight flush
+            category = 'royal straight flush'
+            score = 80000
+        else: # straight
+            category = 'straight'
+            score = 50000
+    elif not hasJoker and 4 in countToRank: # four card w/o joker
+        category = 'four card'
+        score = 70000
+        score += rankWeight[countToRank[4][0]] * 1000
+        score += rankWeight[countToRank[1][0]] * 100
+    elif hasJoker and 3 in countToRank: # four card w/ joker
+        category = 'four card'
+        score = 70000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[1][0]] * 100
+    elif 3 in countToRank and 2 in countToRank: # full house w/o joker
+        category = 'full house'
+        score = 60000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[2][0]] * 100
+    elif hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # full house w/ joker
+        category = 'full house'
+        r1 = countToRank[2][0]
+        r2 = countToRank[2][1]
+        score = 60000 + max(rankWeight[r1] * 1000 + rankWeight[r2] * 100,
+                                rankWeight[r2] * 1000 + rankWeight[r1] * 100)
+    elif not hasJoker and 3 in countToRank and 2 not in countToRank: # 3 card w/o joker
+        category = 'three card'
+        r1 = countToRank[1][0]
+        r2 = countToRank[1][1]
+        score = 40000 + rankWeight[countToRank[3][0]] * 1000 + \
+                    max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
+    elif hasJoker and 2 in countToRank and 1 in countToRank: # 3 card w/ joker
+        category = 'three card'
+        r1 = countToRank[1][0]
+        r2 = countToRank[1][1]
+        score = 40000 + rankWeight[countToRank[2][0]] * 1000 + \
+                    max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
+    elif not hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # 2 pair (must be w/o joker)
+        category = 'two pair'
+        p1 = countToRank[2][0]
+        p2 = countToRank[2][1]
+        score = 30000 +  \
+                    max(rankWeight[p1] * 1000 + rankWeight[p2] * 100,
+                        rankWeight[p2] * 1000 + rankWeight[p1] * 100) + \
+                    rankWeight[countToRank[1][0]] * 10
+    elif not hasJoker and len(rankToCount) == 4: # 1 pair (must be w/o joker)
+        category = 'one pair'
+        p = countToRank[2][0]
+        score = 20000 + rankWeight[p] * 1000
+        if p == 'A':
+            score += rankWeight['K'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
+        elif p == 'K':
+            score += rankWeight['A'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
+        elif p == 'Q':
+            score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['J']
+        else: # p = 'J'
+            score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['Q']
+    else:
+        print('ops, this one is out of my analysis... %s' % (','.join(cards)))
+    ###
+    return score,category
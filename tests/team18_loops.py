@@ -0,0 +1,605 @@
+"""
+The betting loops of team18 before the state machine, frozen as the oracle of its tests.
+"""
+
+def betting2(name,iQ,rQ,minBet,maxBet,adjustscore,target,hand):
+    """
+    20180524
+    This function implements a random betting strategt.
+    During the betting process, this player gets instructions from iQ (instruction queue)
+    and, if necessary, places responses in rQ (response queue).
+
+    name: player name, a string
+    iQ: the instruction queue. Use "aString = iQ.get()" to get the instruction.
+    rQ: the response queue. Use "rQ.put(aString)" to put the response.
+    minBet: the initial minimum bet of this betting interval.
+    maxBet: the maximum bet of this betting interval.
+    target (new in v1): the target bet. If None (default), a random target is generated.
+
+    Returns: myBet,oppBet,isSetter
+        myBet/oppBet is the amount of money, excluding ante, that this player/the opponent
+        has placed in the pot.
+        If myBet > oppBet, the opponent has folded.
+        If myBet < oppBet, this player has folded.
+        If myBet == oppBet, there are two cases.
+            Case I: myBet == 0
+                Both players checked.
+            Case II: myBet > 0
+                Bet agreed. If isSetter is True, this player is the one who sets the bet, i.e.,
+                the opponent "calls." Otherwise, the opponent is the one who sets the bet.
+    """
+
+    oppChecked = False # True/False if the opponent has/hasn't checked.
+    checked = False # True/False if this player has/hasn't checked.
+    myBet = 0 # The bet, excluding ante, that this player has placed in the pot.
+    oppBet = 0 # The bet, excluding ante, that the opponent has placed in the pot.
+    isSetter = None # True/False if this player/the opponent sets the agreed bet. 誰是下注下到別人需要跟注的一方
+
+    #拿到two pairs and one pairs要下注的方法
+    while adjustscore == 0:                              
+        instruction = iQ.get()
+        if instruction == 'action:bet,check':
+            checked = True
+            rQ.put('check')
+            if oppChecked: # both check, end betting
+                break
+        elif instruction == 'action:raise,call,fold': 
+            rQ.put('fold')
+            break 
+        elif instruction == 'action:call,fold':
+            rQ.put('fold')
+            break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        
+    #拿到5 cards 時，第一輪要下注的方法
+    while adjustscore > 0.7 and maxBet == 15: #maxBet == 15代表是第一輪下注
+        instruction = iQ.get()
+        if instruction == 'action:bet,check': #第一輪下注，而且是從你開始下注
+            myBet = target #Target函數先計算每一種牌型要下注的金額然後匯入的target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #第一輪下注，對手先下注，而且下注的金額不到max(15元)，問你要有什麼反應
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一輪下注，對手先下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet #第一輪下注，你先check，對手下注，那會繼續進行這個while迴圈
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise #第一輪下注，你先下注一個金額，對手反raise你，那會繼續進行這個while迴圈
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check': #第一輪下注，你先check，對手也check
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold': #第一輪下注，而且是從你開始下注，對手fold掉
+            break
+        elif instruction == 'opponent call': #第一輪下注，而且是從你開始下注，對手call
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+    
+            
+    #拿到5 cards 時，第二輪要下注的方法
+    while adjustscore > 0.7 and maxBet == 30:
+        instruction = iQ.get()
+        if instruction == 'action:bet,check'  : #第二輪下注
+            myBet = target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+
+    #拿到flush straight 時，第一輪要下注的方法
+    while(0.7>adjustscore>0.66) and maxBet==15:
+        instruction = iQ.get()
+        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
+            myBet = target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+    
+
+    #拿到flush straight 時，第二輪要下注的方法
+    while(0.7>adjustscore>0.66) and maxBet==30:        
+        instruction = iQ.get()
+        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
+            myBet = target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+
+    
+
+    #拿到4cards 時，第一輪要下注的方法
+    while (0.66>adjustscore>0.56) and maxBet==15:
+        instruction = iQ.get()
+        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
+            myBet = target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+    
+
+    #拿到4cards 時，第二輪要下注的方法
+    while 0.66>adjustscore>0.56 and maxBet==30:
+        instruction = iQ.get()
+        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
+            myBet = target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+    
+
+    #拿葫蘆時，第一輪要下注的方法
+    while (0.45<=adjustscore<=0.54) and maxBet==15:
+        instruction = iQ.get()
+        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
+            myBet = target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+    
+
+    #拿到葫蘆 時，第二輪要下注的方法
+    while (0.45<=adjustscore<=0.54) and maxBet==30:
+        instruction = iQ.get()
+        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
+            myBet = target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+
+    
+
+    #拿straight時，第一輪要下注的方法
+    while 0.33<adjustscore<0.4 and maxBet==15:
+        instruction = iQ.get()
+        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
+            myBet = target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+
+    
+
+    #拿到straight時，第二輪要下注的方法
+    while 0.33<adjustscore<0.4 and maxBet==30:
+        instruction = iQ.get()
+        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
+            myBet = target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+
+
+    #拿 3cards 時，第一輪要下注的方法
+    while 0<adjustscore<0.33 and maxBet==15:
+        instruction = iQ.get()
+        if instruction == 'action:bet,check'  : #第一次下注時而且是從你開始下注
+            myBet = target
+            isSetter = True
+            rQ.put('bet %d' % myBet)
+        elif instruction == 'action:raise,call,fold': #對方下注時，而且對方下注還沒到最大上限
+            if target > oppBet: # raise
+                myBet = oppBet
+                myRaise = target-oppBet
+                myBet += myRaise
+                isSetter = True
+                rQ.put('raise %d to be %d' % (myRaise,myBet))
+            elif target == oppBet: # call
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+            else:
+                myBet = oppBet
+                rQ.put('call %d' % oppBet)
+                break
+        elif instruction == 'action:call,fold': # 第一次下注時，對方有下注，還下max
+            if oppBet >= target: # call
+                myBet = oppBet
+                rQ.put('call %d' % myBet)
+                break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+        else:
+            print('%s > unknown instruction: %s' % (name,instruction))
+
+
+    #拿到 3cards 時，第二輪要下注的方法
+    while 0<adjustscore<0.33 and maxBet==30:
+        instruction = iQ.get()
+        if instruction == 'action:bet,check':
+            checked = True
+            rQ.put('check')
+            if oppChecked: # both check, end betting
+                break
+        elif instruction == 'action:raise,call,fold': 
+            rQ.put('fold')
+            break 
+        elif instruction == 'action:call,fold':
+            rQ.put('fold')
+            break
+        elif instruction.startswith('opponent bet'): # the 3rd token is the amount of bet
+            oppBet = int(instruction.split()[2])
+            isSetter = False
+        elif instruction.startswith('opponent raise'): # the 3rd token the amount of raise
+            oppBet = myBet + int(instruction.split()[2])
+            isSetter = False
+        elif instruction == 'opponent check':
+            oppChecked = True
+            if checked:
+                break
+        elif instruction == 'opponent fold':
+            break
+        elif instruction == 'opponent call':
+            oppBet = myBet
+            break
+    return myBet,oppBet,isSetter
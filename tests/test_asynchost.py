@@ -0,0 +1,31 @@
+import asyncio
+import pytest
+import asynchost
+import engine
+import profiler
+from test_engine import directSeats
+
+GAMES = 100
+
+
+
+def asyncSeats(p1='Ref01',p2='team18'):
+    return [asynchost.AsyncSeat.fromModule(p1),asynchost.AsyncSeat.fromModule(p2)]
+
+def test_async_match_deals_like_the_engine():
+    hands = list()
+    engine.Match(directSeats(),GAMES,5,onGame=lambda r: hands.append(tuple(r.hands))).run()
+    records = list()
+    match = asynchost.AsyncMatch(asyncSeats(),GAMES,5,onGame=records.append)
+    balances = asyncio.run(match.runAsync())
+    assert [tuple(r.hands) for r in records] == hands
+    for k in (0,1):
+        assert balances[k] == sum(r.deltas[k] for r in records)
+
+def test_concurrent_table_matches_behave():
+    matches = asyncio.run(asynchost.runMatches([('tablePlayer','Ref01')] * 40,20,seed=2))
+    assert not any(seat.misbehave for match in matches for seat in match.seats)
+
+def test_profile_is_rejected():
+    with pytest.raises(ValueError):
+        asynchost.AsyncMatch(asyncSeats(),GAMES,profile=profiler.MatchProfiler())
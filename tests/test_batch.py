@@ -0,0 +1,27 @@
+import random
+import pytest
+import evaluator
+import utility
+
+numpy = pytest.importorskip('numpy')
+
+
+
+def test_batch_masks_match_scalar():
+    masks = numpy.array(evaluator.HANDS,dtype=numpy.int64)
+    scores,codes = utility.analyzeHand_batch(masks)
+    for mask,score,code in zip(evaluator.HANDS,scores.tolist(),codes.tolist()):
+        assert (score,evaluator.CATEGORIES[code]) == utility.analyzeHand(mask)
+
+def test_batch_card_ids_match_scalar():
+    rng = random.Random(8)
+    ids = numpy.array([rng.sample(range(len(evaluator.CARDS)),5) for _ in range(2000)])
+    scores,codes = utility.analyzeHand_batch(ids)
+    for row,score,code in zip(ids.tolist(),scores.tolist(),codes.tolist()):
+        cards = [evaluator.CARDS[c] for c in row]
+        assert (score,evaluator.CATEGORIES[code]) == utility.analyzeHand(cards)
+
+def test_batch_non_hands():
+    scores,codes = utility.analyzeHand_batch(numpy.array([0,0b1111,evaluator.FULL_MASK]))
+    assert scores.tolist() == [0,0,0]
+    assert codes.tolist() == [-1,-1,-1]
@@ -0,0 +1,21 @@
+import benchmark
+import utility
+
+
+
+def test_dealer_benchmarks_deal_the_same_cards_every_repeat(monkeypatch):
+    dealt = list()
+    Deck = utility.Deck
+    class RecordingDeck(Deck):
+        def dealMask(self,count=1):
+            cards = Deck.dealMask(self,count)
+            dealt.append(cards)
+            return cards
+    monkeypatch.setattr(utility,'Deck',RecordingDeck)
+    for name,bench in benchmark.benchDealer():
+        runs = list()
+        for _ in range(2):
+            del dealt[:]
+            bench(20)
+            runs.append(list(dealt))
+        assert runs[0] == runs[1], name
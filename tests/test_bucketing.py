@@ -0,0 +1,73 @@
+import os
+import pytest
+import evaluator
+import bucketing
+import policy
+
+COUNT = 4
+
+
+
+@pytest.fixture
+def cache(tmp_path,monkeypatch):
+    # bucket caches in a private directory, none mapped yet
+    monkeypatch.setattr(bucketing,'BUCKET_FILE',str(tmp_path / 'buckets%d.f17b'))
+    monkeypatch.setattr(bucketing,'_tables',dict())
+    return tmp_path
+
+def header(path):
+    with open(path,'rb') as f:
+        return bucketing.HEADER.unpack(f.read(bucketing.HEADER.size))
+
+def test_build_and_load(cache):
+    path = bucketing.build(COUNT)
+    assert os.listdir(str(cache)) == [os.path.basename(path)] # no temporary file is left
+    assert header(path) == (bucketing.MAGIC,bucketing.VERSION,2,COUNT,len(evaluator.HANDS),bucketing.fingerprint())
+    for phase in bucketing.PHASES:
+        buckets = bucketing.bucketTable(COUNT,phase)
+        assert len(buckets) == len(evaluator.HANDS) and set(buckets) == set(range(COUNT))
+        hand = evaluator.HANDS[100]
+        assert bucketing.bucketOf(hand,phase,COUNT) == buckets[100]
+    values = bucketing.features()[0]
+    pre = bucketing.bucketTable(COUNT,bucketing.PRE)
+    assert values[pre.index(0)] < values[pre.index(COUNT - 1)] # numbered from the weakest
+
+def test_missing_cache_is_built_on_lookup(cache):
+    assert bucketing.bucketOf(evaluator.HANDS[0],bucketing.POST,COUNT) in range(COUNT)
+    assert os.path.exists(bucketing.BUCKET_FILE % COUNT)
+
+def corrupt(path,offset,data):
+    with open(path,'r+b') as f:
+        f.seek(offset)
+        f.write(data)
+
+@pytest.mark.parametrize('damage',['fingerprint','truncated','count'])
+def test_stale_cache_is_rebuilt(cache,damage):
+    path = bucketing.build(COUNT)
+    expected = bucketing.bucketTable(COUNT,bucketing.PRE)
+    bucketing._tables.clear()
+    if damage == 'fingerprint':
+        corrupt(path,12,(bucketing.fingerprint() ^ 1).to_bytes(4,'little'))
+    elif damage == 'truncated':
+        os.truncate(path,bucketing.HEADER.size + 100)
+    else:
+        corrupt(path,6,bytes([COUNT + 1])) # the bucket count
+    with pytest.raises(ValueError):
+        bucketing.load(COUNT,rebuild=False)
+    bucketing.load(COUNT)
+    assert header(path)[-1] == bucketing.fingerprint()
+    assert os.path.getsize(path) == bucketing.HEADER.size + 2 * len(evaluator.HANDS)
+    assert bucketing.bucketTable(COUNT,bucketing.PRE) == expected
+
+def test_fingerprint_follows_the_policy(monkeypatch):
+    original = bucketing.fingerprint()
+    changed = bytearray(policy.table())
+    changed[policy.HEADER.size] ^= 1
+    monkeypatch.setattr(policy,'table',lambda: bytes(changed))
+    assert bucketing.fingerprint() != original
+
+def test_bucket_count_limits(cache):
+    with pytest.raises(ValueError):
+        bucketing.build(256)
+    with pytest.raises(ValueError):
+        bucketing.build(0)
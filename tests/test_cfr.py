@@ -0,0 +1,28 @@
+import pytest
+import evaluator
+
+numpy = pytest.importorskip('numpy')
+import cfr
+
+
+
+@pytest.mark.parametrize('count',[257,300])
+def test_solver_rejects_buckets_that_do_not_fit_a_byte(count):
+    buckets = cfr.scoreBuckets(count)
+    assert max(buckets) > 255
+    with pytest.raises(ValueError):
+        cfr.Solver(buckets,cfr.scoreBuckets(4),deals=1000)
+
+def test_solver_rejects_a_short_table():
+    with pytest.raises(ValueError):
+        cfr.Solver([0] * (len(evaluator.HANDS) - 1),cfr.scoreBuckets(4),deals=1000)
+
+def test_small_solve_writes_a_readable_table(tmp_path):
+    import tablePlayer
+    solver = cfr.Solver(cfr.scoreBuckets(3),cfr.scoreBuckets(3),deals=20000)
+    for _ in range(5):
+        solver.iterate()
+    path = str(tmp_path / 'small.f17s')
+    solver.write(path)
+    table = tablePlayer.StrategyTable(path)
+    assert table.stateOf(evaluator.HANDS[0]) in range(3)
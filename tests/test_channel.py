@@ -0,0 +1,74 @@
+import queue
+import threading
+import time
+import pytest
+import channel
+
+
+
+def test_fifo_order_across_put_and_putMany():
+    c = channel.Channel()
+    c.put(0)
+    c.putMany([1,2,3])
+    c.put(4)
+    c.putMany([])
+    c.putMany(iter([5,6]))
+    assert [c.get() for _ in range(7)] == list(range(7))
+    assert c.empty()
+
+def test_get_blocks_until_another_thread_puts():
+    c = channel.Channel()
+    got = list()
+    consumer = threading.Thread(target=lambda: got.append(c.get()))
+    consumer.start()
+    time.sleep(0.05)
+    assert not got and consumer.is_alive()
+    c.put('opponent check')
+    consumer.join(5)
+    assert got == ['opponent check']
+
+def test_putMany_wakes_the_consumer_once_for_the_batch():
+    c = channel.Channel(channel.CountingLock())
+    c.wake.count = 0
+    got = list()
+    def consume():
+        for _ in range(3):
+            got.append(c.get())
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    while not c.waiting:
+        time.sleep(0.001)
+    c.putMany(['first','ante 5','cards J,SA,HA,DA,CA'])
+    consumer.join(5)
+    assert got == ['first','ante 5','cards J,SA,HA,DA,CA']
+    assert c.wake.count <= 3 # one park, one release, at most one more acquire of a stale wakeup
+
+def test_get_times_out():
+    c = channel.Channel()
+    start = time.monotonic()
+    with pytest.raises(queue.Empty):
+        c.get(timeout=0.05)
+    assert time.monotonic() - start >= 0.04
+    with pytest.raises(queue.Empty):
+        c.get_nowait()
+    c.put('late')
+    assert c.get(timeout=0.05) == 'late' # a timeout leaves the channel usable
+
+def test_many_producers_lose_nothing():
+    c = channel.Channel()
+    def produce(k):
+        for j in range(1000):
+            c.put((k,j))
+    producers = [threading.Thread(target=produce,args=(k,)) for k in range(4)]
+    for producer in producers:
+        producer.start()
+    got = [c.get(timeout=5) for _ in range(4000)]
+    for producer in producers:
+        producer.join()
+    for k in range(4):
+        assert [j for kk,j in got if kk == k] == list(range(1000))
+
+def test_channel_cuts_the_lock_traffic():
+    results = channel.benchmark(gameCount=300)
+    queueCalls,channelCalls = results['queue'][0],results['channel'][0]
+    assert queueCalls / channelCalls >= 5 # about 97 against 10 per game
@@ -0,0 +1,54 @@
+import random
+import evaluator
+import utility
+
+
+
+def dealAll(deck,sizes=(5,5,3,4)):
+    return [deck.dealMask(size) for size in sizes]
+
+def maskOfIds(deck):
+    mask = 0
+    for card in deck.ids[:deck.count]:
+        mask |= 1 << card
+    return mask
+
+def test_seeded_decks_deal_the_same_cards():
+    assert dealAll(utility.Deck(seed=11)) == dealAll(utility.Deck(seed=11))
+    assert dealAll(utility.Deck(rng=random.Random(11))) == dealAll(utility.Deck(seed=11))
+    assert dealAll(utility.Deck(seed=11)) != dealAll(utility.Deck(seed=12))
+
+def test_order_is_dealt_exactly():
+    order = utility.dealOrder(random.Random(3))
+    assert sorted(order) == list(range(len(evaluator.CARDS)))
+    deck = utility.Deck(rng=random.Random(99),order=order)
+    dealt = [deck.dealMask() for _ in range(len(order))]
+    assert dealt == [1 << card for card in order]
+    deck = utility.Deck(order=order)
+    assert deck.dealMask(5) == sum(1 << card for card in order[:5])
+    assert deck.dealMask(3) == sum(1 << card for card in order[5:8])
+
+def test_no_card_is_dealt_twice_and_an_empty_deck_deals_none():
+    for seed in range(20):
+        deck = utility.Deck(seed=seed)
+        seen = 0
+        for size in (5,5,4,3):
+            cards = deck.dealMask(size)
+            assert evaluator.cardCount(cards) == size
+            assert cards & seen == 0
+            seen |= cards
+            assert deck.mask == maskOfIds(deck) == evaluator.FULL_MASK & ~seen
+            assert deck.size() == len(evaluator.CARDS) - evaluator.cardCount(seen)
+        assert seen == evaluator.FULL_MASK
+        assert deck.dealMask() is None and deck.deal() is None
+        assert deck.mask == 0
+
+def test_a_short_deck_refuses_a_bigger_deal():
+    deck = utility.Deck(seed=1)
+    deck.dealMask(15)
+    assert deck.dealMask(3) is None
+    assert deck.size() == 2 and evaluator.cardCount(deck.mask) == 2 # nothing was dealt
+    assert deck.cards == set(evaluator.maskToCards(deck.mask))
+    remaining = deck.mask
+    assert evaluator.cardsToMask(deck.deal(2)) == remaining
+    assert deck.size() == 0
@@ -0,0 +1,77 @@
+from itertools import combinations
+import pytest
+import evaluator
+import discard
+import baseline
+
+BASELINE = dict((sum(evaluator.CARD_BIT[card] for card in cards),baseline.analyzeHand(cards)[0])
+                for cards in combinations(evaluator.CARDS,5)) # mask -> score of the baseline grading
+HANDS = [evaluator.cardsToMask(cards) for cards in (['SA','HA','DK','CQ','SJ'],['J','SA','SK','HQ','DJ'],
+                                                      ['SA','HA','DA','CK','SQ'],['SK','HQ','DJ','CA','SJ'])]
+
+
+
+def cardsOf(mask):
+    return [1 << c for c in range(len(evaluator.CARDS)) if mask >> c & 1]
+
+def draws(unseen,count):
+    return [sum(combo) for combo in combinations(cardsOf(unseen),count)]
+
+def bruteScore(hand,change,dead=0):
+    keep = hand & ~change
+    finals = [keep | draw for draw in draws(evaluator.FULL_MASK & ~hand & ~dead,evaluator.cardCount(change))]
+    return sum(BASELINE[final] for final in finals) / len(finals)
+
+def bruteEquity(hand,change,dead=0):
+    keep = hand & ~change
+    total = 0.0
+    finals = draws(evaluator.FULL_MASK & ~hand & ~dead,evaluator.cardCount(change))
+    for draw in finals:
+        final = keep | draw
+        mine = BASELINE[final]
+        opponents = draws(evaluator.FULL_MASK & ~final & ~dead & ~change,5)
+        share = sum(1.0 if mine > BASELINE[o] else 0.5 if mine == BASELINE[o] else 0.0 for o in opponents)
+        total += share / len(opponents)
+    return total / len(finals)
+
+@pytest.mark.parametrize('hand',HANDS)
+def test_score_values_match_brute_force(hand):
+    values = discard.discardValues(hand,0,discard.SCORE)
+    assert len(values) == 32
+    for change,value in values:
+        assert value == pytest.approx(bruteScore(hand,change))
+    assert [value for _,value in values] == sorted((value for _,value in values),reverse=True)
+
+def test_score_values_with_dead_cards():
+    hand = HANDS[1]
+    dead = evaluator.cardsToMask(['CA','DA'])
+    for change,value in discard.discardValues(hand,dead,discard.SCORE):
+        assert value == pytest.approx(bruteScore(hand,change,dead))
+
+@pytest.mark.parametrize('hand',HANDS[:2])
+def test_equity_values_match_brute_force(hand):
+    values = dict(discard.discardValues(hand,0,discard.EQUITY))
+    best,_ = discard.bestDiscard(hand,5,0,discard.EQUITY)
+    for change in set([0,best] + cardsOf(hand)[:2]): # the full check of 32 discards takes too long
+        assert values[change] == pytest.approx(bruteEquity(hand,change))
+
+def test_best_discard_respects_maxChange():
+    for hand in HANDS:
+        values = discard.discardValues(hand)
+        for maxChange in range(6):
+            change,value = discard.bestDiscard(hand,maxChange)
+            assert evaluator.cardCount(change) <= maxChange
+            assert value == max(v for c,v in values if evaluator.cardCount(c) <= maxChange)
+            assert discard.bestDiscardMask(hand,maxChange) == change
+
+def test_cache_clears_at_its_limit(monkeypatch):
+    monkeypatch.setattr(discard,'_CACHE',dict())
+    monkeypatch.setattr(discard,'_BEST',dict())
+    monkeypatch.setattr(discard,'CACHE_LIMIT',3)
+    for hand in HANDS[:3]:
+        discard.bestDiscard(hand)
+    assert len(discard._CACHE) == 3 and len(discard._BEST) == 3
+    discard.bestDiscard(HANDS[3])
+    assert list(discard._CACHE) == [(HANDS[3],0,discard.SCORE)]
+    assert list(discard._BEST) == [(HANDS[3],5,0,discard.SCORE)]
+    assert discard.bestDiscard(HANDS[0]) == max(discard.discardValues(HANDS[0]),key=lambda item: item[1])
@@ -0,0 +1,158 @@
+import io
+import pytest
+import threading
+import engine
+import utility
+import Ref01
+
+GAMES = 300
+SEED = 4
+
+
+
+def playRecords(seats,gameCount=GAMES,seed=SEED,**options):
+    records = list()
+    match = engine.Match(seats,gameCount,seed,onGame=lambda r: records.append(
+        (r.index,r.starter,r.outcome,tuple(r.hands),tuple(r.finals),r.bet1,r.bet2,tuple(r.deltas))),**options)
+    balances = match.run()
+    for seat in seats:
+        player = getattr(seat,'player',None)
+        if player is not None and not seat.dead: # a stopped player is never told the match is over
+            player.join()
+    return records,balances
+
+def directSeats(p1='Ref01',p2='team18'):
+    return [engine.DirectSeat.fromModule(p1),engine.DirectSeat.fromModule(p2)]
+
+def test_direct_and_queue_seats_play_the_same_games():
+    direct = playRecords(directSeats())
+    queued = playRecords([engine.QueueSeat.fromModule('Ref01',GAMES),engine.QueueSeat.fromModule('team18',GAMES)])
+    assert direct == queued
+    assert len(direct[0]) == GAMES
+
+def test_seeded_match_is_reproducible():
+    assert playRecords(directSeats()) == playRecords(directSeats())
+
+def test_balances_add_up():
+    records,balances = playRecords(directSeats())
+    for k in (0,1):
+        assert balances[k] == sum(record[-1][k] for record in records)
+    for record in records:
+        assert record[-1][0] + record[-1][1] <= 0 # the host keeps part of the antes, never pays out
+
+def test_misbehaving_seat_is_taken_as_check_or_fold():
+    seats = [engine.DirectSeat('broken',lambda state: ('raise',999),lambda hand,maxChange: 0),
+             engine.DirectSeat.fromModule('Ref01')]
+    records,balances = playRecords(seats,50)
+    assert seats[0].misbehave
+    assert len(records) == 50
+
+def test_failing_strategy_is_logged_once_with_its_traceback(monkeypatch):
+    def decideBet(state):
+        raise KeyError('no such row')
+    stream = io.StringIO()
+    monkeypatch.setattr(utility,'logStream',stream)
+    seats = [engine.DirectSeat('broken',decideBet,lambda hand,maxChange: 0),engine.DirectSeat.fromModule('Ref01')]
+    playRecords(seats,50)
+    text = stream.getvalue()
+    assert seats[0].misbehave
+    assert text.count('later exceptions are not logged') == 1
+    assert 'Traceback' in text and "KeyError: 'no such row'" in text
+
+def slowPlayer(delayed):
+    # Ref01, except that it answers the first action only after the host has given up on it
+    release = threading.Event()
+    player = utility.Player('Ref01',GAMES)
+    class LateQueue:
+        def __init__(self,queue):
+            self.queue = queue
+            self.lines = 0
+        def put(self,text):
+            self.lines += 1
+            if self.lines == 2: # the greeting goes out in time, the first answer does not
+                release.wait()
+            self.queue.put(text)
+    def play(gameCount,iQ,rQ):
+        Ref01.play(gameCount,iQ,LateQueue(rQ) if delayed else rQ)
+    def silent(gameCount,iQ,rQ):
+        release.wait()
+    player.play = play if delayed else silent
+    return player,release
+
+def test_late_player_is_stopped(monkeypatch):
+    monkeypatch.setattr(utility,'logStream',io.StringIO())
+    player,release = slowPlayer(True)
+    seat = engine.QueueSeat(player,timeout=0.2)
+    def decideBet(state):
+        return ('check',0) if state.options == engine.BET_CHECK else ('call',0)
+    seats = [seat,engine.DirectSeat('caller',decideBet,lambda hand,maxChange: 0)]
+    try:
+        records,balances = playRecords(seats,20)
+    finally:
+        release.set()
+    assert seat.dead and seat.misbehave
+    assert len(records) == 20
+    assert seat.player.rQ.qsize() <= 1 # the late answer is never taken as a later one
+
+def test_player_that_never_greets_does_not_hang_the_host(monkeypatch):
+    monkeypatch.setattr(utility,'logStream',io.StringIO())
+    player,release = slowPlayer(False)
+    seat = engine.QueueSeat(player,timeout=0.2)
+    try:
+        match = engine.Match([seat,engine.DirectSeat.fromModule('team18')],10,1)
+        match.run()
+    finally:
+        release.set()
+    assert seat.dead and seat.misbehave
+
+def duplicateRecords(seats,gameCount=100,seed=SEED):
+    records = list()
+    match = engine.Match(seats,gameCount,seed,duplicate=True,onGame=records.append)
+    match.run()
+    return match,records
+
+def test_duplicate_pairs_play_mirrored_deals():
+    match,records = duplicateRecords(directSeats())
+    for one,two in zip(records[0::2],records[1::2]):
+        assert (one.starter,two.starter) == (0,1) # the seats swap
+        assert tuple(two.hands) == tuple(reversed(one.hands))
+    assert len(set(tuple(record.hands) for record in records[0::2])) > 1 # a new deal for every pair
+
+def test_a_mirrored_pair_of_one_strategy_cancels_out():
+    # the same deterministic strategy on both seats plays each pair's second game as the mirror of the first
+    match,records = duplicateRecords(directSeats('team18','team18'))
+    for one,two in zip(records[0::2],records[1::2]):
+        assert tuple(two.finals) == tuple(reversed(one.finals))
+        assert tuple(two.deltas) == tuple(reversed(one.deltas))
+    assert match.pairedEdge() == (0.0,0.0)
+
+def test_edges_follow_the_game_deltas():
+    match,records = duplicateRecords(directSeats())
+    edges = [record.deltas[0] - record.deltas[1] for record in records]
+    pairs = [edges[k] + edges[k+1] for k in range(0,len(edges),2)]
+    for stats,samples in ((match.edgeStats,edges),(match.pairStats,pairs)):
+        assert stats == [len(samples),sum(samples),sum(x * x for x in samples)]
+    mean,half = engine.confidenceInterval(match.pairStats)
+    assert match.pairedEdge() == (mean / 2,half / 2)
+
+def test_confidence_interval_of_a_known_sample():
+    stats = [0,0,0]
+    for x in (1,2,3,4):
+        engine._accumulate(stats,x)
+    mean,half = engine.confidenceInterval(stats)
+    assert mean == 2.5
+    assert abs(half - 1.96 * (5 / 3 / 4) ** 0.5) < 1e-12 # sample variance 5/3
+    assert engine.confidenceInterval(stats,z=1.0)[1] == pytest.approx(half / 1.96)
+    assert engine.confidenceInterval([0,0,0]) == (0.0,float('inf'))
+    assert engine.confidenceInterval([1,7,49]) == (7.0,float('inf'))
+    assert engine.confidenceInterval([3,6,12]) == (2.0,0.0) # no spread
+
+def test_adapted_strategies_play_like_direct_seats():
+    # both players' decideBet and changeMask behind the queue protocol, through engine.strategyPlay
+    seats = list()
+    for source in ('Ref01','team18'):
+        player = utility.Player(source,GAMES)
+        module = __import__(source)
+        player.play = engine.strategyPlay(module.name,module.decideBet,module.changeMask)
+        seats.append(engine.QueueSeat(player))
+    assert playRecords(seats) == playRecords(directSeats())
@@ -0,0 +1,60 @@
+import random
+from itertools import combinations
+import pytest
+import evaluator
+import equity
+import baseline
+
+
+
+def bruteCounts(hand,dead=0):
+    score = baseline.analyzeHand(evaluator.maskToCards(hand))[0]
+    left = [card for card in evaluator.CARDS if not evaluator.CARD_BIT[card] & (hand | dead)]
+    win = tie = lose = 0
+    for cards in combinations(left,5):
+        other = baseline.analyzeHand(cards)[0]
+        if score > other:
+            win += 1
+        elif score == other:
+            tie += 1
+        else:
+            lose += 1
+    return win,tie,lose
+
+def sampleHands(count=12,seed=5):
+    rng = random.Random(seed)
+    return [evaluator.cardsToMask(cards) for cards in (['J','SA','HA','DA','CA'],['SA','SK','SQ','SJ','J'])] + \
+        rng.sample(evaluator.HANDS,count)
+
+@pytest.mark.parametrize('hand',sampleHands())
+def test_counts_match_brute_force(hand):
+    assert equity.equityCounts(hand) == bruteCounts(hand)
+    assert sum(equity.equityCounts(hand)) == 792
+
+@pytest.mark.parametrize('hand',sampleHands(6,9))
+def test_counts_with_dead_cards_match_brute_force(hand):
+    rng = random.Random(hand)
+    dead = sum(rng.sample([1 << c for c in range(len(evaluator.CARDS)) if not hand >> c & 1],3))
+    assert equity.equityCounts(hand,dead) == bruteCounts(hand,dead)
+    pWin,pTie,pLose = equity.equity(hand,dead)
+    assert abs(pWin + pTie + pLose - 1) < 1e-12
+
+def test_python_and_numpy_counts_agree():
+    if equity.numpy is None:
+        pytest.skip('needs NumPy')
+    for hand in sampleHands():
+        known = hand | (evaluator.CARD_BIT['J'] if not hand & evaluator.CARD_BIT['J'] else 0)
+        assert equity._countPython(evaluator.analyzeMask(hand)[0],known) == \
+            equity._countNumpy(evaluator.analyzeMask(hand)[0],known)
+
+def test_too_many_dead_cards():
+    hand = evaluator.HANDS[0]
+    dead = evaluator.FULL_MASK & ~hand
+    for card in range(len(evaluator.CARDS)):
+        if dead >> card & 1 and evaluator.cardCount(dead) > 11:
+            dead &= ~(1 << card)
+    assert evaluator.cardCount(dead) == 11
+    with pytest.raises(ValueError):
+        equity.equity(hand,dead)
+    with pytest.raises(ValueError):
+        equity.winShare(hand,dead)
@@ -0,0 +1,53 @@
+import evaluator
+import utility
+import baseline
+
+
+
+def handCards(mask):
+    return [evaluator.CARDS[c] for c in range(len(evaluator.CARDS)) if mask >> c & 1]
+
+def test_every_hand_matches_baseline():
+    assert len(evaluator.HANDS) == 6188
+    for mask in evaluator.HANDS:
+        cards = handCards(mask)
+        expected = baseline.analyzeHand(cards)
+        assert evaluator.analyzeHand(cards) == expected, cards
+        assert evaluator.analyzeHand(set(cards)) == expected, cards
+        assert evaluator.analyzeHand(mask) == expected, cards
+        assert evaluator.analyzeMask(mask) == expected, cards
+        assert utility.analyzeHand(cards) == expected, cards
+
+def test_fate17Hand_matches_baseline():
+    for mask in evaluator.HANDS[::7]:
+        cards = handCards(mask)
+        hand = utility.Fate17Hand(cards)
+        hand.analyze()
+        assert (hand.getScore(),hand.type) == baseline.analyzeHand(cards), cards
+
+def test_tables_are_consistent():
+    for k,mask in enumerate(evaluator.HANDS):
+        assert evaluator.HAND_INDEX[mask] == k
+        score,category = baseline.analyzeHand(handCards(mask))
+        assert evaluator.SCORES[k] == score
+        assert evaluator.CATEGORIES[evaluator.CATEGORY_CODES[k]] == category
+
+def test_card_encoding_round_trip():
+    for mask in evaluator.HANDS[::13]:
+        assert evaluator.cardsToMask(handCards(mask)) == mask
+        assert evaluator.stringToMask(evaluator.maskToString(mask)) == mask
+        assert evaluator.cardCount(mask) == 5
+
+def test_non_hands_grade_as_baseline_fallthrough():
+    for cards in (['SA','HA','DK','CQ'],['SA','HA','DK','CQ','J','SK'],['SA','SA','DK','CQ','J'],['SA','HA','DK','CQ','XX']):
+        assert evaluator.analyzeHand(cards) == (0,None), cards
+    for mask in (0,0b1111,0b111111,evaluator.FULL_MASK,evaluator.FULL_MASK + 1,-1):
+        assert evaluator.analyzeHand(mask) == (0,None), mask
+        assert evaluator.analyzeMask(mask) == (0,None), mask
+    assert baseline.analyzeHand(['SA','HA','DK','CQ']) == (0,None)
+
+def test_changeMask_survives_non_hands():
+    import Ref01
+    import team18
+    for module in (Ref01,team18):
+        assert module.changeMask(0b1111,5) == 0
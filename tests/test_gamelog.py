@@ -0,0 +1,77 @@
+import os
+import pytest
+import engine
+import gamelog
+
+
+
+def playLogged(path,instructions,gameCount=200,seed=6):
+    records = list()
+    seats = [engine.DirectSeat.fromModule('Ref01'),engine.DirectSeat.fromModule('team18')]
+    with gamelog.GameLogWriter(path,instructions=instructions,bufferSize=512) as writer:
+        def onGame(record):
+            records.append(record)
+            writer.write(record)
+        engine.Match(seats,gameCount,seed,onGame=onGame,trace=writer.trace).run()
+    return records
+
+def sameGame(game,record):
+    return (game.index == record.index and game.starter == record.starter and game.outcome == record.outcome
+            and game.winner == record.winner and game.folder == record.folder
+            and game.hands == tuple(record.hands) and game.finals == tuple(record.finals)
+            and game.discards == tuple(record.discards) and game.bet1 == record.bet1 and game.bet2 == record.bet2
+            and game.deltas == tuple(record.deltas))
+
+def test_games_round_trip(tmp_path):
+    path = str(tmp_path / 'games.f17')
+    records = playLogged(path,False)
+    log = gamelog.GameLog(path)
+    try:
+        assert len(log) == len(records)
+        for game,record in zip(log,records):
+            assert sameGame(game,record)
+        assert sameGame(log[-1],records[-1])
+        assert log.instructions(0) == []
+    finally:
+        log.close()
+
+def test_append_continues_the_log(tmp_path):
+    path = str(tmp_path / 'games.f17')
+    first = playLogged(path,False,100,1)
+    second = playLogged(path,False,100,2)
+    log = gamelog.GameLog(path)
+    try:
+        assert len(log) == 200
+        assert sameGame(log[100],second[0])
+        assert sameGame(log[99],first[-1])
+    finally:
+        log.close()
+
+def test_instructions_round_trip(tmp_path):
+    path = str(tmp_path / 'games.f17')
+    traced = list()
+    seats = [engine.DirectSeat.fromModule('Ref01'),engine.DirectSeat.fromModule('team18')]
+    with gamelog.GameLogWriter(path,instructions=True) as writer:
+        def trace(seat,kind,value):
+            traced.append((seat,kind,value or 0))
+            writer.trace(seat,kind,value)
+        engine.Match(seats,50,3,onGame=writer.write,trace=trace).run()
+    log = gamelog.GameLog(path)
+    try:
+        logged = [entry for k in range(len(log)) for entry in log.instructions(k)]
+    finally:
+        log.close()
+    assert logged == traced
+
+def test_missing_sidecar_keeps_the_games_readable(tmp_path):
+    path = str(tmp_path / 'games.f17')
+    records = playLogged(path,True,50)
+    os.remove(path + '.ins')
+    log = gamelog.GameLog(path)
+    try:
+        assert len(log) == 50
+        assert sameGame(log[7],records[7])
+        with pytest.raises(FileNotFoundError,match='games.f17.ins'):
+            log.instructions(7)
+    finally:
+        log.close()
@@ -0,0 +1,67 @@
+import random
+import pytest
+import evaluator
+import equity
+import policy
+
+numpy = pytest.importorskip('numpy')
+import handRange
+
+
+
+def deals(count=10,seed=3):
+    rng = random.Random(seed)
+    return [rng.sample(evaluator.HANDS,1)[0] for _ in range(count)]
+
+def cardsOf(mask):
+    return [1 << c for c in range(len(evaluator.CARDS)) if mask >> c & 1]
+
+@pytest.fixture(scope='module')
+def hr():
+    return handRange.HandRange()
+
+def normalized(hr):
+    hands,weights = hr.probabilities()
+    return abs(weights.sum() - 1) < 1e-9 and (weights >= 0).all()
+
+@pytest.mark.parametrize('hand',deals())
+def test_fresh_range_matches_uniform_equity(hr,hand):
+    hr.reset(hand)
+    hands,weights = hr.probabilities()
+    assert len(hands) == 792 and not (hands & hand).any()
+    assert normalized(hr)
+    assert hr.equity(hand) == pytest.approx(equity.equity(hand),abs=1e-9)
+
+@pytest.mark.parametrize('hand',deals(5,8))
+def test_removal_rules_out_the_hands_with_those_cards(hr,hand):
+    hr.reset(hand)
+    removed = sum(cardsOf(evaluator.FULL_MASK & ~hand)[:2])
+    hr.observeRemoval(removed)
+    hands,weights = hr.probabilities()
+    assert (weights[(hands & removed) != 0] == 0).all()
+    assert (weights[(hands & removed) == 0] > 0).all()
+    assert normalized(hr)
+    assert hr.equity(hand) == pytest.approx(equity.equity(hand,removed),abs=1e-9)
+
+@pytest.mark.parametrize('hand',deals(6,11))
+def test_weights_stay_normalized_through_a_game(hr,hand):
+    rng = random.Random(hand)
+    hr.reset(hand)
+    myDiscard = policy.policyDiscard(hand,5)
+    unseen = cardsOf(evaluator.FULL_MASK & ~hand)
+    mine = sum(rng.sample(unseen,evaluator.cardCount(myDiscard)))
+    for step in (lambda: hr.observeBet(10,5,15),lambda: hr.observeBet(0,5,15),lambda: hr.observeRemoval(mine),
+                 lambda: hr.observeChange(rng.randrange(6),7 - evaluator.cardCount(myDiscard)),
+                 lambda: hr.observeBet(30,10,30)):
+        step()
+        assert normalized(hr)
+    final = (hand & ~myDiscard) | mine
+    pWin,pTie,pLose = hr.equity(final)
+    assert min(pWin,pTie,pLose) >= 0 and abs(pWin + pTie + pLose - 1) < 1e-9
+
+def test_evidence_that_rules_out_everything_is_ignored(hr):
+    hand = deals(1)[0]
+    hr.reset(hand)
+    before = hr.probabilities()[1].copy()
+    hr.observeRemoval(evaluator.FULL_MASK & ~hand) # every card the opponent could hold
+    assert (hr.probabilities()[1] == before).all()
@@ -0,0 +1,60 @@
+import random
+import pytest
+import engine
+import latency
+import protocol
+
+numpy = pytest.importorskip('numpy')
+
+ERROR = 1 / latency.SUB_COUNT # the relative width of a bucket
+
+
+
+def sample(count=100000,seed=7):
+    rng = random.Random(seed)
+    values = [int(rng.lognormvariate(11,1.5)) for _ in range(count)] # about 60 us, with a long tail
+    values += [rng.randrange(latency.EXACT) for _ in range(count // 100)] # and some exact small ones
+    return values
+
+def histogramOf(values):
+    histogram = latency.Histogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+@pytest.mark.parametrize('q',[0.01,0.25,0.5,0.9,0.99,0.999,1.0])
+def test_quantiles_match_numpy_within_a_bucket(q):
+    values = sample()
+    exact = float(numpy.percentile(values,q * 100,method='inverted_cdf'))
+    value = histogramOf(values).quantile(q)
+    assert exact <= value <= exact * (1 + ERROR) + 1
+
+def test_bucket_bounds():
+    for value in list(range(1000)) + [random.Random(k).randrange(1 << 45) for k in range(2000)]:
+        index = latency.bucketIndex(value)
+        assert value <= latency.bucketValue(index) <= max(value,value * (1 + ERROR))
+        assert index == 0 or latency.bucketValue(index - 1) < value
+    assert latency.bucketIndex(1 << 60) == latency.BUCKET_COUNT - 1
+
+def test_merge_adds_the_counts():
+    values = sample(20000)
+    one,two = histogramOf(values[::2]),histogramOf(values[1::2])
+    one.merge(two)
+    whole = histogramOf(values)
+    assert one.counts == whole.counts and one.count == whole.count and one.max == whole.max
+    assert one.mean() == pytest.approx(numpy.mean(values))
+
+def test_flags_at_the_timeout_fraction():
+    recorder = latency.LatencyRecorder(['slow','fast'],timeout=1)
+    limit = int(1e9 * latency.WARN_FRACTION)
+    state = engine.SeatState()
+    state.options = protocol.BET_CHECK
+    for k in range(1000):
+        recorder.record(0,state,limit if k >= 995 else 1000) # only the p999 reaches the limit
+        recorder.record(1,state,limit // 2) # half the limit: never flagged
+    assert recorder.flags() == [(0,latency.INTERVAL1,protocol.BET_CHECK,0.999,limit)]
+    assert '!! slow' in recorder.summary() and '!! fast' not in recorder.summary()
+    below = latency.LatencyRecorder(timeout=1)
+    for k in range(1000):
+        below.record(0,state,limit - 1)
+    assert below.flags() == []
@@ -0,0 +1,64 @@
+import io
+import os
+import sys
+import subprocess
+import pytest
+import utility
+
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    # a private log setting: restored, with the environment, after the test
+    stream = io.StringIO()
+    monkeypatch.setattr(utility,'logLevel',utility.INFO)
+    monkeypatch.setattr(utility,'logEvery',1)
+    monkeypatch.setattr(utility,'logStream',stream)
+    monkeypatch.delenv(utility.LOG_ENV,raising=False)
+    return stream
+
+def test_default_level_keeps_plain_log_calls():
+    env = dict((key,value) for key,value in os.environ.items() if key != utility.LOG_ENV)
+    output = subprocess.run([sys.executable,'-c','import utility; print(utility.logLevel)'],env=env,
+                            cwd=os.path.dirname(os.path.abspath(utility.__file__)),capture_output=True,text=True).stdout
+    assert int(output) == utility.INFO
+
+def test_level_filtering(logged):
+    class Loud:
+        def __str__(self):
+            raise AssertionError('formatted while the level is off')
+    utility.log('host','shown %d',1)
+    utility.log('host','hidden %s',Loud(),level=utility.DEBUG)
+    utility.log('host','also shown',level=utility.WARNING)
+    assert logged.getvalue() == '### host log > shown 1\n### host warning > also shown\n'
+    utility.configureLogging(utility.QUIET)
+    utility.log('host','nothing',level=utility.ERROR)
+    assert logged.getvalue().count('\n') == 2
+
+def test_sampling(logged):
+    assert all(utility.logSampled(k) for k in range(1,20))
+    utility.configureLogging(every=10)
+    assert [k for k in range(1,40) if utility.logSampled(k)] == [1,11,21,31]
+    utility.configureLogging(every=0) # taken as 1
+    assert utility.logEvery == 1
+
+def test_configure_exports_the_setting(logged):
+    utility.configureLogging('debug',1000)
+    assert utility.logLevel == utility.DEBUG and utility.logEvery == 1000
+    assert os.environ[utility.LOG_ENV] == 'debug:1000'
+    utility.configureLogging(utility.ERROR)
+    assert os.environ[utility.LOG_ENV] == 'error:1000'
+
+@pytest.mark.parametrize('setting,level,every',[('quiet',utility.QUIET,1),('debug:1000',utility.DEBUG,1000),
+                                                (' Warning ',utility.WARNING,1),('info:5',utility.INFO,5)])
+def test_environment_setting(logged,monkeypatch,setting,level,every):
+    monkeypatch.setenv(utility.LOG_ENV,setting)
+    utility._loggingFromEnvironment()
+    assert (utility.logLevel,utility.logEvery) == (level,every)
+
+@pytest.mark.parametrize('setting',['loud','debug:many'])
+def test_bad_environment_setting_is_a_warning(logged,monkeypatch,setting):
+    monkeypatch.setenv(utility.LOG_ENV,setting)
+    utility._loggingFromEnvironment()
+    assert utility.logLevel == utility.INFO
+    assert logged.getvalue() == "### utility warning > bad %s setting %r\n" % (utility.LOG_ENV,setting)
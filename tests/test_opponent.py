@@ -0,0 +1,45 @@
+import functools
+import engine
+import evaluator
+import opponent
+import protocol
+from test_engine import playRecords
+
+GAMES = 300
+
+
+
+def tappedSeat(source,model):
+    seat = engine.QueueSeat.fromModule(source,GAMES)
+    seat.player.play = functools.partial(seat.player.play,model=model)
+    return seat
+
+def test_tap_is_opt_in_and_does_not_change_the_games():
+    models = (opponent.OpponentModel(),opponent.OpponentModel())
+    plain = playRecords([engine.QueueSeat.fromModule('Ref01',GAMES),engine.QueueSeat.fromModule('team18',GAMES)])
+    tapped = playRecords([tappedSeat('Ref01',models[0]),tappedSeat('team18',models[1])])
+    assert plain == tapped
+    records = plain[0]
+    showdowns = sum(1 for record in records if record[2] == engine.SHOWDOWN)
+    for model in models:
+        assert model.games == GAMES
+        assert model.showdowns == showdowns
+        assert model.ignored == 0
+        assert sum(sum(sum(row) for row in byChange) for byChange in model.strength) == showdowns
+
+def test_malformed_reveal_is_ignored():
+    model = opponent.OpponentModel()
+    for text in ('first','opponent change 2 cards','opponent cards HA,HA,CA,SA,HJ','opponent cards HA,DA'):
+        message = protocol.parseInstruction(text)
+        model.observe(message.kind,message.value)
+    assert model.ignored == 2 and model.showdowns == 0
+    message = protocol.parseInstruction('opponent cards HA,DA,CA,SA,HJ')
+    model.observe(message.kind,message.value)
+    code = evaluator.CATEGORY_CODES[evaluator.HAND_INDEX[message.value]]
+    assert model.showdowns == 1 and model.strength[2][0][code] == 1
+
+def test_range_estimate_is_a_distribution():
+    estimate = opponent.OpponentModel().rangeEstimate(3,True)
+    assert len(estimate) == opponent.CATEGORY_COUNT
+    assert abs(sum(estimate) - 1) < 1e-9
+    assert all(abs(p - base) < 1e-9 for p,base in zip(estimate,opponent.BASE))
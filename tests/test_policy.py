@@ -0,0 +1,31 @@
+import random
+import evaluator
+import discard
+import policy
+
+
+
+def sampleHands(count,seed=7):
+    return random.Random(seed).sample(evaluator.HANDS,count)
+
+def test_policy_table_matches_solver():
+    objective = policy.objective()
+    for hand in sampleHands(25):
+        for maxChange in range(policy.CHANGE_COUNT):
+            assert policy.policyDiscard(hand,maxChange) == discard.bestDiscardMask(hand,maxChange,0,objective), \
+                (evaluator.maskToString(hand),maxChange)
+
+def test_policy_discards_are_legal():
+    for hand in evaluator.HANDS:
+        for maxChange in range(policy.CHANGE_COUNT):
+            selected = policy.policyDiscard(hand,maxChange)
+            assert selected & ~hand == 0
+            assert evaluator.cardCount(selected) <= maxChange
+    assert policy.policyDiscard(evaluator.HANDS[0],9) == policy.policyDiscard(evaluator.HANDS[0],5)
+
+def test_relative_masks_round_trip():
+    for hand in sampleHands(200):
+        for sub in discard.subsets(hand):
+            rel = policy.toRelative(hand,sub)
+            assert 0 <= rel < 32
+            assert policy.fromRelative(hand,rel) == sub
@@ -0,0 +1,40 @@
+import io
+import threading
+import time
+import engine
+import profiler
+import utility
+import Ref01
+
+GAMES = 50
+
+
+
+def test_profiled_match_collects_the_thread_times():
+    phases = profiler.MatchProfiler()
+    seats = [engine.QueueSeat.fromModule('Ref01',GAMES),engine.DirectSeat.fromModule('team18')]
+    engine.Match(seats,GAMES,3,profile=phases).run()
+    phases.finish()
+    assert phases.phases[profiler.INIT].count == GAMES
+    assert phases.times[0].threadCpu is not None and phases.times[1].threadCpu is None
+
+def test_finish_does_not_wait_for_a_hung_player(monkeypatch):
+    release = threading.Event()
+    def hang(gameCount,iQ,rQ):
+        Ref01.play(gameCount,iQ,rQ)
+        release.wait()
+    player = utility.Player('Ref01',GAMES)
+    player.play = hang
+    phases = profiler.MatchProfiler()
+    seats = [engine.QueueSeat(player,timeout=0.2),engine.DirectSeat.fromModule('team18')]
+    engine.Match(seats,GAMES,3,profile=phases).run()
+    stream = io.StringIO()
+    monkeypatch.setattr(utility,'logStream',stream)
+    start = time.perf_counter()
+    try:
+        phases.finish()
+    finally:
+        release.set()
+    assert time.perf_counter() - start < 5
+    assert 'still running' in stream.getvalue()
+    assert phases.times[0].threadCpu is None
@@ -0,0 +1,44 @@
+import random
+import evaluator
+import protocol
+
+
+
+def test_instructions_round_trip():
+    rng = random.Random(12)
+    for kind in range(protocol.UNKNOWN):
+        if kind == protocol.CARDS or kind == protocol.OPP_CARDS:
+            values = [rng.choice(evaluator.HANDS) for _ in range(20)] + [0b111]
+        elif kind in (protocol.OPP_BET,protocol.OPP_RAISE):
+            values = list(range(0,31))
+        elif kind == protocol.OPP_CHANGE:
+            values = list(range(0,6))
+        else:
+            values = [0]
+        for value in values:
+            text = protocol.instructionText(kind,value)
+            message = protocol.parseInstruction(text)
+            assert message == (kind,value), text
+            assert protocol.instructionText(*message) == text
+
+def test_unknown_instructions():
+    for text in ('hello','opponent bet x','cards XX,YY','opponent change many cards',''):
+        message = protocol.parseInstruction(text)
+        assert message.kind == protocol.UNKNOWN
+        assert message.value == text
+        assert protocol.instructionText(*message) == text
+
+def test_responses_round_trip():
+    rng = random.Random(13)
+    responses = [('bet',5),('bet',30),('raise',1),('raise',17),('check',0),('call',0),('fold',0),('change',0)]
+    responses += [('change',rng.choice(evaluator.HANDS) & rng.randrange(1 << 17)) for _ in range(20)]
+    for response in responses:
+        assert protocol.parseResponse(protocol.responseText(response)) == response
+
+def test_player_response_forms():
+    assert protocol.responseText(('raise',3),8) == 'raise 3 to be 8'
+    assert protocol.parseResponse('raise 3 to be 8') == ('raise',3)
+    assert protocol.responseText(('call',0),8) == 'call 8'
+    assert protocol.parseResponse('call 8') == ('call',0)
+    for text in ('','bet','raise x','change XX','dance'):
+        assert protocol.parseResponse(text) is None
@@ -0,0 +1,18 @@
+import pytest
+import sandbox
+from test_engine import GAMES,SEED,playRecords,directSeats
+
+
+
+def test_subprocess_seats_play_the_same_games_as_direct_seats():
+    seats = [sandbox.SubprocessSeat('Ref01',GAMES,seed=SEED),sandbox.SubprocessSeat('team18',GAMES,seed=SEED)]
+    try:
+        sandboxed = playRecords(seats)
+    finally:
+        for seat in seats:
+            seat.kill()
+    assert sandboxed == playRecords(directSeats())
+
+def test_missing_player_does_not_start():
+    with pytest.raises(RuntimeError):
+        sandbox.SubprocessSeat('noSuchPlayerModule',10)
@@ -0,0 +1,32 @@
+import engine
+import tablePlayer
+from test_engine import playRecords,directSeats
+
+GAMES = 200
+
+
+
+def test_direct_and_queue_table_seats_play_the_same_games():
+    direct = playRecords(directSeats('tablePlayer','Ref01'),GAMES)
+    queued = playRecords([engine.QueueSeat.fromModule('tablePlayer',GAMES),engine.QueueSeat.fromModule('Ref01',GAMES)],GAMES)
+    assert direct == queued
+
+def test_contexts_live_on_the_seat_state():
+    # both seats run the same module; each game's history stays with its own state
+    states = list()
+    def decideBet(state):
+        states.append(state)
+        return tablePlayer.decideBet(state)
+    seats = [engine.DirectSeat('a',decideBet,tablePlayer.changeMask),
+             engine.DirectSeat('b',decideBet,tablePlayer.changeMask)]
+    records,_ = playRecords(seats,GAMES)
+    assert records == playRecords(directSeats('tablePlayer','tablePlayer'),GAMES)[0]
+    assert not hasattr(tablePlayer,'_contexts')
+    assert len(set(map(id,states))) == 2
+    assert all(isinstance(state.context,tablePlayer.Context) for state in states)
+
+def test_reset_drops_the_context():
+    state = engine.SeatState()
+    state.context = tablePlayer.Context()
+    state.reset(0,True)
+    assert state.context is None
@@ -0,0 +1,65 @@
+import pytest
+import evaluator
+import protocol
+import team18
+import team18_loops
+
+# Scripted betting intervals: the host's instructions, in order. Each ends the interval for
+# any answer of the player, and never asks 'action:call,fold' below the player's target
+# (the old loops gave no answer there and waited for the next instruction).
+SCRIPTS = {
+    'open, called': ['action:bet,check','opponent call'],
+    'open, folded to': ['action:bet,check','opponent fold'],
+    'open, raised': ['action:bet,check','opponent raise 3','action:raise,call,fold','opponent call'],
+    'answer a bet': ['opponent bet 6','action:raise,call,fold','opponent call'],
+    'answer a check': ['opponent check','action:bet,check','opponent call'], # the folding band checks back
+    'answer the maximum': ['opponent bet %(max)d','action:call,fold'],
+}
+
+class ScriptQueue:
+    # the instructions of a script; reading past the end is an error
+    def __init__(self,lines):
+        self.lines = list(lines)
+    def get(self,*args):
+        if not self.lines:
+            raise AssertionError('read past the script')
+        return self.lines.pop(0)
+
+class Responses(list):
+    def put(self,text):
+        self.append(protocol.parseResponse(text))
+
+def run(betting2,script,maxBet,adjustscore):
+    iQ = ScriptQueue(line % {'max': maxBet} for line in script)
+    rQ = Responses()
+    target = team18.Target(adjustscore,maxBet)
+    result = betting2('veryopopkai',iQ,rQ,5,maxBet,adjustscore,target,None)
+    return result,list(rQ),iQ.lines
+
+def oldLoopRuns(adjustscore,maxBet):
+    # the bands of the old loops; the scores in the gaps between them had no loop at all
+    return (adjustscore == 0 or adjustscore > 0.7 or 0.7 > adjustscore > 0.66 or 0.66 > adjustscore > 0.56
+            or 0.45 <= adjustscore <= 0.54 or 0.33 < adjustscore < 0.4 or 0 < adjustscore < 0.33)
+
+SCORES = sorted(set(team18.setTarget(hand) for hand in evaluator.HANDS))
+
+@pytest.mark.parametrize('maxBet',[15,30])
+@pytest.mark.parametrize('name',sorted(SCRIPTS))
+def test_state_machine_answers_like_the_old_loops(name,maxBet):
+    compared = 0
+    for adjustscore in SCORES:
+        if not oldLoopRuns(adjustscore,maxBet):
+            continue
+        target = team18.Target(adjustscore,maxBet)
+        if name == 'answer the maximum' and target and target > maxBet:
+            continue
+        old = run(team18_loops.betting2,SCRIPTS[name],maxBet,adjustscore)
+        new = run(team18.betting2,SCRIPTS[name],maxBet,adjustscore)
+        assert new == old, (adjustscore,maxBet)
+        compared += 1
+    assert compared > 0
+
+def test_both_bands_are_covered():
+    bands = set(team18.strategyBand(score,maxBet) for score in SCORES for maxBet in (15,30)
+                if oldLoopRuns(score,maxBet))
+    assert bands == {team18.TARGET_BAND,team18.FOLDING_BAND}
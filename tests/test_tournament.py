@@ -0,0 +1,24 @@
+import pytest
+import tournament
+
+
+
+def summary(results):
+    return [(r.players,r.games,r.balances,r.wins,r.folds,r.ties,r.outcomes,r.edgeStats,r.pairStats) for r in results]
+
+def test_results_do_not_depend_on_worker_count():
+    serial = tournament.runTournament(['Ref01','team18'],500,seed=3,workers=1,shardSize=120)
+    parallel = tournament.runTournament(['Ref01','team18'],500,seed=3,workers=2,shardSize=120)
+    assert summary(serial) == summary(parallel)
+    assert serial[0].games == 500
+
+def test_duplicate_results_do_not_depend_on_worker_count():
+    serial = tournament.runTournament(['Ref01','team18'],400,seed=3,workers=1,shardSize=100,duplicate=True)
+    parallel = tournament.runTournament(['Ref01','team18'],400,seed=3,workers=3,shardSize=100,duplicate=True)
+    assert summary(serial) == summary(parallel)
+    assert serial[0].pairStats[0] == 200
+
+@pytest.mark.parametrize('gameCount,shardSize',[(400,99),(401,100),(400,0)])
+def test_bad_sizes_are_rejected_up_front(gameCount,shardSize):
+    with pytest.raises(ValueError):
+        tournament.runTournament(['Ref01','team18'],gameCount,workers=2,shardSize=shardSize,duplicate=shardSize > 0)
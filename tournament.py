@@ -0,0 +1,173 @@
+"""
+Round-robin fate17 tournament over all CPU cores.
+
+Every pairing of the given player modules plays "gameCount" headless games (see "engine").
+The games are cut into shards of "shardSize" games; each shard is seeded from the base seed,
+the pairing and the shard number only, and the shards are spread over a ProcessPoolExecutor.
+The totals for a given seed therefore do not depend on the number of workers.
+
+Usage:
+    python tournament.py Ref01 team18 [more players] [--games N] [--workers N] [--seed N] [--duplicate] [--latency]
+"""
+
+import os
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+import engine
+import latency
+
+SHARD_SIZE = 1000
+
+
+
+class PairingResult:
+    """
+    The aggregated games of one pairing. Index 0 is P1 and 1 is P2, as in "engine.Match".
+    """
+    def __init__(self,p1,p2):
+        self.players = (p1,p2) # module names
+        self.names = None # player names
+        self.games = 0
+        self.balances = [0,0]
+        self.wins = [0,0]
+        self.folds = [0,0]
+        self.ties = 0
+        self.outcomes = dict((o,0) for o in engine.OUTCOMES)
+        self.misbehave = [False,False]
+        self.edgeStats = [0,0,0] # see "engine.Match"
+        self.pairStats = [0,0,0] # duplicate mode only
+        self.latency = None # a "latency.LatencyRecorder" if the actions were timed
+    def add(self,other):
+        self.names = other.names
+        self.games += other.games
+        for i in (0,1):
+            self.balances[i] += other.balances[i]
+            self.wins[i] += other.wins[i]
+            self.folds[i] += other.folds[i]
+            self.misbehave[i] = self.misbehave[i] or other.misbehave[i]
+        self.ties += other.ties
+        for o in engine.OUTCOMES:
+            self.outcomes[o] += other.outcomes[o]
+        for k in range(3):
+            self.edgeStats[k] += other.edgeStats[k]
+            self.pairStats[k] += other.pairStats[k]
+        if other.latency is not None:
+            if self.latency is None:
+                self.latency = latency.LatencyRecorder(timeout=other.latency.timeout)
+            self.latency.merge(other.latency)
+    def winRate(self,i):
+        return self.wins[i] / self.games if self.games else 0.0
+    def foldRate(self,i):
+        return self.folds[i] / self.games if self.games else 0.0
+    def toString(self):
+        msg = '%s vs %s: %d games' % (self.names[0],self.names[1],self.games)
+        for i in (0,1):
+            msg += '\n    %-12s balance %8d  win %5.1f%%  fold %5.1f%%%s' % (self.names[i],self.balances[i],
+                        100*self.winRate(i),100*self.foldRate(i),' (misbehaved)' if self.misbehave[i] else '')
+        msg += '\n    ties %d, ' % self.ties + ', '.join('%s %d' % (o,self.outcomes[o]) for o in engine.OUTCOMES)
+        msg += '\n    %s edge per game %.3f +- %.3f' % ((self.names[0],) + engine.confidenceInterval(self.edgeStats))
+        if self.pairStats[0]:
+            mean,half = engine.confidenceInterval(self.pairStats)
+            msg += ', duplicate pairs %.3f +- %.3f' % (mean / 2,half / 2)
+        if self.latency is not None:
+            msg += '\n' + self.latency.summary()
+        return msg
+
+def shardSeed(seed,p1,p2,shard):
+    """
+    The seed of one shard. A string seed is hashed the same way on every platform and run.
+    """
+    return '%s:%s:%s:%d' % (seed,p1,p2,shard)
+
+def playShard(p1,p2,gameCount,seed,duplicate=False,timed=False):
+    """
+    Play one shard of headless games; runs in a worker process.
+    duplicate: play each deal twice with the seats swapped (see "engine.Match").
+    timed: record the latency of every action (see "latency").
+
+    Returns: the "PairingResult" of the shard.
+    """
+    seats = [engine.DirectSeat.fromModule(p1),engine.DirectSeat.fromModule(p2)]
+    recorder = latency.LatencyRecorder(timeout=engine.ACTION_TIMEOUT) if timed else None
+    match = engine.Match(seats,gameCount,seed,duplicate=duplicate,latency=recorder)
+    match.run()
+    result = PairingResult(p1,p2)
+    result.names = (seats[0].name,seats[1].name)
+    result.games = gameCount
+    result.balances = [seat.balance for seat in seats]
+    result.wins = list(match.wins)
+    result.folds = list(match.folds)
+    result.ties = match.ties
+    result.outcomes = dict(match.outcomes)
+    result.misbehave = [seat.misbehave for seat in seats]
+    result.edgeStats = list(match.edgeStats)
+    result.pairStats = list(match.pairStats)
+    result.latency = recorder
+    return result
+
+def _playShard(args):
+    return playShard(*args)
+
+def runTournament(players,gameCount,seed=0,workers=None,shardSize=SHARD_SIZE,duplicate=False,timed=False):
+    """
+    Play a round robin between the player modules.
+
+    players: the module names, e.g. ['Ref01','team18'].
+    gameCount: the number of games of each pairing.
+    seed: the base seed of all shards.
+    workers: the number of worker processes; None uses every core, 1 plays in this process.
+    shardSize: the number of games of a shard; even in duplicate mode.
+    duplicate: play every deal twice with the seats swapped, for a low-variance comparison;
+        gameCount must be even too.
+    timed: record per-action latency histograms, merged over the shards.
+
+    Returns: a list of "PairingResult", one per pairing. Raises ValueError before any game is
+        played if the sizes do not fit.
+    """
+    if shardSize < 1:
+        raise ValueError('the shard size must be positive, not %d' % shardSize)
+    if duplicate and (shardSize % 2 or gameCount % 2):
+        raise ValueError('duplicate mode needs an even number of games and an even shard size, not %d and %d'
+                         % (gameCount,shardSize))
+    pairings = list(combinations(players,2))
+    jobs = list()
+    for p1,p2 in pairings:
+        for shard in range(0,(gameCount + shardSize - 1) // shardSize):
+            count = min(shardSize,gameCount - shard*shardSize)
+            jobs.append((p1,p2,count,shardSeed(seed,p1,p2,shard),duplicate,timed))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        shards = map(_playShard,jobs)
+        return _collect(pairings,shards)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return _collect(pairings,executor.map(_playShard,jobs))
+
+def _collect(pairings,shards):
+    results = dict(((p1,p2),PairingResult(p1,p2)) for p1,p2 in pairings)
+    for shard in shards:
+        results[shard.players].add(shard)
+    return [results[pairing] for pairing in pairings]
+
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+    parser = argparse.ArgumentParser(description='Play a fate17 round robin on all cores.')
+    parser.add_argument('players',nargs='+',help='player modules, e.g. Ref01 team18')
+    parser.add_argument('--games',type=int,default=1000,help='games per pairing')
+    parser.add_argument('--workers',type=int,default=None)
+    parser.add_argument('--seed',type=int,default=0)
+    parser.add_argument('--shard-size',type=int,default=SHARD_SIZE)
+    parser.add_argument('--duplicate',action='store_true',help='play every deal twice with the seats swapped')
+    parser.add_argument('--latency',action='store_true',help='report the answer time of every action')
+    args = parser.parse_args()
+    start = time.perf_counter()
+    try:
+        results = runTournament(args.players,args.games,args.seed,args.workers,args.shard_size,args.duplicate,args.latency)
+    except ValueError as error:
+        parser.error(str(error))
+    for result in results:
+        print(result.toString())
+    print('%.2f seconds' % (time.perf_counter() - start))
@@ -1,43 +1,159 @@
+import os
+import sys
+import time
 import queue
 import threading
 import random
 import importlib
+import evaluator
+import channel
 
 ANTE = 5
 
-def log(src,message):
-    print('### %s log > %s' % (src,message))
+########## ########## ########## ########## ########## logging
+# Leveled console output for the host and the players. A message goes out only if its level
+# is at most "logLevel", and its arguments are %-formatted only then:
+#     utility.log(name,'unknown instruction: %s',text,level=utility.WARNING)
+# Hot paths test the level before building anything (if utility.logLevel >= utility.DEBUG: ...),
+# which is one global lookup and a comparison while the level is off.
+# Sampled mode: with logEvery N > 1 the per-game INFO and DEBUG output (e.g. the host's echo,
+# see "engine.Match") is kept for games 1, N+1, 2N+1, ... only, see "logSampled". ERROR and
+# WARNING messages are never sampled, so a silent throughput run still shows the anomalies.
+# The setting is read from the environment variable FATE17_LOG ('level' or 'level:N', e.g.
+# 'quiet', 'debug:1000') at import, so sandboxed players and tournament workers inherit it.
+QUIET = 0
+ERROR = 1
+WARNING = 2
+INFO = 3
+DEBUG = 4
+LEVELS = ('quiet','error','warning','info','debug')
+LOG_TAGS = ('','error','warning','log','debug')
+LOG_ENV = 'FATE17_LOG'
+logLevel = INFO # the utility.log calls of the players and the host, as before the levels
+logEvery = 1
+logStream = None # None: sys.stdout at the time of writing
+
+def log(src,message,*args,level=INFO):
+    """
+    Write "message % args" from src if level is on.
+    """
+    if level > logLevel:
+        return
+    if args:
+        message = message % args
+    (logStream or sys.stdout).write('### %s %s > %s\n' % (src,LOG_TAGS[level],message))
+
+def logSampled(gameIndex):
+    """
+    Whether the per-game output of game gameIndex (1-based) is kept in sampled mode.
+    """
+    return logEvery <= 1 or gameIndex % logEvery == 1
+
+def configureLogging(level=None,every=None,stream=None):
+    """
+    Set the log level (an int or a name in LEVELS), the sampling period and the stream.
+    The level and period are exported in FATE17_LOG for child processes.
+    """
+    global logLevel,logEvery,logStream
+    if level is not None:
+        logLevel = LEVELS.index(level) if isinstance(level,str) else level
+    if every is not None:
+        logEvery = max(1,every)
+    if stream is not None:
+        logStream = stream
+    os.environ[LOG_ENV] = '%s:%d' % (LEVELS[logLevel],logEvery)
+
+def _loggingFromEnvironment():
+    setting = os.environ.get(LOG_ENV)
+    if not setting:
+        return
+    level,_,every = setting.partition(':')
+    try:
+        configureLogging(level.strip().lower(),int(every) if every else None)
+    except ValueError:
+        log('utility','bad %s setting %r',LOG_ENV,setting,level=WARNING)
+
+_loggingFromEnvironment()
+
+
+
 class Player:
-    def __init__(self,source,gameCount):
+    # queueType: the factory of iQ and rQ; "channel.Channel" by default, queue.Queue also works.
+    # profile: an optional cProfile.Profile the player thread runs under (see "profiler").
+    def __init__(self,source,gameCount,queueType=None,profile=None):
         playerModule = importlib.import_module(source)
-        print(playerModule)
+        log('host','player %s from %s',playerModule.name,getattr(playerModule,'__file__',source))
         self.name = playerModule.name
         self.balance = 0
-        self.iQ = queue.Queue()
-        self.rQ = queue.Queue()
+        if queueType is None:
+            queueType = channel.Channel
+        self.iQ = queueType()
+        self.rQ = queueType()
         self.cards = None
         self.gameCount = gameCount
         self.misbehave = False
-        self.thread = threading.Thread(target=playerModule.play,args=(self.gameCount,self.iQ,self.rQ),daemon=True)
+        self.play = playerModule.play
+        self.profile = profile
+        self.cpuTime = None # the CPU time (ns) of the player thread, once "play" has returned
+        self.thread = threading.Thread(target=self._run,daemon=True)
+    def _run(self):
+        if self.profile is not None:
+            self.profile.runcall(self.play,self.gameCount,self.iQ,self.rQ)
+        else:
+            self.play(self.gameCount,self.iQ,self.rQ)
+        self.cpuTime = time.thread_time_ns()
     def start(self):
         self.thread.start()
-    def join(self):
-        self.thread.join()
+    def join(self,timeout=None):
+        # Returns: True if the thread has ended (False after a timeout).
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+def dealOrder(rng=random):
+    # a whole deal order (a permutation of the 17 card ids) drawn in one call
+    return rng.sample(range(len(evaluator.CARDS)),len(evaluator.CARDS))
 
 class Deck:
-    def __init__(self):
-        self.cards = set(('%s%s' % (suit,rank)) for suit in ['S','H','D','C'] for rank in ['A','K','Q','J'])
-        self.cards.add('J')
+    # The remaining cards are kept in an array of card ids (see "evaluator"), ids[:count],
+    # and as a 17-bit mask. Dealing a card swaps it to the end of the array: O(1), no set rebuilt.
+    # rng: the random.Random used for dealing.
+    # seed: if rng is None, a random.Random(seed) is used; with neither, the global random module.
+    # order: a pre-generated deal order (see "dealOrder"); cards are then dealt in this order
+    #   and rng is never called, so a game can be replayed exactly.
+    def __init__(self,rng=None,seed=None,order=None):
+        if rng is None:
+            rng = random.Random(seed) if seed is not None else random
+        self.rng = rng
+        self.order = order
+        self.ids = list(reversed(order)) if order is not None else list(range(len(evaluator.CARDS)))
+        self.count = len(self.ids)
+        self.mask = evaluator.FULL_MASK
+    @property
+    def cards(self): # the remaining cards as strings
+        return set(evaluator.maskToCards(self.mask))
     def size(self):
-        return len(self.cards)
-    def deal(self,count=1):
-        if len(self.cards) < count:
+        return self.count
+    def dealMask(self,count=1): # deal as a card mask
+        if self.count < count:
             return None
-        selected = set(random.sample(self.cards,count))
-        self.cards -= selected
+        ids = self.ids
+        selected = 0
+        for _ in range(count):
+            last = self.count - 1
+            if self.order is None: # swap a random card to the end
+                j = self.rng.randrange(self.count)
+                ids[j],ids[last] = ids[last],ids[j]
+            selected |= 1 << ids[last]
+            self.count = last
+        self.mask ^= selected
         return selected
+    def deal(self,count=1): # deal as a set of card strings
+        selected = self.dealMask(count)
+        if selected is None:
+            return None
+        return set(evaluator.maskToCards(selected))
     def toString(self):
-        return ','.join(self.cards)
+        return evaluator.maskToString(self.mask)
 
 class Bet:
     def __init__(self):
@@ -87,80 +203,7 @@ class Fate17Hand:
         # >= 30000: two pair
         # >= 20000: one pair
     def analyze(self):
-        rankWeight = {'A': 8, 'K': 6, 'Q': 4, 'J': 2}
-        hasJoker = False
-        rankToCount = dict()
-        suitToCount = dict() # needed to tell straight from royal straight flush
-        for card in self.cards:
-            if len(card) == 1: # joker
-                hasJoker = True
-            else:
-                rankToCount[card[1]] = rankToCount.get(card[1],0) + 1
-                suitToCount[card[0]] = suitToCount.get(card[0],0) + 1
-        countToRank = dict()
-        for k in rankToCount:
-            countToRank.setdefault(rankToCount[k],list()).append(k)
-        if hasJoker and 4 in countToRank: # five card
-            self.type = 'five card'
-            self.score = 90000
-        elif hasJoker and len(rankToCount) == 4: # straight
-            if len(suitToCount) == 1: # same suit: royal straight flush
-                self.type = 'royal straight flush'
-                self.score = 80000
-            else: # straight
-                self.type = 'straight'
-                self.score = 50000
-        elif not hasJoker and 4 in countToRank: # four card w/o joker
-            self.type = 'four card'
-            self.score = 70000
-            self.score += rankWeight[countToRank[4][0]] * 1000
-            self.score += rankWeight[countToRank[1][0]] * 100
-        elif hasJoker and 3 in countToRank: # four card w/ joker
-            self.type = 'four card'
-            self.score = 70000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[1][0]] * 100
-        elif 3 in countToRank and 2 in countToRank: # full house w/o joker
-            self.type = 'full house'
-            self.score = 60000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[2][0]] * 100
-        elif hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # full house w/ joker
-            self.type = 'full house'
-            r1 = countToRank[2][0]
-            r2 = countToRank[2][1]
-            self.score = 60000 + max(rankWeight[r1] * 1000 + rankWeight[r2] * 100,
-                                        rankWeight[r2] * 1000 + rankWeight[r1] * 100)
-        elif not hasJoker and 3 in countToRank and 2 not in countToRank: # 3 card w/o joker
-            self.type = 'three card'
-            r1 = countToRank[1][0]
-            r2 = countToRank[1][1]
-            self.score = 40000 + rankWeight[countToRank[3][0]] * 1000 + \
-                        max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
-        elif hasJoker and 2 in countToRank and 1 in countToRank: # 3 card w/ joker
-            self.type = 'three card'
-            r1 = countToRank[1][0]
-            r2 = countToRank[1][1]
-            self.score = 40000 + rankWeight[countToRank[2][0]] * 1000 + \
-                        max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
-        elif not hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # 2 pair (must be w/o joker)
-            self.type = 'two pair'
-            p1 = countToRank[2][0]
-            p2 = countToRank[2][1]
-            self.score = 30000 +  \
-                        max(rankWeight[p1] * 1000 + rankWeight[p2] * 100,
-                            rankWeight[p2] * 1000 + rankWeight[p1] * 100) + \
-                        rankWeight[countToRank[1][0]] * 10
-        elif not hasJoker and len(rankToCount) == 4: # 1 pair (must be w/o joker)
-            self.type = 'one pair'
-            p = countToRank[2][0]
-            self.score = 20000 + rankWeight[p] * 1000
-            if p == 'A':
-                self.score += rankWeight['K'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
-            elif p == 'K':
-                self.score += rankWeight['A'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
-            elif p == 'Q':
-                self.score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['J']
-            else: # p = 'J'
-                self.score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['Q']
-        else:
-            print('ops, this one is out of my analysis... %s' % (','.join(self.cards)))
+        self.score,self.type = evaluator.analyzeHand(self.cards)
     def getScore(self):
         return self.score
     def toString(self):
@@ -177,84 +220,33 @@ class Fate17Hand:
 # >= 40000: three card
 # >= 30000: two pair
 # >= 20000: one pair
-def analyzeHand(cards): # a list or set of 5 cards
-    rankWeight = {'A': 8, 'K': 6, 'Q': 4, 'J': 2}
-    hasJoker = False
-    rankToCount = dict()
-    suitToCount = dict() # needed to tell straight from royal straight flush
-    score = 0
-    category = None
-    ### pre-processing
-    for card in cards:
-        if len(card) == 1: # joker
-            hasJoker = True
-        else:
-            rankToCount[card[1]] = rankToCount.get(card[1],0) + 1
-            suitToCount[card[0]] = suitToCount.get(card[0],0) + 1
-    countToRank = dict()
-    for k in rankToCount:
-        countToRank.setdefault(rankToCount[k],list()).append(k)
-    ### 
-    if hasJoker and 4 in countToRank: # five card
-        category = 'five card'
-        score = 90000
-    elif hasJoker and len(rankToCount) == 4: # straight
-        if len(suitToCount) == 1: # same suit: royal straight flush
-            category = 'royal straight flush'
-            score = 80000
-        else: # straight
-            category = 'straight'
-            score = 50000
-    elif not hasJoker and 4 in countToRank: # four card w/o joker
-        category = 'four card'
-        score = 70000
-        score += rankWeight[countToRank[4][0]] * 1000
-        score += rankWeight[countToRank[1][0]] * 100
-    elif hasJoker and 3 in countToRank: # four card w/ joker
-        category = 'four card'
-        score = 70000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[1][0]] * 100
-    elif 3 in countToRank and 2 in countToRank: # full house w/o joker
-        category = 'full house'
-        score = 60000 + rankWeight[countToRank[3][0]] * 1000 + rankWeight[countToRank[2][0]] * 100
-    elif hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # full house w/ joker
-        category = 'full house'
-        r1 = countToRank[2][0]
-        r2 = countToRank[2][1]
-        score = 60000 + max(rankWeight[r1] * 1000 + rankWeight[r2] * 100,
-                                rankWeight[r2] * 1000 + rankWeight[r1] * 100)
-    elif not hasJoker and 3 in countToRank and 2 not in countToRank: # 3 card w/o joker
-        category = 'three card'
-        r1 = countToRank[1][0]
-        r2 = countToRank[1][1]
-        score = 40000 + rankWeight[countToRank[3][0]] * 1000 + \
-                    max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
-    elif hasJoker and 2 in countToRank and 1 in countToRank: # 3 card w/ joker
-        category = 'three card'
-        r1 = countToRank[1][0]
-        r2 = countToRank[1][1]
-        score = 40000 + rankWeight[countToRank[2][0]] * 1000 + \
-                    max(rankWeight[r1] * 100 + rankWeight[r2] * 10, rankWeight[r2] * 100 + rankWeight[r1] * 10)
-    elif not hasJoker and 2 in countToRank and len(countToRank[2]) == 2: # 2 pair (must be w/o joker)
-        category = 'two pair'
-        p1 = countToRank[2][0]
-        p2 = countToRank[2][1]
-        score = 30000 +  \
-                    max(rankWeight[p1] * 1000 + rankWeight[p2] * 100,
-                        rankWeight[p2] * 1000 + rankWeight[p1] * 100) + \
-                    rankWeight[countToRank[1][0]] * 10
-    elif not hasJoker and len(rankToCount) == 4: # 1 pair (must be w/o joker)
-        category = 'one pair'
-        p = countToRank[2][0]
-        score = 20000 + rankWeight[p] * 1000
-        if p == 'A':
-            score += rankWeight['K'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
-        elif p == 'K':
-            score += rankWeight['A'] * 100 + rankWeight['Q'] * 10 + rankWeight['J']
-        elif p == 'Q':
-            score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['J']
-        else: # p = 'J'
-            score += rankWeight['A'] * 100 + rankWeight['K'] * 10 + rankWeight['Q']
-    else:
-        print('ops, this one is out of my analysis... %s' % (','.join(cards)))
-    ###
-    return score,category
+def analyzeHand(cards): # a list or set of 5 cards, or their 17-bit mask
+    return evaluator.analyzeHand(cards)
+
+_batchTables = None # numpy (score, category code) tables indexed by mask, built on first use
+
+def analyzeHand_batch(hands):
+    """
+    Grade many hands in one call with NumPy array operations; a gather from the
+    precomputed table of "evaluator".
+
+    hands: an (N,5) integer array of card ids, or an (N,) integer array of 17-bit masks.
+
+    Returns: (scores, codes), two (N,) arrays. scores[i] is the score "analyzeHand" gives
+        hand i and codes[i] indexes evaluator.CATEGORIES. Masks that are not five-card
+        hands give score 0 and code -1.
+    """
+    import numpy
+    global _batchTables
+    if _batchTables is None:
+        scores = numpy.zeros(evaluator.FULL_MASK + 1,dtype=numpy.int32)
+        codes = numpy.full(evaluator.FULL_MASK + 1,-1,dtype=numpy.int8)
+        masks = numpy.array(evaluator.HANDS,dtype=numpy.int64)
+        scores[masks] = evaluator.SCORES
+        codes[masks] = evaluator.CATEGORY_CODES
+        _batchTables = (scores,codes)
+    hands = numpy.asarray(hands)
+    if hands.ndim == 2: # card ids -> masks
+        hands = numpy.bitwise_or.reduce(numpy.left_shift(1,hands.astype(numpy.int32)),axis=1)
+    scores,codes = _batchTables
+    return scores[hands],codes[hands]